@@ -0,0 +1,140 @@
+import threading
+import numpy as np
+from oscillators import Oscillator
+from voiceMixer import VoiceMixer
+
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 512
+
+# Real-time output engine
+# One PyAudio stream stays open for as long as the app runs, in callback mode: PortAudio
+# asks for BLOCK_SIZE frames at a time and each block is mixed from the voices that are
+# playing, mixed to stereo by voiceMixer. A new sound starts on the next block (about
+# 12 ms at 512 frames) instead of after a stream opens, overlapping sounds add up in the
+# one stream, and a long sound is rendered one block at a time rather than as a whole
+# multi-second array.
+
+# A sound being played. render(out) adds the next len(out) frames into out and returns
+# False once the sound has finished. gain and pan can be changed while it plays.
+class Voice:
+    def __init__(self):
+        self.stopped = False
+        self.gain = 1.0
+        self.pan = 0.0
+
+    def stop(self):
+        self.stopped = True
+
+    def render(self, out):
+        raise NotImplementedError
+
+# Plays an already rendered mono wave (e.g. loaded from a file), a slice at a time
+class BufferVoice(Voice):
+    def __init__(self, wave):
+        super().__init__()
+        self.wave = np.asarray(wave, dtype=np.float32)
+        if self.wave.ndim == 2 and self.wave.shape[1] == 1:
+            self.wave = self.wave[:, 0]
+        if self.wave.ndim != 1:
+            raise ValueError(f"BufferVoice plays mono waves, got shape {self.wave.shape}")
+        self.position = 0
+
+    def render(self, out):
+        chunk = self.wave[self.position:self.position + len(out)]
+        out[:len(chunk)] += chunk
+        self.position += len(chunk)
+        return self.position < len(self.wave)
+
+# A tone generated block by block: noise, or one of the band-limited oscillators
+# (Sine, Square, Saw, Triangle), whose phase carries over from one block to the next so
+# there's no click at block edges
+class ToneVoice(Voice):
+    def __init__(self, wave_type, frequency, duration, sample_rate=SAMPLE_RATE, amplitude=0.5):
+        super().__init__()
+        self.wave_type = wave_type
+        self.amplitude = amplitude
+        self.remaining = int(sample_rate * duration)
+        self.oscillator = None if wave_type == "Noise" else Oscillator(wave_type, frequency, sample_rate, amplitude)
+        self.rng = np.random.default_rng()
+
+    def render(self, out):
+        frames = min(len(out), self.remaining)
+        if self.oscillator is None:
+            out[:frames] += self.amplitude * self.rng.uniform(-1, 1, frames)
+        else:
+            self.oscillator.render_into(out[:frames])
+        self.remaining -= frames
+        return self.remaining > 0
+
+class AudioEngine:
+    def __init__(self, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, max_voices=64):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.underruns = 0
+        self.mixer = VoiceMixer(max_voices, block_size)
+        self._audio = None
+        self._stream = None
+
+    # Open the output device. pyaudio is only needed here; render() works without it.
+    def start(self):
+        import pyaudio
+        self._paContinue = pyaudio.paContinue
+        self._paOutputUnderflow = pyaudio.paOutputUnderflow
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paFloat32, channels=2, rate=self.sample_rate, output=True,
+                                        frames_per_buffer=self.block_size, stream_callback=self._callback)
+        self._stream.start_stream()
+
+    # Start a voice on the next block; returns it so the caller can stop() it
+    def play(self, voice, gain=1.0, pan=0.0):
+        return self.mixer.play(voice, gain, pan)
+
+    def play_together(self, voices, gain=1.0, pan=0.0):
+        return self.mixer.play_together(voices, gain, pan)
+
+    def stop_all(self):
+        self.mixer.stop_all()
+
+    # The next frames of interleaved stereo, see VoiceMixer.render. Called from the
+    # PortAudio callback.
+    def render(self, frames):
+        return self.mixer.render(frames)
+
+    # An exception escaping here would abort the stream for good, so anything the mixer
+    # doesn't already catch per voice becomes a block of silence
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & self._paOutputUnderflow:
+            self.underruns += 1
+        try:
+            block = self.render(frame_count).tobytes()
+        except Exception as e:
+            print(f"Error mixing audio: {e}")
+            block = bytes(frame_count * 2 * 4)  # stereo float32 silence
+        return (block, self._paContinue)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._audio.terminate()
+            self._stream = self._audio = None
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# The app-wide engine, started on first use
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AudioEngine()
+            _engine.start()
+        return _engine
+
+def close_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+            _engine = None
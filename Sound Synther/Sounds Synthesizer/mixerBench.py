@@ -0,0 +1,76 @@
+import argparse
+import time
+import numpy as np
+from audioEngine import SAMPLE_RATE, AudioEngine, ToneVoice
+from voiceMixer import VoiceMixer
+
+# How many voices the mixer can play before the audio callback misses its deadline.
+# A block of N frames has to be mixed in less than N / sample_rate seconds, and in
+# practice well under it since the callback shares the CPU with the GUI and PortAudio.
+# For rising voice counts this times mixing --blocks blocks and reports the worst-case
+# (p99) block time as a share of that budget; a count is "safe" while p99 stays under
+# --headroom of the budget. With --device it also plays each count on the real output
+# stream and counts the underflows PortAudio reports.
+#
+#   python mixerBench.py [--block-size 512] [--device]
+
+WAVE_TYPES = ("Sine", "Square", "Noise")
+
+def tones(count, seconds):
+    return [ToneVoice(WAVE_TYPES[i % len(WAVE_TYPES)], 110 * 2 ** ((i % 36) / 12), seconds, amplitude=0.5 / count)
+            for i in range(count)]
+
+def block_times(count, block_size, blocks):
+    mixer = VoiceMixer(max_voices=count, block_size=block_size)
+    for i, voice in enumerate(tones(count, 3600)):
+        mixer.play(voice, pan=(i / max(count - 1, 1)) * 2 - 1)
+    mixer.render(block_size)  # take the voices into their slots
+    samples = np.empty(blocks)
+    for i in range(blocks):
+        start = time.perf_counter()
+        mixer.render(block_size)
+        samples[i] = time.perf_counter() - start
+    return samples
+
+def device_underruns(count, block_size, seconds):
+    engine = AudioEngine(block_size=block_size, max_voices=count)
+    engine.start()
+    try:
+        for voice in tones(count, seconds):
+            engine.play(voice)
+        time.sleep(seconds)
+    finally:
+        engine.close()
+    return engine.underruns
+
+def run(block_size, blocks, headroom, device, counts):
+    budget = block_size / SAMPLE_RATE
+    print(f"block {block_size} frames = {budget * 1000:.2f} ms budget, safe while p99 < {headroom:.0%} of it")
+    print(f"{'voices':>7} {'mean ms':>8} {'p99 ms':>8} {'p99 load':>9}" + (f" {'underruns':>10}" if device else ""))
+    safe = 0
+    for count in counts:
+        samples = block_times(count, block_size, blocks)
+        p99 = np.percentile(samples, 99)
+        line = f"{count:>7} {samples.mean() * 1000:>8.3f} {p99 * 1000:>8.3f} {p99 / budget:>9.0%}"
+        if device:
+            line += f" {device_underruns(count, block_size, 2.0):>10}"
+        print(line)
+        if p99 < headroom * budget:
+            safe = count
+        else:
+            break
+    print(f"Up to {safe} voices mix within {headroom:.0%} of the block budget")
+    return safe
+
+def main():
+    parser = argparse.ArgumentParser(description="Voice mixer capacity benchmark")
+    parser.add_argument("--block-size", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=500, help="blocks timed per voice count")
+    parser.add_argument("--headroom", type=float, default=0.5, help="share of the block budget the mixer may use")
+    parser.add_argument("--device", action="store_true", help="also play on the output device and count underruns")
+    args = parser.parse_args()
+    counts = [1, 2, 4, 8, 16, 32, 48, 64, 96, 128, 192, 256, 384, 512]
+    run(args.block_size, args.blocks, args.headroom, args.device, counts)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import time
+import numpy as np
+from oscillators import WAVE_TYPES, OscillatorBank, Oscillator, render_wave
+
+# Oscillator throughput and aliasing
+# 1. A whole tone: the old np.linspace + np.sin (+ np.sign for square) over the full
+#    duration against render_wave.
+# 2. Aliasing: share of a high square wave's energy that isn't at one of its harmonics,
+#    naive np.sign against the band-limited table.
+# 3. Many tones: for rising oscillator counts, time OscillatorBank rendering them as one
+#    2-D block against a loop over single Oscillators, as a share of the block budget.
+#
+#   python oscillatorBench.py [--block-size 512] [--seconds 5]
+
+SAMPLE_RATE = 44100
+
+def best_of(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+def naive_wave(wave_type, frequency, duration, sample_rate=SAMPLE_RATE, amplitude=0.5):
+    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+    wave = np.sin(2 * np.pi * frequency * t)
+    if wave_type == "Square":
+        wave = np.sign(wave)
+    return amplitude * wave
+
+# Energy outside +-3 Hz of each harmonic, in dB relative to the total
+def alias_db(wave, frequency, sample_rate=SAMPLE_RATE):
+    power = np.abs(np.fft.rfft(wave)) ** 2
+    bins = np.fft.rfftfreq(len(wave), 1 / sample_rate)
+    harmonic = np.abs(bins / frequency - np.round(bins / frequency)) * frequency < 3
+    return 10 * np.log10(power[~harmonic].sum() / power.sum())
+
+def whole_tones(seconds):
+    print(f"{seconds:g} s tone at 440 Hz {'old ms':>10} {'new ms':>10}")
+    for wave_type in ("Sine", "Square"):
+        old = best_of(lambda: naive_wave(wave_type, 440, seconds))
+        new = best_of(lambda: render_wave(wave_type, 440, seconds))
+        print(f"{wave_type:<23} {old * 1000:>10.2f} {new * 1000:>10.2f}")
+
+def aliasing():
+    print(f"\n{'square at':<10} {'np.sign dB':>11} {'table dB':>9}")
+    for frequency in (1000, 3000, 5000, 9000):
+        naive = naive_wave("Square", frequency, 1.0)
+        table = render_wave("Square", frequency, 1.0)
+        print(f"{frequency:>7} Hz {alias_db(naive, frequency):>11.1f} {alias_db(table, frequency):>9.1f}")
+
+def many_tones(block_size, blocks):
+    budget = block_size / SAMPLE_RATE
+    print(f"\nblock {block_size} frames = {budget * 1000:.2f} ms budget")
+    print(f"{'oscillators':>11} {'bank ms':>8} {'load':>6} {'loop ms':>8} {'load':>6}")
+    for count in (1, 16, 64, 128, 256, 512, 1024):
+        wave_types = [WAVE_TYPES[i % len(WAVE_TYPES)] for i in range(count)]
+        frequencies = 55 * 2 ** (np.arange(count) % 60 / 12)
+        bank = OscillatorBank(wave_types, frequencies, amplitudes=1 / count)
+        oscillators = [Oscillator(w, f, amplitude=1 / count) for w, f in zip(wave_types, frequencies)]
+        out = np.zeros(block_size, dtype=np.float32)
+
+        def loop():
+            out.fill(0)
+            for oscillator in oscillators:
+                oscillator.render_into(out)
+        bank_time = best_of(lambda: [bank.mix(block_size) for _ in range(blocks)]) / blocks
+        loop_time = best_of(lambda: [loop() for _ in range(blocks)]) / blocks
+        print(f"{count:>11} {bank_time * 1000:>8.3f} {bank_time / budget:>6.0%} "
+              f"{loop_time * 1000:>8.3f} {loop_time / budget:>6.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Wavetable oscillator benchmark")
+    parser.add_argument("--block-size", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=20, help="blocks rendered per timing")
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of the whole-tone test")
+    args = parser.parse_args()
+    whole_tones(args.seconds)
+    aliasing()
+    many_tones(args.block_size, args.blocks)
+
+if __name__ == "__main__":
+    main()
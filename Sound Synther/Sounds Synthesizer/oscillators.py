@@ -0,0 +1,121 @@
+from functools import lru_cache
+import numpy as np
+
+# Band-limited wavetable oscillators
+# Each waveform is stored as a set of single-cycle tables, one per octave, holding only
+# the harmonics that stay below Nyquist for the highest note of that octave, so a high
+# square or saw doesn't fold its upper harmonics back down as aliasing the way
+# np.sign(np.sin(...)) does. An oscillator keeps a phase accumulator (0..1 per cycle)
+# and renders a block at a time by linear interpolation into its octave's table, so
+# consecutive blocks join without a click and nothing is computed for the whole
+# duration up front. OscillatorBank renders many oscillators as one (oscillators,
+# frames) array with one table lookup, for hundreds of simultaneous tones.
+
+WAVE_TYPES = ("Sine", "Square", "Saw", "Triangle")
+TABLE_SIZE = 2048
+LOWEST_BAND = 20.0  # Hz; band b covers LOWEST_BAND * 2**b up to twice that
+BANDS = 11          # up to 40 kHz, past Nyquist at 44.1/48 kHz
+
+# Amplitude of harmonic k (1-based) of each waveform's Fourier sine series
+def harmonic_amplitudes(wave_type, harmonics):
+    k = np.arange(1, harmonics + 1)
+    if wave_type == "Sine":
+        return (k == 1).astype(float)
+    if wave_type == "Square":
+        return np.where(k % 2 == 1, 4 / (np.pi * k), 0.0)
+    if wave_type == "Saw":
+        return 2 / (np.pi * k) * np.where(k % 2 == 1, 1.0, -1.0)
+    if wave_type == "Triangle":
+        return np.where(k % 2 == 1, 8 / (np.pi ** 2 * k ** 2) * np.where(k % 4 == 1, 1.0, -1.0), 0.0)
+    raise ValueError(f"Unknown waveform: {wave_type}")
+
+# (len(WAVE_TYPES), BANDS, TABLE_SIZE + 1) float32 tables for a sample rate, built once;
+# the extra sample repeats the first so interpolation never wraps
+@lru_cache(maxsize=None)
+def wavetables(sample_rate=44100):
+    tables = np.zeros((len(WAVE_TYPES), BANDS, TABLE_SIZE + 1), dtype=np.float32)
+    for band in range(BANDS):
+        harmonics = max(1, min(TABLE_SIZE // 2 - 1, int(sample_rate / 2 // (LOWEST_BAND * 2 ** (band + 1)))))
+        for wave, wave_type in enumerate(WAVE_TYPES):
+            spectrum = np.zeros(TABLE_SIZE // 2 + 1, dtype=complex)
+            spectrum[1:harmonics + 1] = -0.5j * TABLE_SIZE * harmonic_amplitudes(wave_type, harmonics)
+            table = np.fft.irfft(spectrum, TABLE_SIZE)
+            table /= np.abs(table).max()
+            tables[wave, band, :TABLE_SIZE] = table
+            tables[wave, band, TABLE_SIZE] = table[0]
+    return tables
+
+def band_for(frequency):
+    return np.clip(np.floor(np.log2(np.maximum(frequency, 1e-9) / LOWEST_BAND)), 0, BANDS - 1).astype(np.intp)
+
+# Phase is kept in table samples (0..TABLE_SIZE) rather than cycles, so the lookup needs
+# no extra multiply, and wraps with a mask since TABLE_SIZE is a power of two
+class Oscillator:
+    def __init__(self, wave_type, frequency, sample_rate=44100, amplitude=1.0, phase=0.0):
+        self.table = wavetables(sample_rate)[WAVE_TYPES.index(wave_type), band_for(frequency)]
+        self.increment = frequency / sample_rate * TABLE_SIZE
+        self.amplitude = amplitude
+        self.phase = phase % 1.0 * TABLE_SIZE
+
+    # Add the next len(out) samples into out
+    def render_into(self, out):
+        frames = len(out)
+        positions = self.phase + self.increment * np.arange(frames)
+        index = positions.astype(np.intp)
+        fraction = positions - index
+        index &= TABLE_SIZE - 1
+        left = self.table[index]
+        out += self.amplitude * (left + fraction * (self.table[index + 1] - left))
+        self.phase = (self.phase + self.increment * frames) % TABLE_SIZE
+
+    def render(self, frames):
+        out = np.zeros(frames, dtype=np.float32)
+        self.render_into(out)
+        return out
+
+# Every oscillator's table is a row of one flat array, so a block for all of them is two
+# np.take calls on an (oscillators, frames) index array
+class OscillatorBank:
+    def __init__(self, wave_types, frequencies, sample_rate=44100, amplitudes=1.0):
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        self.tables = wavetables(sample_rate).ravel()
+        waves = np.array([WAVE_TYPES.index(wave_type) for wave_type in wave_types], dtype=np.intp)
+        self.rows = (waves * BANDS + band_for(frequencies)) * (TABLE_SIZE + 1)
+        self.increments = frequencies / sample_rate * TABLE_SIZE
+        self.amplitudes = np.broadcast_to(np.asarray(amplitudes, dtype=np.float32), frequencies.shape).copy()
+        self.phases = np.zeros(len(frequencies))
+
+    # The next frames of every oscillator at full scale, and advance the phases
+    def _lookup(self, frames):
+        positions = self.increments[:, None] * np.arange(frames)
+        positions += self.phases[:, None]
+        index = positions.astype(np.intp)
+        fraction = (positions - index).astype(np.float32)
+        index &= TABLE_SIZE - 1
+        index += self.rows[:, None]
+        block = self.tables.take(index)
+        index += 1
+        step = self.tables.take(index)
+        step -= block
+        step *= fraction
+        block += step
+        self.phases = (self.phases + self.increments * frames) % TABLE_SIZE
+        return block
+
+    # The next frames of every oscillator as an (oscillators, frames) float32 array
+    def render(self, frames):
+        block = self._lookup(frames)
+        block *= self.amplitudes[:, None]
+        return block
+
+    # All oscillators summed into one channel, weighted by their amplitudes
+    def mix(self, frames):
+        return self.amplitudes @ self._lookup(frames)
+
+# A whole tone as one array, rendered in blocks into a preallocated float32 buffer
+def render_wave(wave_type, frequency, duration, sample_rate=44100, amplitude=0.5, block_size=8192):
+    out = np.zeros(int(sample_rate * duration), dtype=np.float32)
+    oscillator = Oscillator(wave_type, frequency, sample_rate, amplitude)
+    for start in range(0, len(out), block_size):
+        oscillator.render_into(out[start:start + block_size])
+    return out
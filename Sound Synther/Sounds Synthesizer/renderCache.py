@@ -0,0 +1,187 @@
+import hashlib
+import os
+import queue
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+from oscillators import WAVE_TYPES, render_wave
+
+# Render cache for whole waveforms
+# Pressing Generate or Export again with the same settings, or exporting the same tones
+# in a combination, shouldn't synthesize them again. Rendered waves are kept in memory by
+# (wave_type, frequency, duration, sample_rate, amplitude), least recently used first out
+# once they add up to more than memory_budget bytes. Every render is also written to
+# directory as a .npy file, so a wave dropped from memory (or rendered in an earlier run)
+# comes back as a memory-mapped array without being synthesized, and the files past
+# disk_budget are deleted oldest first. Mapped waves are only read from disk as they're
+# played, so they're kept separately (up to MAX_MAPPED of them) and don't count against
+# memory_budget. Noise is random on purpose and isn't cached.
+#
+# Cached arrays are read-only and shared, so copy one before changing it.
+
+MEMORY_BUDGET = 64 * 1024 * 1024
+DISK_BUDGET = 512 * 1024 * 1024
+MAX_MAPPED = 256  # open memory-mapped files
+
+# The per-user cache folder, not wherever the app happens to be started from
+def default_cache_dir():
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "SoundSynth", "render_cache")
+
+CACHE_DIR = default_cache_dir()
+
+class RenderCache:
+    def __init__(self, directory=CACHE_DIR, memory_budget=MEMORY_BUDGET, disk_budget=DISK_BUDGET, render=render_wave):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.render = render
+        self.hits = self.disk_hits = self.misses = 0
+        self.memory_bytes = 0
+        self._waves = OrderedDict()   # rendered arrays held in memory
+        self._mapped = OrderedDict()  # memory-mapped .npy files
+        self._lock = threading.Lock()
+        self._fills = queue.SimpleQueue()  # keys for the background renderer
+        self._queued = set()
+        self._worker = None
+
+    def key(self, wave_type, frequency, duration, sample_rate=44100, amplitude=0.5):
+        if wave_type not in WAVE_TYPES:
+            raise ValueError(f"Can't cache waveform: {wave_type}")
+        return (wave_type, float(frequency), float(duration), int(sample_rate), float(amplitude))
+
+    # The cached wave, or None without rendering anything
+    def peek(self, wave_type, frequency, duration, sample_rate=44100, amplitude=0.5):
+        return self._lookup(self.key(wave_type, frequency, duration, sample_rate, amplitude))
+
+    # The cached wave, rendered (on the calling thread) if it isn't cached yet. The lock
+    # isn't held while rendering or saving, so a lookup from the Tk thread never waits on
+    # a background render.
+    def get(self, wave_type, frequency, duration, sample_rate=44100, amplitude=0.5):
+        key = self.key(wave_type, frequency, duration, sample_rate, amplitude)
+        wave = self._lookup(key)
+        if wave is None:
+            wave = self.render(*key)
+            wave.flags.writeable = False
+            self._save(self.path(key), wave)
+            with self._lock:
+                self.misses += 1
+                self._remember(key, wave)
+        return wave
+
+    # Render into the cache on a background thread, e.g. while the tone is being played
+    # block by block, so the next request for it is a hit
+    def prefetch(self, wave_type, frequency, duration, sample_rate=44100, amplitude=0.5):
+        key = self.key(wave_type, frequency, duration, sample_rate, amplitude)
+        with self._lock:
+            if key in self._waves or key in self._mapped or key in self._queued:
+                return
+            self._queued.add(key)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._fill, name="RenderCache", daemon=True)
+                self._worker.start()
+        self._fills.put(key)
+
+    def _fill(self):
+        while True:
+            key = self._fills.get()
+            try:
+                self.get(*key)
+            except Exception as e:
+                print(f"Error rendering {key[0]} into the cache: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(key)
+
+    def _lookup(self, key):
+        with self._lock:
+            for waves in (self._waves, self._mapped):
+                wave = waves.get(key)
+                if wave is not None:
+                    waves.move_to_end(key)
+                    self.hits += 1
+                    return wave
+            wave = self._load(self.path(key))
+            if wave is not None:
+                self.disk_hits += 1
+                self._remember(key, wave)
+            return wave
+
+    def path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        return os.path.join(self.directory, f"{key[0]}-{digest}.npy")
+
+    def _load(self, path):
+        try:
+            wave = np.load(path, mmap_mode='r')
+            os.utime(path)  # keep recently used files when pruning
+            return wave
+        except (OSError, ValueError):
+            return None
+
+    # Written to a temporary file and renamed, so a crash never leaves half a .npy behind
+    def _save(self, path, wave):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, wave)
+            os.replace(temp_path, path)
+            self._prune_disk()
+        except OSError as e:
+            print(f"Error writing render cache: {e}")
+
+    def _remember(self, key, wave):
+        if isinstance(wave, np.memmap):
+            self._mapped[key] = wave
+            while len(self._mapped) > MAX_MAPPED:
+                self._mapped.popitem(last=False)
+            return
+        self._waves[key] = wave
+        self.memory_bytes += wave.nbytes
+        while self.memory_bytes > self.memory_budget and len(self._waves) > 1:
+            _, dropped = self._waves.popitem(last=False)
+            self.memory_bytes -= dropped.nbytes
+
+    def _prune_disk(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass  # still mapped (Windows); try again next time
+
+    # Forget everything in memory and delete the cache files
+    def clear(self):
+        with self._lock:
+            self._waves.clear()
+            self._mapped.clear()
+            self.memory_bytes = 0
+            if os.path.isdir(self.directory):
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith(".npy"):
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+
+
+RENDER_CACHE = RenderCache()
+
+def cached_wave(wave_type, frequency, duration, sample_rate=44100, amplitude=0.5):
+    return RENDER_CACHE.get(wave_type, frequency, duration, sample_rate, amplitude)
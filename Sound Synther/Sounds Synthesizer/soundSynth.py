@@ -1,38 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np
-import pyaudio
-import threading
-from pydub import AudioSegment
 import os
+from audioEngine import BufferVoice, ToneVoice, close_engine, get_engine
+from renderCache import RENDER_CACHE, cached_wave
+from wavWriter import write_wave
 
 # Function to generate a sine wave
 def generate_sine_wave(frequency, duration, sample_rate=44100, amplitude=0.5):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    wave = amplitude * np.sin(2 * np.pi * frequency * t)
-    return wave
+    return cached_wave("Sine", frequency, duration, sample_rate, amplitude)
 
-# Function to play the generated sound using pyaudio
+# Function to play an already generated sound on the shared output stream (audioEngine)
 def play_wave(wave, sample_rate=44100):
     try:
-        print("Playing sound...")
-        audio = (wave * 32767).astype(np.int16).tobytes()
-        p = pyaudio.PyAudio()
-        stream = p.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True)
-        stream.write(audio)
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-        print("Sound playback finished.")
+        get_engine().play(BufferVoice(wave))
     except Exception as e:
         print(f"Error playing sound: {e}")
 
-# Function to save sound to a .wav file
+# Function to save sound to a 16-bit .wav file, written a block at a time (wavWriter)
 def save_wave(wave, filename, sample_rate=44100):
     try:
-        audio = (wave * 32767).astype(np.int16)
-        audio_segment = AudioSegment(audio.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
-        audio_segment.export(filename, format='wav')
+        write_wave(filename, wave, sample_rate)
         print(f"Sound saved as '{filename}'")
     except Exception as e:
         print(f"Error saving sound: {e}")
@@ -44,16 +32,16 @@ def generate_sound():
         duration = float(duration_entry.get())
         wave_type = wave_var.get()
 
-        if wave_type == "Sine":
-            wave = generate_sine_wave(frequency, duration)
-        elif wave_type == "Square":
-            wave = generate_square_wave(frequency, duration)
-        elif wave_type == "Noise":
-            wave = generate_noise(duration)
-
-        print("Generating sound...")
-        threading.Thread(target=play_wave, args=(wave,)).start()
-        print("Sound generation complete.")
+        # A tone already in the render cache replays that buffer. Otherwise it starts right
+        # away, rendered block by block on the audio thread, while the cache renders it in
+        # the background for next time. Noise is random and never cached.
+        wave = None if wave_type == "Noise" else RENDER_CACHE.peek(wave_type, frequency, duration)
+        if wave is not None:
+            get_engine().play(BufferVoice(wave))
+        else:
+            get_engine().play(ToneVoice(wave_type, frequency, duration))
+            if wave_type != "Noise":
+                RENDER_CACHE.prefetch(wave_type, frequency, duration)
     except Exception as e:
         print(f"Error generating sound: {e}")
 
@@ -70,6 +58,8 @@ def export_sound():
             wave = generate_square_wave(frequency, duration)
         elif wave_type == "Noise":
             wave = generate_noise(duration)
+        else:
+            wave = cached_wave(wave_type, frequency, duration)
 
         # Create the directory if it doesn't exist
         directory = "created_sounds"
@@ -128,11 +118,9 @@ def delete_file():
     except Exception as e:
         messagebox.showerror("Error", f"Error deleting file: {e}")
 
-# Function to generate a square wave
+# Function to generate a square wave (band-limited, so high notes don't alias)
 def generate_square_wave(frequency, duration, sample_rate=44100, amplitude=0.5):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    wave = amplitude * np.sign(np.sin(2 * np.pi * frequency * t))
-    return wave
+    return cached_wave("Square", frequency, duration, sample_rate, amplitude)
 
 # Function to generate white noise
 def generate_noise(duration, sample_rate=44100, amplitude=0.5):
@@ -161,7 +149,7 @@ duration_entry.pack(pady=5)
 # Dropdown menu for selecting waveform type
 ttk.Label(root, text="Waveform Type:").pack(pady=5)
 wave_var = tk.StringVar(value="Sine")
-waveform_menu = ttk.OptionMenu(root, wave_var, "Sine", "Sine", "Square", "Noise")
+waveform_menu = ttk.OptionMenu(root, wave_var, "Sine", "Sine", "Square", "Saw", "Triangle", "Noise")
 waveform_menu.pack(pady=5)
 
 # Button to generate and play the sound
@@ -193,3 +181,4 @@ update_file_list()
 
 # Start the main event loop
 root.mainloop()
+close_engine()
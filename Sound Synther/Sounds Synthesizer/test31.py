@@ -1,47 +1,45 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np
-import pyaudio
-import threading
-from pydub import AudioSegment
 import os
+from audioEngine import BufferVoice, ToneVoice, close_engine, get_engine
+from renderCache import cached_wave
+from wavWriter import write_wave
 
 # Function to generate a sine wave
 def generate_sine_wave(frequency, duration, sample_rate=44100, amplitude=0.5):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    wave = amplitude * np.sin(2 * np.pi * frequency * t)
-    return wave
+    return cached_wave("Sine", frequency, duration, sample_rate, amplitude)
 
-# Function to generate a square wave
+# Function to generate a square wave (band-limited, so high notes don't alias)
 def generate_square_wave(frequency, duration, sample_rate=44100, amplitude=0.5):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    wave = amplitude * np.sign(np.sin(2 * np.pi * frequency * t))
-    return wave
+    return cached_wave("Square", frequency, duration, sample_rate, amplitude)
 
 # Function to generate white noise
 def generate_noise(duration, sample_rate=44100, amplitude=0.5):
     wave = amplitude * np.random.uniform(-1, 1, int(sample_rate * duration))
     return wave
 
-# Function to play the generated sound using pyaudio
+# Function to play an already generated sound on the shared output stream (audioEngine)
 def play_wave(wave, sample_rate=44100):
     try:
-        audio = (wave * 32767).astype(np.int16).tobytes()
-        p = pyaudio.PyAudio()
-        stream = p.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True)
-        stream.write(audio)
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+        get_engine().play(BufferVoice(wave))
     except Exception as e:
         print(f"Error playing sound: {e}")
 
-# Function to save sound to a .wav file
+# Function to start several tones together: one voice each in the engine's mixer, handed
+# over as one batch so they all start on the same block of the one output stream
+def play_tones(wave_types):
+    try:
+        frequency = float(frequency_entry.get())
+        duration = float(duration_entry.get())
+        get_engine().play_together([ToneVoice(wave_type, frequency, duration) for wave_type in wave_types])
+    except Exception as e:
+        print(f"Error playing sounds: {e}")
+
+# Function to save sound to a 16-bit .wav file, written a block at a time (wavWriter)
 def save_wave(wave, filename, sample_rate=44100):
     try:
-        audio = (wave * 32767).astype(np.int16)
-        audio_segment = AudioSegment(audio.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
-        audio_segment.export(filename, format='wav')
+        write_wave(filename, wave, sample_rate)
     except Exception as e:
         print(f"Error saving sound: {e}")
 
@@ -53,6 +51,8 @@ def generate_sound(wave_type, frequency, duration):
         return generate_square_wave(frequency, duration)
     elif wave_type == "Noise":
         return generate_noise(duration)
+    else:
+        return cached_wave(wave_type, frequency, duration)
 
 # Function to handle exporting the sound to a .wav file
 def export_sound(waves, filename):
@@ -96,11 +96,7 @@ def delete_file():
 
 # Function to play all sounds
 def play_all_sounds():
-    for wave_type in ["Sine", "Square", "Noise"]:
-        frequency = float(frequency_entry.get())
-        duration = float(duration_entry.get())
-        wave = generate_sound(wave_type, frequency, duration)
-        threading.Thread(target=play_wave, args=(wave,)).start()
+    play_tones(["Sine", "Square", "Noise"])
 
 # Function to generate and export all sounds
 def generate_and_export_all_sounds():
@@ -132,21 +128,8 @@ def generate_and_export_all_sounds():
 
 # Function to play checked sounds
 def play_checked_sounds():
-    if sine_var.get():
-        frequency = float(frequency_entry.get())
-        duration = float(duration_entry.get())
-        wave = generate_sound("Sine", frequency, duration)
-        threading.Thread(target=play_wave, args=(wave,)).start()
-    if square_var.get():
-        frequency = float(frequency_entry.get())
-        duration = float(duration_entry.get())
-        wave = generate_sound("Square", frequency, duration)
-        threading.Thread(target=play_wave, args=(wave,)).start()
-    if noise_var.get():
-        frequency = float(frequency_entry.get())
-        duration = float(duration_entry.get())
-        wave = generate_sound("Noise", frequency, duration)
-        threading.Thread(target=play_wave, args=(wave,)).start()
+    play_tones([wave_type for wave_type, var in (("Sine", sine_var), ("Square", square_var), ("Noise", noise_var))
+                if var.get()])
 
 # Function to generate and export checked sounds
 def generate_and_export_checked_sounds():
@@ -248,3 +231,4 @@ update_file_list()
 
 # Start the main event loop
 root.mainloop()
+close_engine()
@@ -0,0 +1,115 @@
+import queue
+import numpy as np
+
+# Polyphonic voice mixer
+# A fixed pool of max_voices slots mixed into one stereo block. All the buffers the
+# mixer writes, including the soft-clip mask, are allocated up front, so the mixing
+# itself allocates no arrays per block; the voices' own render() may, and so does
+# reshaping samples once they actually go over the soft-clip knee. Each voice has a
+# gain and an equal-power pan, both read every block so they can be changed while it
+# plays. When every slot is busy, a new voice takes the slot of the oldest one.
+
+SOFT_CLIP_KNEE = 0.8  # samples below this pass through untouched
+
+class VoiceMixer:
+    def __init__(self, max_voices=64, block_size=512):
+        self.max_voices = max_voices
+        self.block_size = block_size
+        self.stolen = 0
+        self._pending = queue.SimpleQueue()  # lists of voices from other threads, None = stop all
+        self._slots = [None] * max_voices
+        self._started = np.zeros(max_voices, dtype=np.int64)  # start order, for stealing the oldest
+        self._counter = 0
+        self._allocate(block_size)
+
+    def _allocate(self, frames):
+        self._voice_buffer = np.zeros(frames, dtype=np.float32)
+        self._scaled = np.zeros((frames, 2), dtype=np.float32)
+        self._mix = np.zeros((frames, 2), dtype=np.float32)
+        self._levels = np.zeros((frames, 2), dtype=np.float32)
+        self._over = np.zeros((frames, 2), dtype=bool)
+        self._gains = np.zeros(2, dtype=np.float32)
+
+    # Start voice on the next block at gain, panned from -1 (left) to 1 (right)
+    def play(self, voice, gain=1.0, pan=0.0):
+        voice.gain = gain
+        voice.pan = pan
+        self._pending.put([voice])
+        return voice
+
+    # Start several voices on the same block: they go through the queue as one item, so
+    # the audio thread can't take some of them a block before the rest
+    def play_together(self, voices, gain=1.0, pan=0.0):
+        voices = list(voices)
+        for voice in voices:
+            voice.gain = gain
+            voice.pan = pan
+        self._pending.put(voices)
+        return voices
+
+    def stop_all(self):
+        self._pending.put(None)
+
+    def active_voices(self):
+        return sum(slot is not None for slot in self._slots)
+
+    def _take_pending(self):
+        while True:
+            try:
+                voices = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            if voices is None:
+                self._slots = [None] * self.max_voices
+                continue
+            for voice in voices:
+                try:
+                    slot = self._slots.index(None)
+                except ValueError:
+                    slot = int(np.argmin(self._started))
+                    self.stolen += 1
+                self._slots[slot] = voice
+                self._counter += 1
+                self._started[slot] = self._counter
+
+    # Mix the next frames as a (frames, 2) float32 array. The buffer is reused for the
+    # next block, so copy it to keep it.
+    def render(self, frames):
+        self._take_pending()
+        if frames > len(self._mix):
+            self._allocate(frames)
+        mix = self._mix[:frames]
+        mix.fill(0)
+        voice_buffer = self._voice_buffer[:frames]
+        scaled = self._scaled[:frames]
+        for slot, voice in enumerate(self._slots):
+            if voice is None:
+                continue
+            if voice.stopped:
+                self._slots[slot] = None
+                continue
+            voice_buffer.fill(0)
+            try:
+                playing = voice.render(voice_buffer)
+            except Exception as e:
+                # A broken voice is dropped instead of taking the whole stream down
+                print(f"Error rendering voice, stopping it: {e}")
+                self._slots[slot] = None
+                continue
+            if not playing:
+                self._slots[slot] = None
+            angle = (voice.pan + 1) * np.pi / 4
+            self._gains[0] = voice.gain * np.cos(angle)
+            self._gains[1] = voice.gain * np.sin(angle)
+            np.multiply(voice_buffer[:, None], self._gains, out=scaled)
+            mix += scaled
+        self.soft_clip(mix)
+        return mix
+
+    # Above the knee, samples bend smoothly towards +-1 instead of clipping hard
+    def soft_clip(self, mix):
+        levels = np.abs(mix, out=self._levels[:len(mix)])
+        over = np.greater(levels, SOFT_CLIP_KNEE, out=self._over[:len(mix)])
+        if over.any():
+            headroom = 1 - SOFT_CLIP_KNEE
+            mix[over] = np.sign(mix[over]) * (SOFT_CLIP_KNEE + headroom * np.tanh((levels[over] - SOFT_CLIP_KNEE) / headroom))
@@ -0,0 +1,61 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from oscillators import render_wave
+from wavWriter import write_tone, write_wave
+
+# WAV export: the old pydub path against wavWriter
+# For each length, times writing a rendered saw wave to a 16-bit .wav file three ways
+# and records the peak memory each one allocates beyond the wave itself (tracemalloc
+# sees NumPy's buffers):
+#   pydub       int16 copy -> AudioSegment -> export(format='wav'), as save_wave used to
+#   write_wave  wavWriter, block by block from the rendered wave
+#   write_tone  wavWriter, rendering straight into the file, no whole wave at all (its
+#               time includes the synthesis the other two get for free)
+# The pydub row is skipped when pydub isn't installed.
+#
+#   python wavBench.py [--seconds 10 60 300]
+
+def pydub_export(path, wave, sample_rate=44100):
+    from pydub import AudioSegment
+    audio = (wave * 32767).astype(np.int16)
+    AudioSegment(audio.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1).export(path, format='wav')
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="WAV export benchmark")
+    parser.add_argument("--seconds", type=float, nargs='+', default=[10, 60, 300])
+    args = parser.parse_args()
+    try:
+        import pydub  # noqa: F401
+        have_pydub = True
+    except ImportError:
+        have_pydub = False
+        print("pydub isn't installed, skipping the pydub path")
+    print(f"{'length':>8} {'path':<11} {'seconds':>8} {'peak MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.wav")
+        for seconds in args.seconds:
+            wave = render_wave("Saw", 220, seconds)
+            runs = {"write_wave": lambda: write_wave(path, wave),
+                    "write_tone": lambda: write_tone(path, "Saw", 220, seconds)}
+            if have_pydub:
+                runs = {"pydub": lambda: pydub_export(path, wave), **runs}
+            for name, fn in runs.items():
+                elapsed, peak = measure(fn)
+                print(f"{seconds:>7g}s {name:<11} {elapsed:>8.3f} {peak / 1e6:>8.1f} {os.path.getsize(path) / 1e6:>8.1f}")
+            del wave
+
+if __name__ == "__main__":
+    main()
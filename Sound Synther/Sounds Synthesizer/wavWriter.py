@@ -0,0 +1,106 @@
+import struct
+import numpy as np
+from oscillators import Oscillator
+
+# Streaming WAV writer
+# Writes the RIFF header up front with placeholder sizes, then each block of float
+# samples (-1..1) as it is rendered, converted to 16-bit or 24-bit PCM or 32-bit float,
+# and fills in the sizes on close. Only the block being written is ever converted, so a
+# long export needs no more memory than one block, and there's no pydub/ffmpeg in the
+# way. Samples outside -1..1 are clipped rather than wrapping around in the integer
+# formats.
+#
+#   with WavWriter("out.wav", 44100, sample_format="int24") as wav:
+#       for block in blocks:
+#           wav.write(block)
+
+SAMPLE_FORMATS = {"int16": 2, "int24": 3, "float32": 4}  # bytes per sample
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+BLOCK_SIZE = 65536
+MAX_DATA_BYTES = 0xFFFFFFFF - 50  # RIFF sizes are 32-bit
+
+class WavWriter:
+    def __init__(self, path, sample_rate=44100, channels=1, sample_format="int16"):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format: {sample_format}")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.sample_width = SAMPLE_FORMATS[sample_format]
+        self.frames = 0
+        self.file = open(path, 'wb')
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Float files get the 18-byte fmt chunk and the fact chunk the spec asks for
+    def _write_header(self):
+        data_bytes = self.frames * self.channels * self.sample_width
+        block_align = self.channels * self.sample_width
+        if self.sample_format == "float32":
+            fmt = struct.pack('<HHIIHHH', WAVE_FORMAT_IEEE_FLOAT, self.channels, self.sample_rate,
+                              self.sample_rate * block_align, block_align, self.sample_width * 8, 0)
+            extra = b'fact' + struct.pack('<II', 4, self.frames)
+        else:
+            fmt = struct.pack('<HHIIHH', WAVE_FORMAT_PCM, self.channels, self.sample_rate,
+                              self.sample_rate * block_align, block_align, self.sample_width * 8)
+            extra = b''
+        chunks = b'fmt ' + struct.pack('<I', len(fmt)) + fmt + extra
+        riff_bytes = 4 + len(chunks) + 8 + data_bytes + data_bytes % 2
+        self.file.write(b'RIFF' + struct.pack('<I', riff_bytes) + b'WAVE' + chunks
+                        + b'data' + struct.pack('<I', data_bytes))
+
+    # Append a block of float samples, shaped (frames,) or (frames, channels)
+    def write(self, block):
+        block = np.asarray(block)
+        frames = len(block)
+        if (self.frames + frames) * self.channels * self.sample_width > MAX_DATA_BYTES:
+            raise ValueError("WAV files can't hold more than 4 GB of samples")
+        self.file.write(self.encode(block).tobytes())
+        self.frames += frames
+
+    def encode(self, block):
+        if self.sample_format == "float32":
+            return np.clip(block, -1.0, 1.0).astype('<f4')
+        if self.sample_format == "int16":
+            return (np.clip(block, -1.0, 1.0) * 32767).astype('<i2')
+        samples = (np.clip(block, -1.0, 1.0) * 8388607).astype('<i4')
+        return samples.view(np.uint8).reshape(-1, 4)[:, :3]  # low three bytes of each little-endian sample
+
+    # Go back and fill in the sizes now that the frame count is known
+    def close(self):
+        if self.file.closed:
+            return
+        if self.frames * self.channels * self.sample_width % 2:
+            self.file.write(b'\0')  # chunks are padded to an even length
+        self.file.seek(0)
+        self._write_header()
+        self.file.close()
+
+# An already rendered wave, written a block at a time
+def write_wave(path, wave, sample_rate=44100, sample_format="int16", block_size=BLOCK_SIZE):
+    wave = np.asarray(wave)
+    channels = 1 if wave.ndim == 1 else wave.shape[1]
+    with WavWriter(path, sample_rate, channels, sample_format) as wav:
+        for start in range(0, len(wave), block_size):
+            wav.write(wave[start:start + block_size])
+
+# A tone rendered straight into the file, one block at a time; the whole wave never exists
+def write_tone(path, wave_type, frequency, duration, sample_rate=44100, amplitude=0.5, sample_format="int16",
+               block_size=BLOCK_SIZE):
+    oscillator = Oscillator(wave_type, frequency, sample_rate, amplitude)
+    block = np.zeros(block_size, dtype=np.float32)
+    remaining = int(sample_rate * duration)
+    with WavWriter(path, sample_rate, 1, sample_format) as wav:
+        while remaining > 0:
+            out = block[:min(block_size, remaining)]
+            out.fill(0)
+            oscillator.render_into(out)
+            wav.write(out)
+            remaining -= len(out)
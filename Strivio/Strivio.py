@@ -1,36 +1,34 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
+from freightDB import get_db, close_all
+from freightMigrations import migrate
+from queryExecutor import QueryExecutor
 
 # Setup Database
-def setup_database():
-    conn = sqlite3.connect('freight.db')
-    cursor = conn.cursor()
-    # Create tables
-    cursor.execute('''CREATE TABLE IF NOT EXISTS shipments (
-                        id INTEGER PRIMARY KEY,
-                        shipment_number TEXT,
-                        origin TEXT,
-                        destination TEXT,
-                        status TEXT)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS arrival (
-                        shipment_id INTEGER,
-                        arrival_time TEXT,
-                        arrival_location TEXT,
-                        FOREIGN KEY(shipment_id) REFERENCES shipments(id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS delivery (
-                        shipment_id INTEGER,
-                        delivery_time TEXT,
-                        delivery_status TEXT,
-                        FOREIGN KEY(shipment_id) REFERENCES shipments(id))''')
-    conn.commit()
-    conn.close()
+def setup_database(db=None):
+    # Shares the versioned schema with strivTEST.py; legacy text origin/destination
+    # columns are converted to port ids on first run
+    migrate(db or get_db())
+
+SHIPMENT_SELECT = '''SELECT shipments.id, shipments.shipment_number, origin.port_name, destination.port_name, shipments.status
+                    FROM shipments
+                    LEFT JOIN ports AS origin ON shipments.origin_port_id = origin.id
+                    LEFT JOIN ports AS destination ON shipments.destination_port_id = destination.id'''
+
+# Look up a port by name, adding it if this is the first shipment to use it
+def get_port_id(conn, port_name):
+    row = conn.execute("SELECT id FROM ports WHERE port_name=?", (port_name,)).fetchone()
+    if row:
+        return row[0]
+    return conn.execute("INSERT INTO ports (port_name) VALUES (?)", (port_name,)).lastrowid
 
 # Main Application
 class FreightApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Freight Management")
+        self.db = get_db()
+        self.executor = QueryExecutor(self.root, self.db)
         self.create_home_page()
 
     def create_home_page(self):
@@ -55,12 +53,12 @@ class FreightApp:
 
     def load_shipments(self):
         self.tree.delete(*self.tree.get_children())  # Clear existing rows
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM shipments")
-        for row in cursor.fetchall():
-            self.tree.insert('', tk.END, values=row)
-        conn.close()
+        # Rows stream in from the background executor so the window stays responsive
+        def insert_rows(rows):
+            for row in rows:
+                self.tree.insert('', tk.END, values=row)
+
+        self.executor.submit('shipments', SHIPMENT_SELECT, on_rows=insert_rows)
 
     def add_shipment(self):
         AddShipmentWindow(self)
@@ -74,6 +72,7 @@ class FreightApp:
 class AddShipmentWindow:
     def __init__(self, parent_app):
         self.parent_app = parent_app
+        self.db = parent_app.db
         self.window = tk.Toplevel(parent_app.root)
         self.window.title("Add New Shipment")
 
@@ -99,12 +98,10 @@ class AddShipmentWindow:
         save_button.pack()
 
     def save_shipment(self):
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO shipments (shipment_number, origin, destination, status) VALUES (?, ?, ?, ?)', 
-                       (self.shipment_number.get(), self.origin.get(), self.destination.get(), self.status.get()))
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as conn:
+            conn.execute('INSERT INTO shipments (shipment_number, origin_port_id, destination_port_id, status) VALUES (?, ?, ?, ?)', 
+                         (self.shipment_number.get(), get_port_id(conn, self.origin.get()),
+                          get_port_id(conn, self.destination.get()), self.status.get()))
         self.parent_app.load_shipments()  # Refresh the list of shipments
         self.window.destroy()
 
@@ -113,6 +110,7 @@ class ShipmentDetailWindow:
     def __init__(self, parent, shipment_id, refresh_callback):
         self.refresh_callback = refresh_callback
         self.shipment_id = shipment_id
+        self.db = get_db()
         self.window = tk.Toplevel(parent)
         self.window.title(f"Shipment {shipment_id} Details")
 
@@ -141,11 +139,7 @@ class ShipmentDetailWindow:
 
     def load_info_tab(self):
         # Load shipment info and display in the Info tab
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT shipment_number, origin, destination, status FROM shipments WHERE id=?", (self.shipment_id,))
-        shipment = cursor.fetchone()
-        conn.close()
+        shipment = self.db.query_one(SHIPMENT_SELECT + " WHERE shipments.id=?", (self.shipment_id,))[1:]
 
         tk.Label(self.info_tab, text="Shipment Number:").pack()
         self.shipment_number_entry = tk.Entry(self.info_tab)
@@ -180,25 +174,19 @@ class ShipmentDetailWindow:
 
     def save_info(self):
         # Update shipment information in the database
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("UPDATE shipments SET shipment_number=?, origin=?, destination=?, status=? WHERE id=?",
-                       (self.shipment_number_entry.get(), self.origin_entry.get(), self.destination_entry.get(), 
-                        self.status_entry.get(), self.shipment_id))
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE shipments SET shipment_number=?, origin_port_id=?, destination_port_id=?, status=? WHERE id=?",
+                         (self.shipment_number_entry.get(), get_port_id(conn, self.origin_entry.get()),
+                          get_port_id(conn, self.destination_entry.get()), self.status_entry.get(), self.shipment_id))
         messagebox.showinfo("Success", "Shipment details updated successfully!")
 
     def delete_shipment(self):
         # Confirm and delete the shipment
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this shipment?"):
-            conn = sqlite3.connect('freight.db')
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM shipments WHERE id=?", (self.shipment_id,))
-            cursor.execute("DELETE FROM arrival WHERE shipment_id=?", (self.shipment_id,))
-            cursor.execute("DELETE FROM delivery WHERE shipment_id=?", (self.shipment_id,))
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                conn.execute("DELETE FROM shipments WHERE id=?", (self.shipment_id,))
+                conn.execute("DELETE FROM arrival WHERE shipment_id=?", (self.shipment_id,))
+                conn.execute("DELETE FROM delivery WHERE shipment_id=?", (self.shipment_id,))
             messagebox.showinfo("Success", "Shipment deleted successfully!")
             self.refresh_callback()  # Refresh the main list of shipments
             self.window.destroy()
@@ -208,3 +196,5 @@ if __name__ == "__main__":
     root = tk.Tk()
     app = FreightApp(root)
     root.mainloop()
+    app.executor.shutdown()
+    close_all()
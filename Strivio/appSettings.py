@@ -0,0 +1,27 @@
+import json
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+# Per-user view settings (sort order, filters, ...). Kept in the home directory rather
+# than in freight.db, which may be shared between several clerks.
+SETTINGS_PATH = os.path.join(os.path.expanduser("~"), ".strivio.json")
+
+def load_settings(path=SETTINGS_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_setting(key, value, path=SETTINGS_PATH):
+    settings = load_settings(path)
+    settings[key] = value
+    try:
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(settings, f, indent=2)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        # Not worth interrupting the clerk over; the view just starts with defaults next time
+        log.warning("Error saving settings to %s", path, exc_info=True)
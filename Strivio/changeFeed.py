@@ -0,0 +1,48 @@
+# Change feed over the change_log table (see freightMigrations.migration_change_log)
+# Remembers the last seq it has seen and hands back the ids touched since then, so a
+# view can refetch just those rows instead of reloading the whole table.
+
+CHANGE_LOG_KEEP = 10000  # newest entries kept by pruning
+
+# Drop all but the newest keep entries, inside the caller's transaction. Bulk loads and
+# archiving call this after each batch so the log doesn't grow by a row per shipment.
+def prune_change_log(conn, keep=CHANGE_LOG_KEEP):
+    conn.execute("DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?", (keep,))
+
+class ChangeFeed:
+    def __init__(self, db, max_changes=1000):
+        self.db = db
+        self.max_changes = max_changes
+        self.last_seq = self.current_seq()
+
+    def current_seq(self):
+        return self.db.query_one("SELECT COALESCE(MAX(seq), 0) FROM change_log")[0]
+
+    # Start from the current end of the log, e.g. right before a full reload
+    def reset(self):
+        self.last_seq = self.current_seq()
+
+    # Returns {table_name: set of row ids} changed since the last poll, or None when
+    # the gap is too large (or was pruned, or a table was truncated) and the caller
+    # should reload everything
+    def poll(self):
+        oldest, newest, count = self.db.query_one(
+            "SELECT MIN(seq), MAX(seq), COUNT(*) FROM change_log WHERE seq > ?", (self.last_seq,))
+        if not count:
+            return {}
+        first_kept = self.db.query_one("SELECT MIN(seq) FROM change_log")[0]
+        gap = self.last_seq and first_kept > self.last_seq + 1
+        self.last_seq = newest
+        truncated = self.db.query_one("SELECT 1 FROM change_log WHERE seq BETWEEN ? AND ? AND op = 'truncate' LIMIT 1",
+                                      (oldest, newest))
+        if count > self.max_changes or gap or truncated:
+            return None
+        changes = {}
+        for table_name, row_id in self.db.query("SELECT table_name, row_id FROM change_log WHERE seq BETWEEN ? AND ?",
+                                                (oldest, newest)):
+            changes.setdefault(table_name, set()).add(row_id)
+        return changes
+
+    # Drop old log entries; readers that fall behind the kept range just reload
+    def prune(self, keep=CHANGE_LOG_KEEP):
+        self.db.write(lambda conn: prune_change_log(conn, keep))
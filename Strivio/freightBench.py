@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from freightDB import FreightDB
+from freightImport import insert_shipments_batch
+from freightMigrations import migrate
+from freightQueries import SHIPMENT_SELECT
+
+# Fill a fresh database with n shipments spread over a handful of clients and ports
+def build_database(path, n, clients=500, ports=100):
+    db = FreightDB(path)
+    migrate(db)
+    conn = db.connection()
+    with conn:
+        conn.executemany("INSERT INTO clients (id, client_name, contact_info) VALUES (?, ?, ?)",
+                         ((i, f"Client {i}", f"client{i}@example.com") for i in range(1, clients + 1)))
+        conn.executemany("INSERT INTO ports (id, port_name, location) VALUES (?, ?, ?)",
+                         ((i, f"Port {i}", f"Location {i}") for i in range(1, ports + 1)))
+        insert_shipments_batch(conn, ((f"SHP{i:08d}", i % clients + 1, i % ports + 1, (i * 7) % ports + 1, "In Transit")
+                                      for i in range(n)))
+    db.close()
+
+# The old load_shipments: open, check the schema, run the join, close
+def refresh_connect_per_call(path):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(shipments)")
+    cursor.fetchall()
+    cursor.execute(SHIPMENT_SELECT)
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def refresh_shared(db):
+    db.query("PRAGMA table_info(shipments)")
+    return db.query(SHIPMENT_SELECT)
+
+# One scroll step of the paged shipment view: a keyset page from the middle of the table
+def fetch_page(db, after_id, limit=200):
+    return db.query(SHIPMENT_SELECT + " WHERE shipments.id > ? ORDER BY shipments.id LIMIT ?", (after_id, limit))
+
+def time_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def run(sizes, repeat=5):
+    print(f"{'shipments':>10} {'connect/call ms':>16} {'shared ms':>10} {'open+close ms':>14} {'page ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"freight_{n}.db")
+            build_database(path, n)
+            db = FreightDB(path)
+            refresh_shared(db)  # warm the page cache and statement cache
+            per_call = time_ms(lambda: refresh_connect_per_call(path), repeat)
+            shared = time_ms(lambda: refresh_shared(db), repeat)
+            overhead = time_ms(lambda: sqlite3.connect(path).close(), repeat * 20)
+            page = time_ms(lambda: fetch_page(db, n // 2), repeat * 20)
+            db.close()
+            print(f"{n:>10} {per_call:>16.1f} {shared:>10.1f} {overhead:>14.3f} {page:>8.3f}")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    run(sizes)
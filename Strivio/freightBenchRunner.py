@@ -0,0 +1,163 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from freightDB import FreightDB
+from freightEvents import ingest_events
+from freightGenerate import generate_file
+from freightImport import import_shipments
+from freightQueries import CLIENT_SELECT, PORT_SELECT, DELIVERY_LOCATION_SELECT
+from freightRepo import Arrival, FreightRepository, Shipment
+
+# Benchmark runner over generated databases
+# For each size, generates a database with freightGenerate (same seed, so the same data
+# on every run), then times what the app's loaders read and each write path, and writes
+# everything to a JSON report. Pass --compare old.json to print the change against a
+# report from another commit.
+#
+#   python freightBenchRunner.py --sizes 10000 100000 --out bench_report.json
+#   python freightBenchRunner.py --sizes 10000 100000 --compare bench_report.json
+
+WRITE_BATCH = 1000
+SCAN_BATCH = 10000
+
+def measure(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples), "runs": repeat}
+
+def loader_benchmarks(db, repo, n):
+    middle = max(n // 2, 1)
+    return {
+        "shipments first page": lambda: repo.shipment_page('next', None, 200),
+        "shipments page mid-table": lambda: repo.shipment_page('next', (middle,), 200),
+        "shipments sorted by client": lambda: repo.shipment_page('next', None, 200, "Client"),
+        "shipments sorted by status desc": lambda: repo.shipment_page('next', None, 200, "Status", True),
+        "shipments filtered by status": lambda: repo.shipment_page('next', None, 200, filters={"status": "Held"}),
+        "shipments search": lambda: repo.shipment_page('next', None, 200, search="Atlas"),
+        "statuses": repo.shipment_statuses,
+        "clients": lambda: db.query(CLIENT_SELECT),
+        "ports": lambda: db.query(PORT_SELECT),
+        "delivery locations": lambda: db.query(DELIVERY_LOCATION_SELECT),
+        "dashboard": repo.dashboard,
+        "shipment overview": lambda: repo.shipment_overview(middle),
+        "arrival timeline page": lambda: repo.event_page("arrival", middle, 'next', None, 200),
+    }
+
+def new_shipments(repo):
+    rows = repo.shipments.insert_many([Shipment(None, f"BENCH{i}", 1, 1, 2, "Booked") for i in range(WRITE_BATCH)])
+    repo.arrivals.insert_many([Arrival(row.id, "2025-06-01T00:00:00", "Port of Rotterdam") for row in rows])
+    return rows
+
+def write_benchmarks(db, repo, n, repeat, tmp):
+    results = {}
+    inserted = []
+    results[f"insert {WRITE_BATCH} shipments"] = measure(lambda: inserted.append(new_shipments(repo)), repeat)
+    results[f"delete {WRITE_BATCH} shipments with scans"] = measure(
+        lambda rows: repo.delete_shipments([row.id for row in rows]), repeat, setup=lambda: (inserted.pop(),))
+
+    rows = repo.shipments.get_many(range(1, min(n, WRITE_BATCH) + 1))
+
+    def update():
+        for row in rows:
+            row.status = "In Transit" if row.status != "In Transit" else "Held"
+        repo.shipments.update_many(rows)
+    results[f"update {len(rows)} shipments"] = measure(update, repeat)
+    results[f"bulk status {len(rows)} shipments"] = measure(
+        lambda: repo.update_status([row.id for row in rows], "At Port"), repeat)
+
+    scans = [{"kind": "arrival" if i % 3 else "delivery", "shipment_id": i % n + 1,
+              "time": f"2025-07-01T{i % 24:02d}:00:00", "location": "Port of Busan", "status": "Delivered"}
+             for i in range(SCAN_BATCH)]
+    results[f"ingest {SCAN_BATCH} scans"] = measure(lambda: ingest_events(db.connection(), [scans]), repeat)
+
+    manifest = os.path.join(tmp, "manifest.csv")
+    with open(manifest, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(("shipment_number", "client", "origin_port", "destination_port", "status"))
+        clients = [name for name, in db.query("SELECT client_name FROM clients ORDER BY id LIMIT 50")]
+        ports = [name for name, in db.query("SELECT port_name FROM ports ORDER BY id")]
+        for i in range(SCAN_BATCH):
+            writer.writerow((f"IMP{i:08d}", clients[i % len(clients)], ports[i % len(ports)],
+                             ports[(i * 7 + 1) % len(ports)], "Booked"))
+    results[f"import {SCAN_BATCH} shipments"] = measure(lambda: import_shipments(db.connection(), manifest), repeat)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(sizes, seed=1, repeat=5):
+    report = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(),
+              "python": platform.python_version(), "sqlite": sqlite3.sqlite_version, "platform": platform.platform(),
+              "seed": seed, "sizes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"freight_{n}.db")
+            stats = generate_file(path, n, seed)
+            db = FreightDB(path)
+            repo = FreightRepository(db)
+            benchmarks = {name: measure(fn, repeat) for name, fn in loader_benchmarks(db, repo, n).items()}
+            benchmarks.update(write_benchmarks(db, repo, n, repeat, tmp))
+            db.close()
+            report["sizes"][str(n)] = {"generate_seconds": stats["seconds"],
+                                       "rows": {key: stats[key] for key in ("shipments", "arrival", "delivery", "clients",
+                                                                            "ports", "delivery_locations")},
+                                       "benchmarks": benchmarks}
+            print_size(n, report["sizes"][str(n)])
+    return report
+
+def print_size(n, result):
+    print(f"\n{n} shipments (generated in {result['generate_seconds']:.2f}s)")
+    print(f"{'benchmark':<36} {'median ms':>10} {'min ms':>10}")
+    for name, timing in result["benchmarks"].items():
+        print(f"{name:<36} {timing['median_ms']:>10.3f} {timing['min_ms']:>10.3f}")
+
+# Median against median for every benchmark both reports have
+def compare(old, new):
+    print(f"\nAgainst {old.get('commit') or 'old report'} ({old['created']})")
+    print(f"{'size':>9} {'benchmark':<36} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    for size, result in new["sizes"].items():
+        old_benchmarks = old["sizes"].get(size, {}).get("benchmarks", {})
+        for name, timing in result["benchmarks"].items():
+            if name in old_benchmarks:
+                before, after = old_benchmarks[name]["median_ms"], timing["median_ms"]
+                change = f"{(after - before) / before * 100:+.0f}%" if before else "n/a"
+                print(f"{size:>9} {name:<36} {before:>10.3f} {after:>10.3f} {change:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Strivio loaders and write paths on generated data")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default="bench_report.json")
+    parser.add_argument("--compare", help="earlier report to compare against")
+    args = parser.parse_args()
+    old = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            old = json.load(f)
+    report = run(args.sizes, args.seed, args.repeat)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.out}")
+    if old:
+        compare(old, report)
+
+if __name__ == "__main__":
+    main()
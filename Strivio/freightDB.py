@@ -0,0 +1,125 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+DB_PATH = 'freight.db'
+
+# WAL lets clerks read while one of them writes, but needs every process on the same
+# machine (it relies on shared memory). For a freight.db on a network share set
+# STRIVIO_JOURNAL_MODE=DELETE, which only needs the share's file locks.
+JOURNAL_MODE = os.environ.get("STRIVIO_JOURNAL_MODE", "WAL")
+
+def is_busy(error):
+    return isinstance(error, sqlite3.OperationalError) and str(error).startswith(("database is locked", "database is busy"))
+
+# Shared connection layer for freight.db
+# Each thread gets one long-lived connection (sqlite3 connections must not be
+# shared across threads), so the Tk thread opens freight.db once per run
+# instead of once per click.
+# Several processes can share the file: a locked database is waited on for busy_timeout
+# seconds, and write() retries the whole transaction with backoff if that runs out.
+class FreightDB:
+    def __init__(self, path=DB_PATH, statement_cache_size=256, foreign_keys=True, busy_timeout=5.0,
+                 journal_mode=JOURNAL_MODE):
+        self.path = path
+        self.statement_cache_size = statement_cache_size
+        self.foreign_keys = foreign_keys
+        self.busy_timeout = busy_timeout
+        self.journal_mode = journal_mode
+        self.busy_retries = 0
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _connect(self):
+        # cached_statements is sqlite3's prepared-statement cache, keyed on SQL text
+        # timeout is SQLite's busy handler: how long a statement waits on another writer's lock
+        conn = sqlite3.connect(self.path, cached_statements=self.statement_cache_size,
+                               check_same_thread=False, timeout=self.busy_timeout)
+        conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-16000")  # 16 MB page cache
+        if self.foreign_keys:
+            conn.execute("PRAGMA foreign_keys=ON")  # arrival/delivery rows cascade with their shipment
+        return conn
+
+    def execute(self, sql, params=()):
+        return self.connection().execute(sql, params)
+
+    def executemany(self, sql, rows):
+        return self.connection().executemany(sql, rows)
+
+    def query(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchone()
+
+    def commit(self):
+        self.connection().commit()
+
+    def transaction(self):
+        # Usage: with db.transaction() as conn: ...  (commits, or rolls back on error)
+        return self.connection()
+
+    # Run fn(conn) in one BEGIN IMMEDIATE transaction and return its result. If the write
+    # lock can't be had (another process held it past busy_timeout) the transaction is
+    # rolled back and run again after an exponential, jittered pause. Inside a transaction
+    # the caller already holds, fn just joins it and the caller owns retrying.
+    def write(self, fn, attempts=5, backoff=0.05):
+        conn = self.connection()
+        if conn.in_transaction:
+            return fn(conn)
+        for attempt in range(attempts):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    result = fn(conn)
+                    conn.commit()
+                    return result
+                except BaseException:
+                    conn.rollback()
+                    raise
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or attempt == attempts - 1:
+                    raise
+                self.busy_retries += 1
+                time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+# Return the process-wide FreightDB for a path, creating it on first use
+def get_db(path=DB_PATH):
+    with _shared_lock:
+        db = _shared.get(path)
+        if db is None:
+            db = FreightDB(path)
+            _shared[path] = db
+        return db
+
+def close_all():
+    with _shared_lock:
+        for db in _shared.values():
+            db.close()
+        _shared.clear()
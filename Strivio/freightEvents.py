@@ -0,0 +1,101 @@
+import argparse
+import os
+import time
+
+from freightDB import DB_PATH, FreightDB
+from freightImport import read_chunks
+from freightMigrations import count_events, migrate
+
+# Arrival and delivery scan ingest
+# Scans are CSV or JSON Lines records with the fields below: kind is 'arrival' or
+# 'delivery', the shipment is given by shipment_id or shipment_number, time is an
+# ISO 8601 timestamp, and location (arrivals) or status (deliveries) is the detail.
+# Each batch resolves its shipments with a couple of IN queries and is appended with
+# one executemany per table, in one transaction, with the per-row count triggers
+# paused and the dashboard's event_counts bumped once per table instead.
+FIELDS = ("kind", "shipment_id", "shipment_number", "time", "location", "status")
+
+INSERTS = {
+    "arrival": ("INSERT INTO arrival (shipment_id, arrival_time, arrival_location) VALUES (?, ?, ?)", "location"),
+    "delivery": ("INSERT INTO delivery (shipment_id, delivery_time, delivery_status) VALUES (?, ?, ?)", "status"),
+}
+
+def in_query(conn, sql, values):
+    values = list(values)
+    rows = []
+    for start in range(0, len(values), 500):
+        chunk = values[start:start + 500]
+        rows += conn.execute(sql.format(','.join('?' * len(chunk))), chunk).fetchall()
+    return rows
+
+# shipment_id for every record in the batch, None where it doesn't name a known shipment
+def resolve_shipments(conn, records):
+    ids, numbers = set(), set()
+    for record in records:
+        shipment_id = str(record.get("shipment_id") or '').strip()
+        if shipment_id.isdigit():
+            ids.add(int(shipment_id))
+        elif record.get("shipment_number"):
+            numbers.add(record["shipment_number"])
+    known = {row[0] for row in in_query(conn, "SELECT id FROM shipments WHERE id IN ({})", ids)}
+    by_number = {}
+    for number, shipment_id in in_query(conn, "SELECT shipment_number, id FROM shipments WHERE shipment_number IN ({})", numbers):
+        by_number.setdefault(number, shipment_id)
+
+    resolved = []
+    for record in records:
+        shipment_id = str(record.get("shipment_id") or '').strip()
+        if shipment_id.isdigit():
+            resolved.append(int(shipment_id) if int(shipment_id) in known else None)
+        else:
+            resolved.append(by_number.get(record.get("shipment_number")))
+    return resolved
+
+# Append batches of scan records; returns counts per table, rejected records and throughput
+def ingest_events(conn, chunks, progress=None):
+    stats = {"arrival": 0, "delivery": 0, "rejected": 0}
+    start = time.perf_counter()
+    for records in chunks:
+        rows = {kind: [] for kind in INSERTS}
+        for record, shipment_id in zip(records, resolve_shipments(conn, records)):
+            kind = (record.get("kind") or '').strip().lower()
+            if kind not in INSERTS or shipment_id is None or not record.get("time"):
+                stats["rejected"] += 1
+                continue
+            rows[kind].append((shipment_id, record["time"], record.get(INSERTS[kind][1])))
+        with conn:
+            conn.execute("INSERT INTO shipment_search_paused VALUES (1)")
+            for kind, (sql, _) in INSERTS.items():
+                if rows[kind]:
+                    conn.executemany(sql, rows[kind])
+                    count_events(conn, kind, len(rows[kind]))
+                    stats[kind] += len(rows[kind])
+            conn.execute("DELETE FROM shipment_search_paused")
+        if progress:
+            progress(stats, time.perf_counter() - start)
+    stats["seconds"] = time.perf_counter() - start
+    events = stats["arrival"] + stats["delivery"]
+    stats["events_per_second"] = events / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+def ingest_file(conn, path, fmt=None, batch_size=10000, progress=None):
+    return ingest_events(conn, read_chunks(path, batch_size, fmt), progress)
+
+def main():
+    parser = argparse.ArgumentParser(description="Append arrival/delivery scans from a CSV/JSONL file to freight.db")
+    parser.add_argument("scans")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    db = FreightDB(args.db)
+    migrate(db)
+    stats = ingest_file(db.connection(), args.scans, args.format, args.batch_size,
+                        progress=lambda stats, seconds: print(f"\r{stats['arrival'] + stats['delivery']} events", end=''))
+    print(f"\nIngested {stats['arrival']} arrivals and {stats['delivery']} deliveries from {os.path.basename(args.scans)} "
+          f"in {stats['seconds']:.2f}s ({stats['events_per_second']:,.0f} events/s), {stats['rejected']} rejected")
+    db.close()
+
+if __name__ == "__main__":
+    main()
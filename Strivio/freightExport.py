@@ -0,0 +1,114 @@
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from freightDB import DB_PATH, FreightDB
+from freightQueries import SHIPMENT_SELECT
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+
+# Streaming export
+# Rows are pulled from the cursor with fetchmany and written chunk by chunk, so memory
+# stays flat no matter how many rows the view has.
+VIEWS = {
+    "shipments": (("id", "shipment_number", "client", "origin_port", "destination_port", "status"),
+                  SHIPMENT_SELECT + " ORDER BY shipments.id"),
+    "arrival": (("shipment_id", "arrival_time", "arrival_location"),
+                "SELECT shipment_id, arrival_time, arrival_location FROM arrival ORDER BY shipment_id"),
+    "delivery": (("shipment_id", "delivery_time", "delivery_status"),
+                 "SELECT shipment_id, delivery_time, delivery_status FROM delivery ORDER BY shipment_id"),
+}
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+def write_csv(path, columns, chunks):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+
+def write_jsonl(path, columns, chunks):
+    with open(path, 'w', encoding='utf-8') as f:
+        for rows in chunks:
+            f.write(''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in rows))
+
+# Each chunk becomes one Parquet row group
+def write_parquet(path, columns, chunks):
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    schema = pa.schema([(name, pa.int64() if name == "id" or name.endswith("_id") else pa.string()) for name in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            writer.write_table(pa.table([list(values) for values in zip(*rows)], schema=schema))
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "parquet": write_parquet}
+
+def fetch_chunks(cursor, chunk_size, counter, progress=None, start=None):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        counter[0] += len(rows)
+        yield rows
+        if progress:
+            progress(counter[0], time.perf_counter() - start)
+
+# progress(rows, seconds), if given, is called after every chunk as in import_shipments
+def export_view(conn, view, path, fmt=None, chunk_size=10000, progress=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(FORMATS)}")
+    columns, sql = VIEWS[view]
+    counter = [0]
+    start = time.perf_counter()
+    cursor = conn.execute(sql)
+    try:
+        WRITERS[fmt](path, columns, fetch_chunks(cursor, chunk_size, counter, progress, start))
+    finally:
+        cursor.close()
+    seconds = time.perf_counter() - start
+    return {"rows": counter[0], "seconds": seconds, "bytes": os.path.getsize(path),
+            "rows_per_second": counter[0] / seconds if seconds else 0.0}
+
+# Export every view in every available format to a scratch directory and report throughput
+def benchmark(conn, chunk_size):
+    formats = [fmt for fmt in FORMATS if fmt != "parquet" or pa is not None]
+    print(f"{'view':>10} {'format':>8} {'rows':>10} {'seconds':>8} {'rows/s':>12} {'MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for view in VIEWS:
+            for fmt in formats:
+                stats = export_view(conn, view, os.path.join(tmp, f"{view}.{fmt}"), fmt, chunk_size)
+                print(f"{view:>10} {fmt:>8} {stats['rows']:>10} {stats['seconds']:>8.2f} "
+                      f"{stats['rows_per_second']:>12,.0f} {stats['bytes'] / 1e6:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream shipments, arrivals or deliveries out of freight.db")
+    parser.add_argument("view", nargs='?', choices=sorted(VIEWS))
+    parser.add_argument("output", nargs='?')
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--benchmark", action="store_true", help="time every view/format against --db")
+    args = parser.parse_args()
+
+    db = FreightDB(args.db)
+    if args.benchmark:
+        benchmark(db.connection(), args.chunk_size)
+    elif args.view and args.output:
+        stats = export_view(db.connection(), args.view, args.output, args.format, args.chunk_size)
+        print(f"Exported {stats['rows']} rows to {args.output} in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_second']:,.0f} rows/s)")
+    else:
+        parser.error("give a view and an output file, or --benchmark")
+    db.close()
+
+if __name__ == "__main__":
+    main()
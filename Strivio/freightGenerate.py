@@ -0,0 +1,155 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from freightDB import FreightDB
+from freightEvents import INSERTS
+from freightImport import insert_shipments_batch
+from freightMigrations import count_events, migrate
+
+# Synthetic freight.db generator
+# Fills clients, ports, delivery_locations, shipments, arrival and delivery to a given
+# number of shipments, the same data for the same seed and size. The shape follows a
+# real book of business rather than uniform noise:
+#   - shipments per client and traffic per port are Zipf-like (a few large customers
+#     and hub ports, a long tail of small ones)
+#   - statuses are mostly Delivered, then In Transit, with a few Held/Cancelled
+#   - each shipment gets arrival scans along its route (origin, a hub or two,
+#     destination) at increasing times, and delivered ones get delivery scans
+# Rows go in with executemany in batches, with the per-row search/summary/count
+# triggers paused as in freightImport, so a million shipments take minutes, not hours.
+
+STATUSES = (("Delivered", 55), ("In Transit", 22), ("At Port", 9), ("Booked", 8), ("Held", 4), ("Cancelled", 2))
+# Hops along the route by status, (min, max): the origin scan plus hops - 1 hub scans,
+# and the destination for shipments that got there. Booked shipments have no scans.
+ROUTE_SCANS = {"Cancelled": (0, 1), "In Transit": (1, 3), "At Port": (2, 4), "Held": (1, 3), "Delivered": (3, 5)}
+DELIVERY_STEPS = ("Out for Delivery", "Delivered")
+CITIES = ("Rotterdam", "Shanghai", "Singapore", "Los Angeles", "Hamburg", "Antwerp", "Busan", "Dubai", "Felixstowe",
+          "Santos", "Durban", "Mumbai", "Yokohama", "Vancouver", "Valencia", "Colombo", "Savannah", "Piraeus")
+COMPANY_WORDS = ("Atlas", "Northwind", "Harbor", "Summit", "Blue", "Pioneer", "Granite", "Cedar", "Meridian", "Falcon",
+                 "Orchid", "Keystone", "Silver", "Pacific", "Union", "Sterling")
+COMPANY_KINDS = ("Trading", "Logistics", "Imports", "Foods", "Textiles", "Electronics", "Supply", "Industries")
+STREETS = ("Main St", "Harbor Rd", "Industrial Way", "Dock Ave", "Market St", "Park Blvd", "Canal St", "Depot Ln")
+START = datetime(2023, 1, 1)
+DAYS = 3 * 365
+
+BATCH = 10000
+
+# Default table sizes for a given number of shipments
+def default_sizes(shipments):
+    return {"clients": max(10, shipments // 200), "ports": min(400, max(20, shipments // 2000))}
+
+def zipf_weights(n, exponent=1.1):
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+def generate(db, shipments, seed=1, clients=None, ports=None, progress=None):
+    sizes = default_sizes(shipments)
+    clients = clients or sizes["clients"]
+    ports = ports or sizes["ports"]
+    rng = random.Random(seed)
+    conn = db.connection()
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM shipments)").fetchone()[0]:
+        raise ValueError(f"{db.path} already has shipments, generate into a new file")
+    start = time.perf_counter()
+
+    with conn:
+        conn.executemany("INSERT INTO clients (id, client_name, contact_info) VALUES (?, ?, ?)",
+                         [(i, f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_KINDS)} {i}", f"orders{i}@client{i}.example.com")
+                          for i in range(1, clients + 1)])
+        port_rows = []
+        for i in range(1, ports + 1):
+            city = CITIES[(i - 1) % len(CITIES)]
+            port_rows.append((i, f"Port of {city}" + (f" {(i - 1) // len(CITIES) + 1}" if i > len(CITIES) else ""), city))
+        conn.executemany("INSERT INTO ports (id, port_name, location) VALUES (?, ?, ?)", port_rows)
+        locations, location_id = [], 1
+        for client_id in range(1, clients + 1):
+            for n in range(rng.randint(1, 5)):
+                locations.append((location_id, client_id, f"Warehouse {n + 1}",
+                                  f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}"))
+                location_id += 1
+        conn.executemany("INSERT INTO delivery_locations (id, client_id, location_name, address) VALUES (?, ?, ?, ?)", locations)
+
+    client_weights = zipf_weights(clients)
+    client_order = rng.sample(range(1, clients + 1), clients)  # which client is the biggest is random too
+    port_weights = zipf_weights(ports)
+    port_names = {port_id: name for port_id, name, _ in port_rows}
+    status_names = [name for name, _ in STATUSES]
+    status_weights = list(itertools.accumulate(weight for _, weight in STATUSES))
+
+    stats = {"shipments": 0, "arrival": 0, "delivery": 0}
+    for batch_start in range(0, shipments, BATCH):
+        count = min(BATCH, shipments - batch_start)
+        rows, events = [], {"arrival": [], "delivery": []}
+        for offset in range(count):
+            shipment_id = batch_start + offset + 1  # ids in a fresh table start at 1
+            client_id = client_order[rng.choices(range(clients), cum_weights=client_weights)[0]]
+            origin, destination = rng.choices(range(1, ports + 1), cum_weights=port_weights, k=2)
+            if destination == origin:
+                destination = origin % ports + 1
+            status = rng.choices(status_names, cum_weights=status_weights)[0]
+            booked = START + timedelta(days=rng.randrange(DAYS), minutes=rng.randrange(24 * 60))
+            rows.append((f"SHP{booked.year}{shipment_id:08d}", client_id, origin, destination, status))
+
+            # Arrival scans: origin, then hubs, ending at the destination once it's there
+            if status == "Booked":
+                continue
+            low, high = ROUTE_SCANS[status]
+            hops = rng.randint(low, high)
+            stops = [origin] + [rng.choices(range(1, ports + 1), cum_weights=port_weights)[0] for _ in range(max(hops - 1, 0))]
+            if hops and status in ("At Port", "Delivered"):
+                stops.append(destination)
+            scanned = booked
+            for port_id in stops:
+                scanned += timedelta(hours=rng.randint(6, 24 * 9))
+                events["arrival"].append((shipment_id, scanned.isoformat(timespec="seconds"), port_names[port_id]))
+            if status == "Delivered":
+                for step in DELIVERY_STEPS:
+                    scanned += timedelta(hours=rng.randint(2, 48))
+                    events["delivery"].append((shipment_id, scanned.isoformat(timespec="seconds"), step))
+
+        with conn:
+            insert_shipments_batch(conn, rows)
+            conn.execute("INSERT INTO shipment_search_paused VALUES (1)")
+            for kind, (sql, _) in INSERTS.items():
+                conn.executemany(sql, events[kind])
+                count_events(conn, kind, len(events[kind]))
+                stats[kind] += len(events[kind])
+            conn.execute("DELETE FROM shipment_search_paused")
+        stats["shipments"] += count
+        if progress:
+            progress(stats, time.perf_counter() - start)
+    conn.execute("ANALYZE")
+    stats.update(clients=clients, ports=ports, delivery_locations=len(locations), seconds=time.perf_counter() - start)
+    return stats
+
+# Generate into a new file at path (removed first if it exists)
+def generate_file(path, shipments, seed=1, progress=None, **sizes):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db = FreightDB(path)
+    try:
+        migrate(db)
+        return generate(db, shipments, seed, progress=progress, **sizes)
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic freight.db of a given size")
+    parser.add_argument("--db", default="freight_synthetic.db", help="output file, replaced if it exists")
+    parser.add_argument("--shipments", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, help="default: shipments / 200")
+    parser.add_argument("--ports", type=int, help="default: shipments / 2000, between 20 and 400")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    stats = generate_file(args.db, args.shipments, args.seed, clients=args.clients, ports=args.ports,
+                          progress=lambda stats, seconds: print(f"\r{stats['shipments']} shipments", end=''))
+    print(f"\nGenerated {stats['shipments']} shipments, {stats['arrival']} arrival and {stats['delivery']} delivery scans, "
+          f"{stats['clients']} clients, {stats['ports']} ports and {stats['delivery_locations']} delivery locations "
+          f"into {args.db} in {stats['seconds']:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from changeFeed import prune_change_log
+from freightDB import DB_PATH, FreightDB
+from freightMigrations import SEARCH_ROW, SORT_NAMES_INSERT, SORT_NAMES_ROW, SUMMARY_BATCH, migrate
+
+# Bulk shipment import
+# Manifests are CSV or JSON Lines with the fields below. Client and port names are
+# resolved to ids through in-memory lookup tables (new names are added on the fly)
+# and rows go in with executemany, one transaction per batch. The full-text index, the
+# dashboard summaries and the sort names are filled once per batch instead of by the
+# per-row triggers.
+FIELDS = ("shipment_number", "client", "origin_port", "destination_port", "status")
+
+INSERT_SHIPMENT = '''INSERT INTO shipments (shipment_number, client_id, origin_port_id, destination_port_id, status)
+                     VALUES (?, ?, ?, ?, ?)'''
+
+def read_records(path, fmt=None):
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".json", ".ndjson")) else "csv")
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def read_chunks(path, chunk_size, fmt=None):
+    records = read_records(path, fmt)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+# name -> id for a reference table, loaded once and extended as new names show up
+class LookupTable:
+    def __init__(self, conn, table, name_column):
+        self.conn = conn
+        self.table = table
+        self.name_column = name_column
+        self.ids = {name: row_id for row_id, name in conn.execute(f"SELECT id, {name_column} FROM {table}")}
+
+    def get_id(self, name):
+        if not name:
+            return None
+        row_id = self.ids.get(name)
+        if row_id is None:
+            row_id = self.conn.execute(f"INSERT INTO {self.table} ({self.name_column}) VALUES (?)", (name,)).lastrowid
+            self.ids[name] = row_id
+        return row_id
+
+# Append shipment rows (INSERT_SHIPMENT order) inside the caller's transaction with the
+# per-row search, summary and sort name triggers paused, then index and count them
+# set-based and prune the change log the batch just added to. Returns the highest id
+# before the batch. The write lock is taken before MAX(id) is read, so another writer
+# can't commit rows in between that would then be indexed and counted twice.
+def insert_shipments_batch(conn, rows):
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM shipments").fetchone()[0]
+    conn.execute("INSERT INTO shipment_search_paused VALUES (1)")
+    conn.executemany(INSERT_SHIPMENT, rows)
+    conn.execute("DELETE FROM shipment_search_paused")
+    conn.execute(f"INSERT INTO shipment_search (rowid, shipment_number, client_name, origin_port, destination_port, status) "
+                 f"{SEARCH_ROW} WHERE shipments.id > ?", (last_id,))
+    conn.execute(f"{SORT_NAMES_INSERT}{SORT_NAMES_ROW} WHERE shipments.id > ?", (last_id,))
+    for sql in SUMMARY_BATCH:
+        conn.execute(sql, (last_id,))
+    prune_change_log(conn)
+    return last_id
+
+def import_shipments(conn, path, fmt=None, batch_size=5000, progress=None):
+    clients = LookupTable(conn, "clients", "client_name")
+    ports = LookupTable(conn, "ports", "port_name")
+    imported = 0
+    start = time.perf_counter()
+    for chunk in read_chunks(path, batch_size, fmt):
+        with conn:
+            # New clients/ports and the batch in one transaction that holds the write lock
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            rows = [(record.get("shipment_number"),
+                     clients.get_id(record.get("client")),
+                     ports.get_id(record.get("origin_port")),
+                     ports.get_id(record.get("destination_port")),
+                     record.get("status"))
+                    for record in chunk]
+            insert_shipments_batch(conn, rows)
+        imported += len(rows)
+        if progress:
+            progress(imported, time.perf_counter() - start)
+    seconds = time.perf_counter() - start
+    return {"rows": imported, "seconds": seconds, "rows_per_second": imported / seconds if seconds else 0.0}
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a CSV/JSONL shipment manifest into freight.db")
+    parser.add_argument("manifest")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = FreightDB(args.db)
+    migrate(db)
+    stats = import_shipments(db.connection(), args.manifest, args.format, args.batch_size,
+                             progress=lambda rows, seconds: print(f"\r{rows} rows ({rows / seconds:,.0f} rows/s)", end=''))
+    print(f"\nImported {stats['rows']} shipments from {os.path.basename(args.manifest)} "
+          f"in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s)")
+    db.close()
+
+if __name__ == "__main__":
+    main()
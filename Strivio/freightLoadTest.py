@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+# Load test for freightServer.py
+# Opens --clients keep-alive connections and has each one send --requests GETs drawn
+# from a mix of list pages, single shipments and conditional (If-None-Match) repeats,
+# then reports throughput and p50/p99 latency per kind of request.
+
+async def get(reader, writer, host, target, etag=None):
+    lines = [f"GET {target} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("etag")
+
+def targets(rng, max_id):
+    after = rng.randint(0, max_id)
+    return rng.choice([
+        ("page", f"/shipments?after={after}&limit=100"),
+        ("page", f"/shipments?after={after}&limit=100"),
+        ("sorted", f"/shipments?sort=Client&limit=100"),
+        ("filtered", f"/shipments?status=In%20Transit&limit=100"),
+        ("single", f"/shipments/{rng.randint(1, max_id)}"),
+        ("reference", rng.choice(["/clients?limit=100", "/ports?limit=100", "/delivery_locations?limit=100"])),
+    ])
+
+async def client(host, port, requests, max_id, seed, latencies, statuses):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    try:
+        for _ in range(requests):
+            kind, target = targets(rng, max_id)
+            etag = etags.get(target) if rng.random() < 0.5 else None
+            start = time.perf_counter()
+            status, new_etag = await get(reader, writer, host, target, etag)
+            elapsed = (time.perf_counter() - start) * 1000
+            if status == 304:
+                kind = "not modified"
+            latencies.setdefault(kind, []).append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+            if new_etag:
+                etags[target] = new_etag
+    finally:
+        writer.close()
+
+def percentile(samples, p):
+    return statistics.quantiles(samples, n=100, method='inclusive')[p - 1] if len(samples) > 1 else samples[0]
+
+async def run(host, port, clients, requests, max_id):
+    latencies, statuses = {}, {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, requests, max_id, seed, latencies, statuses) for seed in range(clients)))
+    seconds = time.perf_counter() - start
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total} requests from {clients} clients in {seconds:.2f}s ({total / seconds:,.0f} req/s), statuses {statuses}")
+    print(f"{'request':>14} {'count':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for kind, samples in sorted(latencies.items()) + [("all", [ms for samples in latencies.values() for ms in samples])]:
+        print(f"{kind:>14} {len(samples):>7} {percentile(samples, 50):>8.2f} {percentile(samples, 99):>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for freightServer.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--max-id", type=int, default=10000, help="highest shipment id to ask for")
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.clients, args.requests, args.max_id))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import argparse
+import os
+import time
+
+from changeFeed import prune_change_log
+from freightDB import DB_PATH, FreightDB
+from freightMigrations import SHIPMENT_SUMMARIES, migrate
+
+# Maintenance for freight.db: truncate, archive old shipments, vacuum
+#
+# truncate drops and recreates tables from their own schema (indexes and triggers
+# included) rather than running DELETE FROM, which would fire the change-log, search
+# and summary triggers once per row. archive moves shipments whose newest scan is older
+# than a cutoff, with their arrival/delivery rows, into a separate database in small
+# transactions so the app can keep using freight.db meanwhile. Both end with an optional
+# VACUUM/ANALYZE and report the bytes given back to the file system.
+
+DATA_TABLES = ("shipments", "clients", "ports", "delivery_locations", "arrival", "delivery")
+
+# Truncating a table also needs the tables that point at it truncated, or they'd be left
+# pointing at ids that no longer exist
+DEPENDENTS = {
+    "shipments": ("arrival", "delivery"),
+    "clients": ("shipments", "delivery_locations"),
+    "ports": ("shipments",),
+}
+
+def file_bytes(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+
+def with_dependents(tables):
+    tables = set(tables)
+    while True:
+        extra = {dependent for table in tables for dependent in DEPENDENTS.get(table, ())} - tables
+        if not extra:
+            return [table for table in DATA_TABLES if table in tables]
+        tables |= extra
+
+def truncate(db, tables=DATA_TABLES):
+    unknown = set(tables) - set(DATA_TABLES)
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(sorted(unknown))}")
+    tables = with_dependents(tables)
+    # The search index and sort names go with shipments and are rebuilt empty from their own schema too
+    recreate = tables + (["shipment_search", "shipment_sort_names"] if "shipments" in tables else [])
+    conn = db.connection()
+    conn.execute("PRAGMA foreign_keys = OFF")  # else DROP TABLE deletes row by row and cascades
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        schema = conn.execute(f'''SELECT type, sql FROM sqlite_master
+                                  WHERE tbl_name IN ({','.join('?' * len(recreate))}) AND sql IS NOT NULL''',
+                              recreate).fetchall()
+        for table in recreate:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        for kind in ("table", "index", "trigger"):
+            for sql in [sql for sql_type, sql in schema if sql_type == kind]:
+                conn.execute(sql)
+        if "shipments" in tables:
+            for summary in SHIPMENT_SUMMARIES:
+                conn.execute(f"DELETE FROM {summary}")
+        conn.executemany("UPDATE event_counts SET events = 0 WHERE table_name = ?",
+                         [(table,) for table in tables if table in ("arrival", "delivery")])
+        # Tells open windows (ChangeFeed) to reload instead of patching rows
+        conn.executemany("INSERT INTO change_log (table_name, row_id, op) VALUES (?, 0, 'truncate')",
+                         [(table,) for table in tables])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if db.foreign_keys else 'OFF'}")
+    return tables
+
+# Shipments with id > after_id (at most limit of them, in id order) whose newest arrival
+# or delivery scan is older than cutoff; shipments without scans are never archived.
+# Returns (matching ids, last id looked at). MAX over the (shipment_id, time) indexes is
+# one seek per shipment.
+ARCHIVE_CANDIDATES = '''SELECT id, newest FROM (
+                            SELECT id, MAX(COALESCE((SELECT MAX(arrival_time) FROM arrival WHERE shipment_id = shipments.id), ''),
+                                           COALESCE((SELECT MAX(delivery_time) FROM delivery WHERE shipment_id = shipments.id), '')) AS newest
+                            FROM shipments WHERE id > ? ORDER BY id LIMIT ?)'''
+
+def archive_candidates(conn, after_id, limit, cutoff):
+    rows = conn.execute(ARCHIVE_CANDIDATES, (after_id, limit)).fetchall()
+    return [row_id for row_id, newest in rows if newest and newest < cutoff], (rows[-1][0] if rows else None)
+
+def table_columns(conn, schema, table):
+    return [(name, column_type, default) for _, name, column_type, _, default, _
+            in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+# Creates the archive tables on first use. An archive made before a later migration added
+# columns to freight.db gets those columns added (rows already archived take the default),
+# and the copies below name their columns, so old archives keep working. Returns
+# {table: comma-separated column list} for archive_batch.
+def prepare_archive(conn):
+    columns = {}
+    for table in DATA_TABLES:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+        archived = {name for name, _, _ in table_columns(conn, "archive", table)}
+        current = table_columns(conn, "main", table)
+        for name, column_type, default in current:
+            if name not in archived:
+                conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {column_type}"
+                             + (f" DEFAULT {default}" if default is not None else ""))
+        columns[table] = ', '.join(name for name, _, _ in current)
+    for table in ("shipments", "clients", "ports", "delivery_locations"):
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_{table}_id ON {table}(id)")
+    for table in ("arrival", "delivery"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_shipment ON {table}(shipment_id)")
+    return columns
+
+# Copy one batch into the archive and delete it from freight.db, in one transaction.
+# Re-running a batch after a crash is harmless: shipments are replaced and their scans
+# in the archive are cleared before being copied again. The delete logs a change per
+# shipment, so the change log is pruned with each batch.
+def archive_batch(conn, ids, columns, cascade=True):
+    marks = ','.join('?' * len(ids))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(f'''INSERT OR REPLACE INTO archive.shipments ({columns["shipments"]})
+                         SELECT {columns["shipments"]} FROM main.shipments WHERE id IN ({marks})''', ids)
+        for table, column in (("clients", "client_id"), ("ports", "origin_port_id"), ("ports", "destination_port_id")):
+            conn.execute(f'''INSERT OR REPLACE INTO archive.{table} ({columns[table]}) SELECT {columns[table]} FROM main.{table}
+                             WHERE id IN (SELECT {column} FROM main.shipments WHERE id IN ({marks}))''', ids)
+        for table in ("arrival", "delivery"):
+            conn.execute(f"DELETE FROM archive.{table} WHERE shipment_id IN ({marks})", ids)
+            conn.execute(f"INSERT INTO archive.{table} ({columns[table]}) SELECT {columns[table]} FROM main.{table} "
+                         f"WHERE shipment_id IN ({marks})", ids)
+            if not cascade:
+                conn.execute(f"DELETE FROM main.{table} WHERE shipment_id IN ({marks})", ids)
+        conn.execute(f"DELETE FROM main.shipments WHERE id IN ({marks})", ids)  # scans follow by cascade
+        prune_change_log(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def archive(db, archive_path, cutoff, batch_size=500, pause=0.0, progress=None):
+    conn = db.connection()
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    try:
+        with conn:
+            columns = prepare_archive(conn)
+        moved, after_id = 0, 0
+        while after_id is not None:
+            ids, after_id = archive_candidates(conn, after_id, batch_size, cutoff)
+            if ids:
+                archive_batch(conn, ids, columns, db.foreign_keys)
+                moved += len(ids)
+                if pause:
+                    time.sleep(pause)  # leave the write lock free for the app between batches
+            if progress:
+                progress(moved, after_id)
+    finally:
+        conn.execute("DETACH DATABASE archive")
+    return moved
+
+# VACUUM rewrites the file without its free pages; returns bytes reclaimed
+def vacuum(db):
+    conn = db.connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    before = file_bytes(db.path)
+    conn.execute("VACUUM")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return before - file_bytes(db.path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Truncate, archive and vacuum freight.db")
+    parser.add_argument("--db", default=DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    truncate_parser = commands.add_parser("truncate", help="empty tables (and the tables that depend on them)")
+    truncate_parser.add_argument("tables", nargs='*', default=list(DATA_TABLES), help=f"any of {', '.join(DATA_TABLES)}; default all")
+    truncate_parser.add_argument("--no-vacuum", action="store_true")
+    archive_parser = commands.add_parser("archive", help="move shipments whose newest scan is older than --before")
+    archive_parser.add_argument("--before", required=True, help="ISO 8601 date or timestamp, e.g. 2024-01-01")
+    archive_parser.add_argument("--archive", default="freight_archive.db")
+    archive_parser.add_argument("--batch-size", type=int, default=500)
+    archive_parser.add_argument("--pause-ms", type=int, default=0, help="sleep between batches")
+    archive_parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards (blocks the app while it runs)")
+    commands.add_parser("vacuum", help="VACUUM and ANALYZE")
+    args = parser.parse_args()
+
+    db = FreightDB(args.db)
+    migrate(db)
+    start = time.perf_counter()
+    run_vacuum = args.command == "vacuum"
+    if args.command == "truncate":
+        try:
+            print(f"Truncated {', '.join(truncate(db, args.tables))}")
+        except ValueError as e:
+            parser.error(str(e))
+        run_vacuum = not args.no_vacuum
+    elif args.command == "archive":
+        moved = archive(db, args.archive, args.before, args.batch_size, args.pause_ms / 1000,
+                        progress=lambda moved, after_id: print(f"\r{moved} shipments archived (at id {after_id})", end=''))
+        print(f"\nArchived {moved} shipments to {args.archive}")
+        run_vacuum = args.vacuum
+    if run_vacuum:
+        print(f"Vacuumed, {vacuum(db):,} bytes reclaimed")
+    print(f"Done in {time.perf_counter() - start:.2f}s, {args.db} is {file_bytes(args.db):,} bytes")
+    db.close()
+
+if __name__ == "__main__":
+    main()
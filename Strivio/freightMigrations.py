@@ -0,0 +1,423 @@
+import sys
+
+from freightDB import DB_PATH, FreightDB
+from freightQueries import SHIPMENT_SELECT, SORTED_BY_NAME_FROM
+
+# Versioned schema migrations for freight.db
+# The schema version lives in PRAGMA user_version. Each migration runs once, in its
+# own transaction, and bumps the version, so old freight.db files upgrade in place.
+
+def migration_base_schema(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS shipments (
+                        id INTEGER PRIMARY KEY,
+                        shipment_number TEXT,
+                        client_id INTEGER,
+                        origin_port_id INTEGER,
+                        destination_port_id INTEGER,
+                        status TEXT,
+                        FOREIGN KEY(client_id) REFERENCES clients(id),
+                        FOREIGN KEY(origin_port_id) REFERENCES ports(id),
+                        FOREIGN KEY(destination_port_id) REFERENCES ports(id))''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS clients (
+                        id INTEGER PRIMARY KEY,
+                        client_name TEXT,
+                        contact_info TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS ports (
+                        id INTEGER PRIMARY KEY,
+                        port_name TEXT,
+                        location TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS delivery_locations (
+                        id INTEGER PRIMARY KEY,
+                        client_id INTEGER,
+                        location_name TEXT,
+                        address TEXT,
+                        FOREIGN KEY(client_id) REFERENCES clients(id))''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS arrival (
+                        shipment_id INTEGER,
+                        arrival_time TEXT,
+                        arrival_location TEXT,
+                        FOREIGN KEY(shipment_id) REFERENCES shipments(id))''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS delivery (
+                        shipment_id INTEGER,
+                        delivery_time TEXT,
+                        delivery_status TEXT,
+                        FOREIGN KEY(shipment_id) REFERENCES shipments(id))''')
+
+# Databases created by the first Strivio.py store origin/destination as free text.
+# Turn each distinct name into a ports row and rebuild shipments with port ids.
+def migration_port_ids(conn):
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(shipments)")]
+    if 'origin' not in columns:
+        return
+    conn.execute('''INSERT INTO ports (port_name)
+                    SELECT name FROM (SELECT origin AS name FROM shipments UNION SELECT destination FROM shipments)
+                    WHERE name IS NOT NULL AND name != ''
+                      AND name NOT IN (SELECT port_name FROM ports WHERE port_name IS NOT NULL)''')
+    conn.execute('''CREATE TABLE shipments_new (
+                        id INTEGER PRIMARY KEY,
+                        shipment_number TEXT,
+                        client_id INTEGER,
+                        origin_port_id INTEGER,
+                        destination_port_id INTEGER,
+                        status TEXT,
+                        FOREIGN KEY(client_id) REFERENCES clients(id),
+                        FOREIGN KEY(origin_port_id) REFERENCES ports(id),
+                        FOREIGN KEY(destination_port_id) REFERENCES ports(id))''')
+    client_id = 'client_id' if 'client_id' in columns else 'NULL'
+    conn.execute(f'''INSERT INTO shipments_new (id, shipment_number, client_id, origin_port_id, destination_port_id, status)
+                     SELECT id, shipment_number, {client_id},
+                            (SELECT MIN(id) FROM ports WHERE port_name = shipments.origin),
+                            (SELECT MIN(id) FROM ports WHERE port_name = shipments.destination),
+                            status
+                     FROM shipments''')
+    conn.execute("DROP TABLE shipments")
+    conn.execute("ALTER TABLE shipments_new RENAME TO shipments")
+
+# Joins into clients/ports already use their integer primary keys; these cover the
+# reverse lookups (shipments per client/port) and the arrival/delivery delete paths.
+def migration_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_shipments_client ON shipments(client_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_shipments_origin_port ON shipments(origin_port_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_shipments_destination_port ON shipments(destination_port_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_delivery_locations_client ON delivery_locations(client_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ports_name ON ports(port_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_arrival_shipment ON arrival(shipment_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_delivery_shipment ON delivery(shipment_id)")
+
+# Every insert/update/delete on the listed tables appends (table, row id) to change_log.
+# Open windows read the log past their last seq and refresh only those rows.
+CHANGE_TRACKED_TABLES = ("shipments", "clients", "ports", "delivery_locations")
+
+def migration_change_log(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS change_log (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        table_name TEXT NOT NULL,
+                        row_id INTEGER NOT NULL,
+                        op TEXT NOT NULL)''')
+    for table in CHANGE_TRACKED_TABLES:
+        for op, row in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_{op}_log AFTER {op.upper()} ON {table}
+                             BEGIN
+                                 INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', {row}.id, '{op}');
+                             END''')
+
+# Full-text index over the shipment list; rowid is the shipment id. Triggers keep it in
+# step with shipments and with renames/deletes of the clients and ports it names.
+# A bulk load can insert a row into shipment_search_paused inside its own transaction to
+# skip the per-row insert triggers, then index the batch with one INSERT ... SELECT.
+SEARCH_ROW = '''SELECT shipments.id, shipments.shipment_number, clients.client_name, ports1.port_name, ports2.port_name, shipments.status
+                FROM shipments
+                LEFT JOIN clients ON shipments.client_id = clients.id
+                LEFT JOIN ports AS ports1 ON shipments.origin_port_id = ports1.id
+                LEFT JOIN ports AS ports2 ON shipments.destination_port_id = ports2.id'''
+
+def migration_shipment_search(conn):
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS shipment_search USING fts5(
+                        shipment_number, client_name, origin_port, destination_port, status)''')
+    conn.execute("CREATE TABLE IF NOT EXISTS shipment_search_paused (paused INTEGER)")
+    conn.execute("DELETE FROM shipment_search")
+    conn.execute(f"INSERT INTO shipment_search (rowid, shipment_number, client_name, origin_port, destination_port, status) {SEARCH_ROW}")
+
+    def reindex(where):
+        return f'''DELETE FROM shipment_search WHERE rowid IN (SELECT shipments.id FROM shipments WHERE {where});
+                   INSERT INTO shipment_search (rowid, shipment_number, client_name, origin_port, destination_port, status)
+                   {SEARCH_ROW} WHERE {where};'''
+
+    triggers = {
+        "shipments_insert_search": ("AFTER INSERT ON shipments WHEN NOT EXISTS (SELECT 1 FROM shipment_search_paused)",
+                                    f"INSERT INTO shipment_search (rowid, shipment_number, client_name, origin_port, destination_port, status) "
+                                    f"{SEARCH_ROW} WHERE shipments.id = NEW.id;"),
+        "shipments_update_search": ("AFTER UPDATE ON shipments",
+                                    "DELETE FROM shipment_search WHERE rowid = OLD.id;" + reindex("shipments.id = NEW.id")),
+        "shipments_delete_search": ("AFTER DELETE ON shipments", "DELETE FROM shipment_search WHERE rowid = OLD.id;"),
+    }
+    for table, column, where in (("clients", "client_name", "shipments.client_id = {row}.id"),
+                                 ("ports", "port_name", "shipments.origin_port_id = {row}.id OR shipments.destination_port_id = {row}.id")):
+        triggers[f"{table}_insert_search"] = (f"AFTER INSERT ON {table}", reindex(where.format(row="NEW")))
+        triggers[f"{table}_update_search"] = (f"AFTER UPDATE OF {column} ON {table}", reindex(where.format(row="NEW")))
+        triggers[f"{table}_delete_search"] = (f"AFTER DELETE ON {table}", reindex(where.format(row="OLD")))
+    for name, (event, body) in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+# Sorting and filtering the shipment list happen in SQL (freightQueries.shipment_page_query);
+# these back the (column, id) keysets and the status filter. Client and port filters use
+# the migration_indexes indexes.
+def migration_sort_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_shipments_status ON shipments(status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_shipments_number ON shipments(shipment_number)")
+
+# Arrival/delivery scans are read per shipment in time order (the detail window
+# timelines); (shipment_id, time) serves that and the delete-by-shipment path, so the
+# single-column shipment_id indexes go.
+def migration_event_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_arrival_shipment_time ON arrival(shipment_id, arrival_time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_delivery_shipment_time ON delivery(shipment_id, delivery_time)")
+    conn.execute("DROP INDEX IF EXISTS idx_arrival_shipment")
+    conn.execute("DROP INDEX IF EXISTS idx_delivery_shipment")
+
+# Dashboard counts kept up to date on write, so the dashboard reads a few small tables
+# instead of grouping shipments, arrival and delivery. Missing keys are stored as ''
+# (status) or 0 (ids) since NULLs never conflict in a primary key. Like the search index,
+# the insert triggers stand down while shipment_search_paused has a row; bulk loads then
+# add their batch with SUMMARY_BATCH (shipments) and count_events (scans).
+SHIPMENT_SUMMARIES = {
+    "shipment_status_counts": (("status",), ("IFNULL({row}.status, '')",)),
+    "shipment_route_counts": (("origin_port_id", "destination_port_id"),
+                              ("IFNULL({row}.origin_port_id, 0)", "IFNULL({row}.destination_port_id, 0)")),
+    "shipment_client_counts": (("client_id",), ("IFNULL({row}.client_id, 0)",)),
+}
+
+def summary_upsert(table, columns, values, delta):
+    return (f"INSERT INTO {table} ({', '.join(columns)}, shipments) VALUES ({', '.join(values)}, {delta}) "
+            f"ON CONFLICT({', '.join(columns)}) DO UPDATE SET shipments = shipments + excluded.shipments;")
+
+def summary_remove(table, columns, values):
+    return (summary_upsert(table, columns, values, -1) +
+            f"DELETE FROM {table} WHERE ({', '.join(columns)}) = ({', '.join(values)}) AND shipments <= 0;")
+
+# Adds every shipment with id > ? to the summaries, one grouped statement per table
+SUMMARY_BATCH = [f'''INSERT INTO {table} ({', '.join(columns)}, shipments)
+                     SELECT {', '.join(value.format(row="shipments") for value in values)}, COUNT(*) FROM shipments
+                     WHERE shipments.id > ? GROUP BY {', '.join(str(i + 1) for i in range(len(columns)))}
+                     ON CONFLICT({', '.join(columns)}) DO UPDATE SET shipments = shipments + excluded.shipments'''
+                 for table, (columns, values) in SHIPMENT_SUMMARIES.items()]
+
+EVENT_COUNT_TABLES = ("arrival", "delivery")
+
+def count_events(conn, table, count):
+    conn.execute("INSERT INTO event_counts (table_name, events) VALUES (?, ?) "
+                 "ON CONFLICT(table_name) DO UPDATE SET events = events + excluded.events", (table, count))
+
+def migration_summaries(conn):
+    for table, (columns, _) in SHIPMENT_SUMMARIES.items():
+        conn.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+                            {', '.join(column + (" TEXT" if column == "status" else " INTEGER") for column in columns)},
+                            shipments INTEGER NOT NULL,
+                            PRIMARY KEY ({', '.join(columns)}))''')
+        conn.execute(f"DELETE FROM {table}")
+    for sql in SUMMARY_BATCH:
+        conn.execute(sql, (0,))
+    conn.execute('''CREATE TABLE IF NOT EXISTS event_counts (
+                        table_name TEXT PRIMARY KEY,
+                        events INTEGER NOT NULL)''')
+    for table in EVENT_COUNT_TABLES:
+        conn.execute(f"INSERT OR REPLACE INTO event_counts VALUES ('{table}', (SELECT COUNT(*) FROM {table}))")
+
+    triggers = {
+        "shipments_insert_summary": ("AFTER INSERT ON shipments WHEN NOT EXISTS (SELECT 1 FROM shipment_search_paused)",
+                                     ''.join(summary_upsert(table, columns, [value.format(row="NEW") for value in values], 1)
+                                             for table, (columns, values) in SHIPMENT_SUMMARIES.items())),
+        "shipments_delete_summary": ("AFTER DELETE ON shipments",
+                                     ''.join(summary_remove(table, columns, [value.format(row="OLD") for value in values])
+                                             for table, (columns, values) in SHIPMENT_SUMMARIES.items())),
+    }
+    for table, (columns, values) in SHIPMENT_SUMMARIES.items():
+        changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+        triggers[f"{table}_update"] = (f"AFTER UPDATE OF {', '.join(columns)} ON shipments WHEN {changed}",
+                                       summary_remove(table, columns, [value.format(row="OLD") for value in values]) +
+                                       summary_upsert(table, columns, [value.format(row="NEW") for value in values], 1))
+    for table in EVENT_COUNT_TABLES:
+        triggers[f"{table}_insert_count"] = (f"AFTER INSERT ON {table} WHEN NOT EXISTS (SELECT 1 FROM shipment_search_paused)",
+                                             f"UPDATE event_counts SET events = events + 1 WHERE table_name = '{table}';")
+        triggers[f"{table}_delete_count"] = (f"AFTER DELETE ON {table}",
+                                             f"UPDATE event_counts SET events = events - 1 WHERE table_name = '{table}';")
+    for name, (event, body) in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+# SQLite can't add a constraint to an existing table, so rebuild it under the new
+# definition, keeping rowids (the timelines use them as keys), indexes and triggers.
+# Rows not matching keep_where are left behind.
+def rebuild_table(conn, table, create_sql, keep_where="1"):
+    extras = [row[0] for row in conn.execute("SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+                                             "AND sql IS NOT NULL ORDER BY type", (table,))]
+    columns = ', '.join(column[1] for column in conn.execute(f"PRAGMA table_info({table})"))
+    conn.execute(create_sql.format(table=f"{table}_new"))
+    conn.execute(f"INSERT INTO {table}_new (rowid, {columns}) SELECT rowid, {columns} FROM {table} WHERE {keep_where}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    for sql in extras:
+        conn.execute(sql)
+
+# Scans go with their shipment: deleting shipments is one statement and the foreign key
+# (enforced from here on, see FreightDB._connect) removes arrival/delivery rows. Scans
+# already pointing at deleted shipments are dropped in the rebuild.
+def migration_cascade_events(conn):
+    for table, time_column, detail_column in (("arrival", "arrival_time", "arrival_location"),
+                                              ("delivery", "delivery_time", "delivery_status")):
+        rebuild_table(conn, table, f'''CREATE TABLE {{table}} (
+                                           shipment_id INTEGER,
+                                           {time_column} TEXT,
+                                           {detail_column} TEXT,
+                                           FOREIGN KEY(shipment_id) REFERENCES shipments(id) ON DELETE CASCADE)''',
+                      "shipment_id IS NULL OR shipment_id IN (SELECT id FROM shipments)")
+        conn.execute(f"UPDATE event_counts SET events = (SELECT COUNT(*) FROM {table}) WHERE table_name = '{table}'")
+
+# Optimistic locking for shipments: a writer sends the version it read and the update
+# only applies if it's still current (freightRepo.RecordTable.update_many bumps it).
+# Writers that don't know about versions still bump it through shipments_version, so a
+# clerk holding an older copy can't overwrite their change. The search index is only
+# rebuilt when a listed column changes, not for the version bump.
+SHIPMENT_FIELDS = ("shipment_number", "client_id", "origin_port_id", "destination_port_id", "status")
+
+def migration_shipment_versions(conn):
+    if "version" not in [column[1] for column in conn.execute("PRAGMA table_info(shipments)")]:
+        conn.execute("ALTER TABLE shipments ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    conn.execute("DROP TRIGGER IF EXISTS shipments_update_search")
+    conn.execute(f'''CREATE TRIGGER shipments_update_search AFTER UPDATE OF {', '.join(SHIPMENT_FIELDS)} ON shipments
+                     BEGIN
+                         DELETE FROM shipment_search WHERE rowid = OLD.id;
+                         INSERT INTO shipment_search (rowid, shipment_number, client_name, origin_port, destination_port, status)
+                         {SEARCH_ROW} WHERE shipments.id = NEW.id;
+                     END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS shipments_version AFTER UPDATE OF {', '.join(SHIPMENT_FIELDS)} ON shipments
+                     WHEN NEW.version = OLD.version
+                     BEGIN
+                         UPDATE shipments SET version = OLD.version + 1 WHERE id = NEW.id;
+                     END''')
+
+# Logins for logIn.py; password_hash is a salted scrypt (or PBKDF2) string, see freightUsers
+def migration_users(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS users (
+                        id INTEGER PRIMARY KEY,
+                        username TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                        password_hash TEXT NOT NULL,
+                        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)''')
+
+# Client and port names for sorting the shipment list, one row per shipment (shipment_id
+# is the rowid, so each name index is really (name, shipment_id) and a sorted page is an
+# index range scan rather than a sort of the whole join). Triggers keep it in step the way
+# they do the search index, and bulk loads fill their batch with SORT_NAMES_ROW too.
+SORT_NAMES_ROW = '''SELECT shipments.id, clients.client_name, ports1.port_name, ports2.port_name
+                    FROM shipments
+                    LEFT JOIN clients ON shipments.client_id = clients.id
+                    LEFT JOIN ports AS ports1 ON shipments.origin_port_id = ports1.id
+                    LEFT JOIN ports AS ports2 ON shipments.destination_port_id = ports2.id'''
+
+SORT_NAMES_INSERT = "INSERT OR REPLACE INTO shipment_sort_names (shipment_id, client_name, origin_port, destination_port) "
+
+def migration_sort_names(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS shipment_sort_names (
+                        shipment_id INTEGER PRIMARY KEY,
+                        client_name TEXT,
+                        origin_port TEXT,
+                        destination_port TEXT)''')
+    for column in ("client_name", "origin_port", "destination_port"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_sort_names_{column} ON shipment_sort_names({column})")
+    conn.execute("DELETE FROM shipment_sort_names")
+    conn.execute(SORT_NAMES_INSERT + SORT_NAMES_ROW)
+
+    triggers = {
+        "shipments_insert_sort_names": ("AFTER INSERT ON shipments WHEN NOT EXISTS (SELECT 1 FROM shipment_search_paused)",
+                                        f"{SORT_NAMES_INSERT}{SORT_NAMES_ROW} WHERE shipments.id = NEW.id;"),
+        "shipments_update_sort_names": ("AFTER UPDATE OF client_id, origin_port_id, destination_port_id ON shipments",
+                                        f"{SORT_NAMES_INSERT}{SORT_NAMES_ROW} WHERE shipments.id = NEW.id;"),
+        "shipments_delete_sort_names": ("AFTER DELETE ON shipments",
+                                        "DELETE FROM shipment_sort_names WHERE shipment_id = OLD.id;"),
+    }
+    for table, column, where in (("clients", "client_name", "shipments.client_id = {row}.id"),
+                                 ("ports", "port_name", "shipments.origin_port_id = {row}.id OR shipments.destination_port_id = {row}.id")):
+        triggers[f"{table}_insert_sort_names"] = (f"AFTER INSERT ON {table}",
+                                                  f"{SORT_NAMES_INSERT}{SORT_NAMES_ROW} WHERE {where.format(row='NEW')};")
+        triggers[f"{table}_update_sort_names"] = (f"AFTER UPDATE OF {column} ON {table}",
+                                                  f"{SORT_NAMES_INSERT}{SORT_NAMES_ROW} WHERE {where.format(row='NEW')};")
+        triggers[f"{table}_delete_sort_names"] = (f"AFTER DELETE ON {table}",
+                                                  f"{SORT_NAMES_INSERT}{SORT_NAMES_ROW} WHERE {where.format(row='OLD')};")
+    for name, (event, body) in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+MIGRATIONS = [
+    (1, "base schema", migration_base_schema),
+    (2, "port ids for legacy shipments", migration_port_ids),
+    (3, "join and delete indexes", migration_indexes),
+    (4, "change log", migration_change_log),
+    (5, "shipment full-text search", migration_shipment_search),
+    (6, "shipment sort indexes", migration_sort_indexes),
+    (7, "arrival and delivery time indexes", migration_event_indexes),
+    (8, "dashboard summaries", migration_summaries),
+    (9, "cascade arrival/delivery deletes", migration_cascade_events),
+    (10, "shipment row versions", migration_shipment_versions),
+    (11, "users", migration_users),
+    (12, "shipment sort names", migration_sort_names),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(db):
+    return db.query_one("PRAGMA user_version")[0]
+
+# Apply every pending migration; returns the list of (version, name) applied.
+# Foreign keys are off while migrating so table rebuilds don't cascade or fail halfway.
+def migrate(db):
+    conn = db.connection()
+    applied = []
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for version, name, migration in MIGRATIONS:
+            if version <= schema_version(db):
+                continue
+            conn.execute("BEGIN")
+            try:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append((version, name))
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if db.foreign_keys else 'OFF'}")
+    if applied:
+        conn.execute("ANALYZE")
+    return applied
+
+# Queries the app runs on its hot paths, used for the before/after plan report
+PLAN_QUERIES = [
+    ("shipment list", SHIPMENT_SELECT + " WHERE shipments.id > ? ORDER BY shipments.id LIMIT 200", (0,)),
+    ("shipments for client", "SELECT id FROM shipments WHERE client_id = ?", (1,)),
+    ("shipments for port", "SELECT id FROM shipments WHERE origin_port_id = ? OR destination_port_id = ?", (1, 1)),
+    ("delivery locations", '''SELECT delivery_locations.id, clients.client_name
+                              FROM delivery_locations
+                              LEFT JOIN clients ON delivery_locations.client_id = clients.id
+                              WHERE delivery_locations.client_id = ?''', (1,)),
+    ("shipments by client", SHIPMENT_SELECT.replace("FROM shipments", SORTED_BY_NAME_FROM) +
+                            " WHERE (shipment_sort_names.client_name, shipment_sort_names.shipment_id) > (?, ?) "
+                            "ORDER BY shipment_sort_names.client_name, shipment_sort_names.shipment_id LIMIT 200", ("", 0)),
+    ("shipments by status", SHIPMENT_SELECT + " WHERE (shipments.status, shipments.id) > (?, ?) "
+                            "ORDER BY shipments.status, shipments.id LIMIT 200", ("", 0)),
+    ("port by name", "SELECT id FROM ports WHERE port_name = ?", ("",)),
+    ("arrival timeline", "SELECT rowid, arrival_time, arrival_location FROM arrival WHERE shipment_id = ? "
+                         "AND (arrival_time, rowid) > (?, ?) ORDER BY arrival_time, rowid LIMIT 200", (1, "", 0)),
+    ("delete arrival", "DELETE FROM arrival WHERE shipment_id = ?", (1,)),
+    ("delete delivery", "DELETE FROM delivery WHERE shipment_id = ?", (1,)),
+]
+
+def query_plan(db, sql, params=()):
+    return [row[3] for row in db.query("EXPLAIN QUERY PLAN " + sql, params)]
+
+def plan_report(db):
+    report = {}
+    for label, sql, params in PLAN_QUERIES:
+        try:
+            report[label] = query_plan(db, sql, params)
+        except Exception as e:  # e.g. legacy schema without the columns yet
+            report[label] = [f"n/a ({e})"]
+    return report
+
+def print_plans(title, report):
+    print(title)
+    for label, plan in report.items():
+        print(f"  {label}:")
+        for step in plan:
+            print(f"    {step}")
+
+if __name__ == "__main__":
+    db = FreightDB(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    print(f"schema version {schema_version(db)} (latest {LATEST_VERSION})")
+    before = plan_report(db)
+    applied = migrate(db)
+    for version, name in applied:
+        print(f"applied {version}: {name}")
+    if applied:
+        print_plans("query plans before:", before)
+    print_plans("query plans after:", plan_report(db))
+    db.close()
@@ -0,0 +1,145 @@
+# SQL shared by the GUI, the command line tools and the benchmarks
+
+# The shipment list: one row per shipment with client and port names joined in
+SHIPMENT_SELECT = '''SELECT shipments.id, shipments.shipment_number, clients.client_name, 
+                           ports1.port_name AS origin_port, ports2.port_name AS destination_port, 
+                           shipments.status
+                    FROM shipments
+                    LEFT JOIN clients ON shipments.client_id = clients.id
+                    LEFT JOIN ports AS ports1 ON shipments.origin_port_id = ports1.id
+                    LEFT JOIN ports AS ports2 ON shipments.destination_port_id = ports2.id'''
+
+# The same rows driven from shipment_sort_names (see freightMigrations.migration_sort_names),
+# for the Client/Origin/Destination sorts, so the page walks a name index in order
+SORTED_BY_NAME_FROM = "FROM shipment_sort_names JOIN shipments ON shipments.id = shipment_sort_names.shipment_id"
+SHIPMENT_SELECT_BY_NAME = SHIPMENT_SELECT.replace("FROM shipments", SORTED_BY_NAME_FROM, 1)
+
+CLIENT_SELECT = "SELECT id, client_name, contact_info FROM clients"
+
+PORT_SELECT = "SELECT id, port_name, location FROM ports"
+
+DELIVERY_LOCATION_SELECT = '''SELECT delivery_locations.id, clients.client_name, delivery_locations.location_name, delivery_locations.address
+                              FROM delivery_locations
+                              LEFT JOIN clients ON delivery_locations.client_id = clients.id'''
+
+# Distinct statuses for the status filter, an index scan of idx_shipments_status
+SHIPMENT_STATUSES = "SELECT DISTINCT status FROM shipments WHERE status IS NOT NULL ORDER BY status"
+
+# Shipment ids matching a full-text search, in id order (see migration_shipment_search)
+SEARCH_IDS = "SELECT rowid FROM shipment_search WHERE shipment_search MATCH ?"
+
+# Turn what the user typed into an FTS5 query: every word must match as a prefix.
+# Words are quoted so punctuation in shipment numbers can't break the query syntax.
+def search_query(text):
+    words = text.split()
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+# Sortable shipment list columns: heading -> (SQL expression, index in the row). Every
+# expression has an index on (expression, id); the joined names are sorted through the
+# copies in shipment_sort_names.
+SHIPMENT_SORT_COLUMNS = {
+    "ID": ("shipments.id", 0),
+    "Shipment Number": ("shipments.shipment_number", 1),
+    "Client": ("shipment_sort_names.client_name", 2),
+    "Origin": ("shipment_sort_names.origin_port", 3),
+    "Destination": ("shipment_sort_names.destination_port", 4),
+    "Status": ("shipments.status", 5),
+}
+
+# Filterable shipment columns: filter name -> condition taking one parameter
+SHIPMENT_FILTERS = {
+    "status": "shipments.status = ?",
+    "client": "shipments.client_id = ?",
+    "origin": "shipments.origin_port_id = ?",
+    "destination": "shipments.destination_port_id = ?",
+}
+
+# WHERE conditions and parameters for the active filters and search
+def shipment_conditions(filters=None, search=''):
+    conditions, params = [], []
+    for name, value in (filters or {}).items():
+        if value not in (None, ''):
+            conditions.append(SHIPMENT_FILTERS[name])
+            params.append(value)
+    if search:
+        conditions.append(f"shipments.id IN ({SEARCH_IDS})")
+        params.append(search_query(search))
+    return conditions, params
+
+# Keyset condition for rows after (forward) or before the anchor on (expr, key), with
+# NULLs of expr sorting first as SQLite does. Written as a row value so an index on
+# (expr) or (..., expr) serves it as a range scan.
+def keyset_condition(expr, key_expr, value, key, forward):
+    if value is None and forward:
+        return f"(({expr} IS NULL AND {key_expr} > ?) OR {expr} IS NOT NULL)", [key]
+    if value is None:
+        return f"({expr} IS NULL AND {key_expr} < ?)", [key]
+    if forward:
+        return f"({expr}, {key_expr}) > (?, ?)", [value, key]
+    return f"(({expr}, {key_expr}) < (?, ?) OR {expr} IS NULL)", [value, key]
+
+# One page of the shipment list, sorted and filtered in SQL with keyset pagination:
+# rows after (direction 'next') or before ('prev') the anchor row in display order,
+# on (sort column, id) so ties and repeated values page correctly. 'prev' pages come
+# back in reverse display order. NULLs sort first, as SQLite does. A search on any other
+# sort keeps walking the sort index and checks each row against the matches (the unary +
+# stops SQLite fetching the matches by id and sorting them in a temp B-tree instead).
+def shipment_page_query(direction, anchor, limit, sort_column="ID", descending=False, filters=None, search=''):
+    expr, index = SHIPMENT_SORT_COLUMNS[sort_column]
+    by_name = expr.startswith("shipment_sort_names.")
+    select = SHIPMENT_SELECT_BY_NAME if by_name else SHIPMENT_SELECT
+    key_expr = "shipment_sort_names.shipment_id" if by_name else "shipments.id"
+    forward = (direction == 'next') != descending  # walking the list in ascending order
+    order = "ASC" if forward else "DESC"
+    conditions, params = shipment_conditions(filters)
+
+    if search and sort_column == "ID" and not conditions:
+        # Keyset and LIMIT go inside the full-text subquery so a page only reads its own matches
+        keyset = ""
+        if anchor:
+            keyset = " AND rowid > ?" if forward else " AND rowid < ?"
+        conditions.append(f"shipments.id IN ({SEARCH_IDS}{keyset} ORDER BY rowid {order} LIMIT ?)")
+        params += [search_query(search)] + ([anchor[0]] if anchor else []) + [limit]
+        anchor = None
+    elif search:
+        conditions.append(f"{'' if sort_column == 'ID' else '+'}{key_expr} IN ({SEARCH_IDS})")
+        params.append(search_query(search))
+
+    if anchor and sort_column == "ID":
+        conditions.append("shipments.id > ?" if forward else "shipments.id < ?")
+        params.append(anchor[0])
+    elif anchor:
+        condition, keyset_params = keyset_condition(expr, key_expr, anchor[index], anchor[0], forward)
+        conditions.append(condition)
+        params += keyset_params
+
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    order_by = f" ORDER BY shipments.id {order}" if sort_column == "ID" else f" ORDER BY {expr} {order}, {key_expr} {order}"
+    return select + where + order_by + " LIMIT ?", params + [limit]
+
+# Python sort key matching shipment_page_query's ascending order, for placing changed rows
+def shipment_sort_key(sort_column="ID"):
+    index = SHIPMENT_SORT_COLUMNS[sort_column][1]
+    return lambda row: (row[index] is not None, row[index] if row[index] is not None else '', row[0])
+
+# Arrival and delivery scans: table -> (time column, detail column). Rows have no key of
+# their own, so the timeline pages on (time, rowid) within one shipment using the
+# (shipment_id, time) index from migration_event_indexes.
+EVENT_TABLES = {
+    "arrival": ("arrival_time", "arrival_location"),
+    "delivery": ("delivery_time", "delivery_status"),
+}
+
+# One page of a shipment's event timeline, oldest first: rows are (rowid, time, detail).
+# 'prev' pages come back in reverse display order, as for shipment_page_query.
+def event_page_query(table, shipment_id, direction, anchor, limit):
+    time_column, detail_column = EVENT_TABLES[table]
+    forward = direction == 'next'
+    order = "ASC" if forward else "DESC"
+    conditions, params = ["shipment_id = ?"], [shipment_id]
+    if anchor:
+        condition, keyset_params = keyset_condition(time_column, "rowid", anchor[1], anchor[0], forward)
+        conditions.append(condition)
+        params += keyset_params
+    return (f"SELECT rowid, {time_column}, {detail_column} FROM {table} WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {time_column} {order}, rowid {order} LIMIT ?", params + [limit])
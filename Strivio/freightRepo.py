@@ -0,0 +1,321 @@
+from contextlib import contextmanager
+from typing import Optional
+
+from freightQueries import EVENT_TABLES, SHIPMENT_SELECT, SHIPMENT_STATUSES, event_page_query, shipment_conditions, shipment_page_query
+
+# Headless data access for freight.db
+# Everything the GUI reads and writes goes through here, so batch jobs, benchmarks and
+# servers can use the same code without Tkinter. Table rows come back as small
+# __slots__ objects; the list views keep plain tuples, which is what a Treeview takes.
+# Batch writes go through FreightDB.write, so a write that finds freight.db locked by
+# another clerk is retried rather than failing.
+
+IN_CHUNK = 500  # ids per "IN (...)" query, well under SQLite's host parameter limit
+
+class Row:
+    __slots__ = ()
+
+    @classmethod
+    def factory(cls, cursor, row):
+        return cls(*row)
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.astuple() == other.astuple()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+class Shipment(Row):
+    __slots__ = ("id", "shipment_number", "client_id", "origin_port_id", "destination_port_id", "status", "version")
+
+    def __init__(self, id: Optional[int] = None, shipment_number: Optional[str] = None, client_id: Optional[int] = None,
+                 origin_port_id: Optional[int] = None, destination_port_id: Optional[int] = None, status: Optional[str] = None,
+                 version: int = 0):
+        self.id = id
+        self.shipment_number = shipment_number
+        self.client_id = client_id
+        self.origin_port_id = origin_port_id
+        self.destination_port_id = destination_port_id
+        self.status = status
+        self.version = version
+
+class Client(Row):
+    __slots__ = ("id", "client_name", "contact_info")
+
+    def __init__(self, id: Optional[int] = None, client_name: Optional[str] = None, contact_info: Optional[str] = None):
+        self.id = id
+        self.client_name = client_name
+        self.contact_info = contact_info
+
+class Port(Row):
+    __slots__ = ("id", "port_name", "location")
+
+    def __init__(self, id: Optional[int] = None, port_name: Optional[str] = None, location: Optional[str] = None):
+        self.id = id
+        self.port_name = port_name
+        self.location = location
+
+class DeliveryLocation(Row):
+    __slots__ = ("id", "client_id", "location_name", "address")
+
+    def __init__(self, id: Optional[int] = None, client_id: Optional[int] = None, location_name: Optional[str] = None,
+                 address: Optional[str] = None):
+        self.id = id
+        self.client_id = client_id
+        self.location_name = location_name
+        self.address = address
+
+class Arrival(Row):
+    __slots__ = ("shipment_id", "arrival_time", "arrival_location")
+
+    def __init__(self, shipment_id: Optional[int] = None, arrival_time: Optional[str] = None,
+                 arrival_location: Optional[str] = None):
+        self.shipment_id = shipment_id
+        self.arrival_time = arrival_time
+        self.arrival_location = arrival_location
+
+class Delivery(Row):
+    __slots__ = ("shipment_id", "delivery_time", "delivery_status")
+
+    def __init__(self, shipment_id: Optional[int] = None, delivery_time: Optional[str] = None,
+                 delivery_status: Optional[str] = None):
+        self.shipment_id = shipment_id
+        self.delivery_time = delivery_time
+        self.delivery_status = delivery_status
+
+
+# Raised by update_many when rows were changed by someone else since they were read;
+# nothing in the batch is written
+class ConflictError(Exception):
+    def __init__(self, table, ids):
+        super().__init__(f"{len(ids)} {table} row(s) changed by another user: {', '.join(map(str, ids[:10]))}")
+        self.table = table
+        self.ids = ids
+
+
+# Run the body in one write transaction, or inside the caller's if one is already open.
+# BEGIN IMMEDIATE takes the write lock up front so ids handed out by insert_many can't race.
+@contextmanager
+def write_transaction(conn):
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def chunks(keys):
+    keys = list(keys)
+    for start in range(0, len(keys), IN_CHUNK):
+        yield keys[start:start + IN_CHUNK]
+
+# Batch reads, inserts and deletes for one table, keyed on key (rows of a key come back together)
+class EventTable:
+    def __init__(self, db, name, row_type, key="shipment_id"):
+        self.db = db
+        self.name = name
+        self.row_type = row_type
+        self.key = key
+        self.columns = row_type.__slots__
+        self.select_sql = f"SELECT {', '.join(self.columns)} FROM {name}"
+        self.insert_sql = f"INSERT INTO {name} ({', '.join(self.columns)}) VALUES ({', '.join('?' * len(self.columns))})"
+
+    def _query(self, sql, params=()):
+        cursor = self.db.connection().cursor()
+        cursor.row_factory = self.row_type.factory
+        return cursor.execute(sql, params).fetchall()
+
+    def count(self):
+        return self.db.query_one(f"SELECT COUNT(*) FROM {self.name}")[0]
+
+    def get_many(self, keys):
+        rows = []
+        for chunk in chunks(keys):
+            rows += self._query(f"{self.select_sql} WHERE {self.key} IN ({','.join('?' * len(chunk))}) ORDER BY {self.key}", chunk)
+        return rows
+
+    def insert_many(self, rows):
+        self.db.write(lambda conn: conn.executemany(self.insert_sql, [row.astuple() for row in rows]))
+        return rows
+
+    # Returns the number of rows deleted
+    def delete_many(self, keys):
+        def delete(conn):
+            return sum(conn.execute(f"DELETE FROM {self.name} WHERE {self.key} IN ({','.join('?' * len(chunk))})", chunk).rowcount
+                       for chunk in chunks(keys))
+        return self.db.write(delete)
+
+# A table with an integer primary key: adds single-row get/update and id assignment on insert.
+# Rows with a version column are updated optimistically, see update_many.
+class RecordTable(EventTable):
+    def __init__(self, db, name, row_type):
+        super().__init__(db, name, row_type, key="id")
+        self.versioned = "version" in self.columns
+        self.fields = [column for column in self.columns if column not in ("id", "version")]
+        assignments = ', '.join(column + '=?' for column in self.fields)
+        if self.versioned:
+            self.update_sql = f"UPDATE {name} SET {assignments}, version = version + 1 WHERE id=? AND version=?"
+        else:
+            self.update_sql = f"UPDATE {name} SET {assignments} WHERE id=?"
+
+    def get(self, row_id):
+        rows = self._query(f"{self.select_sql} WHERE id=?", (row_id,))
+        return rows[0] if rows else None
+
+    # Rows without an id get the next free ones (set on the objects) and go in with one executemany
+    # (new_rows is fixed before the first attempt, so a retried attempt renumbers the same
+    # rows, including ids set by the attempt that failed)
+    def insert_many(self, rows):
+        new_rows = [row for row in rows if row.id is None]
+
+        def insert(conn):
+            next_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {self.name}").fetchone()[0]
+            for offset, row in enumerate(new_rows):
+                row.id = next_id + offset
+            conn.executemany(self.insert_sql, [row.astuple() for row in rows])
+        self.db.write(insert)
+        return rows
+
+    def insert(self, row):
+        return self.insert_many([row])[0]
+
+    # Returns the number of rows updated; ids that no longer exist are skipped. On a
+    # versioned table each row only applies if its version is still the stored one; if any
+    # row is stale the batch is rolled back and ConflictError names them. Rows written get
+    # their version bumped to match the database.
+    def update_many(self, rows):
+        def update(conn):
+            if not self.versioned:
+                return conn.executemany(self.update_sql, [tuple(getattr(row, column) for column in self.fields) + (row.id,)
+                                                          for row in rows]).rowcount
+            updated, stale = [], []
+            for row in rows:
+                if conn.execute(self.update_sql, tuple(getattr(row, column) for column in self.fields) + (row.id, row.version)).rowcount:
+                    updated.append(row)
+                elif conn.execute(f"SELECT 1 FROM {self.name} WHERE id=?", (row.id,)).fetchone():
+                    stale.append(row.id)
+            if stale:
+                raise ConflictError(self.name, stale)
+            return updated
+        result = self.db.write(update)
+        if not self.versioned:
+            return result
+        for row in result:
+            row.version += 1
+        return len(result)
+
+    def update(self, row):
+        return self.update_many([row]) == 1
+
+
+class FreightRepository:
+    def __init__(self, db):
+        self.db = db
+        self.shipments = RecordTable(db, "shipments", Shipment)
+        self.clients = RecordTable(db, "clients", Client)
+        self.ports = RecordTable(db, "ports", Port)
+        self.delivery_locations = RecordTable(db, "delivery_locations", DeliveryLocation)
+        self.arrivals = EventTable(db, "arrival", Arrival)
+        self.deliveries = EventTable(db, "delivery", Delivery)
+
+    # Usage: with repo.transaction(): ...  groups several batch calls into one commit.
+    # The group isn't retried if freight.db stays locked; use db.write(fn) for that.
+    def transaction(self):
+        return write_transaction(self.db.connection())
+
+    # Shipments together with their arrival and delivery rows
+    def delete_shipments(self, shipment_ids):
+        shipment_ids = list(shipment_ids)
+
+        def delete(conn):
+            deleted = self.shipments.delete_many(shipment_ids)
+            if not self.db.foreign_keys:  # otherwise ON DELETE CASCADE has already done it
+                self.arrivals.delete_many(shipment_ids)
+                self.deliveries.delete_many(shipment_ids)
+            return deleted
+        return self.db.write(delete)
+
+    # Set one status on many shipments whatever their version (bumping it, so clerks
+    # editing one of them get a conflict); returns the number updated
+    def update_status(self, shipment_ids, status):
+        def update(conn):
+            return sum(conn.execute(f"UPDATE shipments SET status = ?, version = version + 1 "
+                                    f"WHERE id IN ({','.join('?' * len(chunk))})", [status] + chunk).rowcount
+                       for chunk in chunks(shipment_ids))
+        return self.db.write(update)
+
+    def table_columns(self, table):
+        return [column[1] for column in self.db.query(f"PRAGMA table_info({table})")]
+
+    def shipment_statuses(self):
+        return [row[0] for row in self.db.query(SHIPMENT_STATUSES)]
+
+    ### Dashboard and overview ###
+
+    # Fleet-wide counts from the summary tables kept by migration_summaries; each list is
+    # (label(s)..., shipments), largest first, at most limit rows
+    def dashboard(self, limit=100):
+        return {
+            "total": self.db.query_one("SELECT COALESCE(SUM(shipments), 0) FROM shipment_status_counts")[0],
+            "events": dict(self.db.query("SELECT table_name, events FROM event_counts")),
+            "by_status": self.db.query("SELECT status, shipments FROM shipment_status_counts "
+                                       "ORDER BY shipments DESC LIMIT ?", (limit,)),
+            "by_route": self.db.query('''SELECT origin.port_name, destination.port_name, counts.shipments
+                                         FROM shipment_route_counts AS counts
+                                         LEFT JOIN ports AS origin ON counts.origin_port_id = origin.id
+                                         LEFT JOIN ports AS destination ON counts.destination_port_id = destination.id
+                                         ORDER BY counts.shipments DESC LIMIT ?''', (limit,)),
+            "by_client": self.db.query('''SELECT clients.client_name, counts.shipments
+                                          FROM shipment_client_counts AS counts
+                                          LEFT JOIN clients ON counts.client_id = clients.id
+                                          ORDER BY counts.shipments DESC LIMIT ?''', (limit,)),
+        }
+
+    # One shipment's list row plus its scan counts and latest scans, all index lookups
+    def shipment_overview(self, shipment_id):
+        rows = self.shipment_list_rows([shipment_id])
+        if not rows:
+            return None
+        overview = dict(zip(("id", "shipment_number", "client", "origin_port", "destination_port", "status"), rows[0]))
+        for table, (time_column, detail_column) in EVENT_TABLES.items():
+            count, first, last = self.db.query_one(f"SELECT COUNT(*), MIN({time_column}), MAX({time_column}) "
+                                                   f"FROM {table} WHERE shipment_id = ?", (shipment_id,))
+            latest = self.db.query_one(f"SELECT {detail_column} FROM {table} WHERE shipment_id = ? "
+                                       f"ORDER BY {time_column} DESC, rowid DESC LIMIT 1", (shipment_id,))
+            overview[table] = {"count": count, "first": first, "last": last, "latest": latest[0] if latest else None}
+        return overview
+
+    ### List views (display tuples) ###
+
+    # One page of the shipment list in display order, see freightQueries.shipment_page_query
+    def shipment_page(self, direction, anchor, limit, sort_column="ID", descending=False, filters=None, search=''):
+        rows = self.db.query(*shipment_page_query(direction, anchor, limit, sort_column, descending, filters, search))
+        if direction == 'prev':
+            rows.reverse()
+        return rows
+
+    # One page of a shipment's arrival or delivery timeline in display order, see freightQueries.event_page_query
+    def event_page(self, table, shipment_id, direction, anchor, limit):
+        rows = self.db.query(*event_page_query(table, shipment_id, direction, anchor, limit))
+        if direction == 'prev':
+            rows.reverse()
+        return rows
+
+    # Rows of a list view for the given ids, optionally narrowed by extra conditions
+    def list_rows(self, select, id_column, ids, conditions=(), params=()):
+        rows = []
+        for chunk in chunks(ids):
+            where = " AND ".join(list(conditions) + [f"{id_column} IN ({','.join('?' * len(chunk))})"])
+            rows += self.db.query(f"{select} WHERE {where}", list(params) + chunk)
+        return rows
+
+    # Shipment list rows for the given ids that pass the filters and search
+    def shipment_list_rows(self, shipment_ids, filters=None, search=''):
+        return self.list_rows(SHIPMENT_SELECT, "shipments.id", shipment_ids, *shipment_conditions(filters, search))
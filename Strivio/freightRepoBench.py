@@ -0,0 +1,49 @@
+import os
+import random
+import sys
+import tempfile
+
+from freightBench import build_database, time_ms
+from freightDB import FreightDB
+from freightRepo import FreightRepository, Shipment
+
+# Batch CRUD timings for freightRepo against generated databases of increasing size.
+# Inserted rows are deleted again within the same step, so the table size stays put.
+BATCH = 1000
+
+def bench_size(path, n, repeat):
+    db = FreightDB(path)
+    repo = FreightRepository(db)
+    rng = random.Random(n)
+    ids = rng.sample(range(1, n + 1), min(BATCH, n))
+    results = {}
+
+    results["get 1"] = time_ms(lambda: repo.shipments.get(ids[0]), repeat * 20)
+    results[f"get {len(ids)}"] = time_ms(lambda: repo.shipments.get_many(ids), repeat)
+    results["page"] = time_ms(lambda: repo.shipment_page('next', (n // 2,), 200), repeat * 20)
+
+    def insert_and_delete():
+        rows = repo.shipments.insert_many([Shipment(None, f"BENCH{i}", 1, 1, 2, "Booked") for i in range(BATCH)])
+        repo.delete_shipments([row.id for row in rows])
+    results[f"insert+delete {BATCH}"] = time_ms(insert_and_delete, repeat)
+
+    rows = repo.shipments.get_many(ids)
+    for row in rows:
+        row.status = "Delayed"
+    results[f"update {len(rows)}"] = time_ms(lambda: repo.shipments.update_many(rows), repeat)
+    db.close()
+    return results
+
+def run(sizes, repeat=5):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"freight_{n}.db")
+            build_database(path, n)
+            results = bench_size(path, n, repeat)
+            if n == sizes[0]:
+                print(f"{'shipments':>10}" + ''.join(f"{label + ' ms':>22}" for label in results))
+            print(f"{n:>10}" + ''.join(f"{ms:>22.3f}" for ms in results.values()))
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    run(sizes)
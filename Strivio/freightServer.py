@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from freightDB import DB_PATH, FreightDB
+from freightEvents import ingest_events
+from freightQueries import CLIENT_SELECT, PORT_SELECT, DELIVERY_LOCATION_SELECT, SHIPMENT_SORT_COLUMNS, SHIPMENT_FILTERS
+from freightRepo import FreightRepository
+
+log = logging.getLogger(__name__)
+
+# HTTP/JSON API over freight.db
+# Serves the same lists as the app's tabs. asyncio handles the sockets; queries run on a
+# fixed pool of worker threads, each holding one read-only connection for its lifetime.
+# The one write path, scan ingest, goes through a separate single-connection pool since
+# SQLite takes one writer at a time anyway.
+# Lists are keyset paged (?after=<last id>&limit=N) and carry an ETag built from the
+# change_log position, so a client polling with If-None-Match gets a 304 without the
+# query being run until something actually changes.
+#
+#   GET /shipments?limit=&after=&sort=&desc=1&status=&client=&origin=&destination=&q=
+#   GET /shipments/<id>
+#   GET /clients   GET /ports   GET /delivery_locations   (?limit=&after=)
+#   POST /events   body: JSON array or JSON Lines of scans (see freightEvents)
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+MAX_BODY = 32 * 1024 * 1024
+EVENT_BATCH = 10000
+
+LISTS = {
+    "clients": (("id", "client_name", "contact_info"), CLIENT_SELECT, "id"),
+    "ports": (("id", "port_name", "location"), PORT_SELECT, "id"),
+    "delivery_locations": (("id", "client", "location_name", "address"), DELIVERY_LOCATION_SELECT, "delivery_locations.id"),
+}
+SHIPMENT_COLUMNS = ("id", "shipment_number", "client", "origin_port", "destination_port", "status")
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Bounded connection pool: at most size threads, so at most size open connections.
+# FreightDB keeps one connection per thread, opened on the thread's first query.
+class ConnectionPool:
+    def __init__(self, path, size=4, read_only=True):
+        self.db = FreightDB(path)
+        self.repo = FreightRepository(self.db)
+        self.size = size
+        self.read_only = read_only
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="freight-pool",
+                                            initializer=self._open)
+
+    def _open(self):
+        if self.read_only:
+            self.db.connection().execute("PRAGMA query_only = ON")
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.db.close()
+
+
+def change_seq(db):
+    return db.query_one("SELECT COALESCE(MAX(seq), 0) FROM change_log")[0]
+
+# Weak ETag: the change_log position plus the request, so it changes whenever a
+# shipment, client, port or delivery location is written
+def make_etag(seq, target):
+    return f'W/"{seq}-{hashlib.sha1(target.encode()).hexdigest()[:12]}"'
+
+def int_param(params, name, default=None, minimum=None, maximum=None):
+    value = params.get(name, [None])[0]
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise HTTPError(400, f"'{name}' must be an integer")
+    if minimum is not None and value < minimum:
+        raise HTTPError(400, f"'{name}' must be at least {minimum}")
+    return min(value, maximum) if maximum is not None else value
+
+def page_body(columns, rows, limit):
+    items = [dict(zip(columns, row)) for row in rows]
+    return {"items": items, "next": items[-1]["id"] if len(items) == limit else None}
+
+# Runs on a pool thread. Reads the change_log position and the page in one read
+# transaction so the ETag always matches the rows sent with it.
+def fetch(repo, target, path, params, if_none_match):
+    conn = repo.db.connection()
+    conn.execute("BEGIN")
+    try:
+        etag = make_etag(change_seq(repo.db), target)
+        if etag in if_none_match:
+            return 304, etag, None
+        return 200, etag, route(repo, path, params)
+    finally:
+        conn.commit()
+
+# Runs on the writer thread
+def post_events(repo, body):
+    try:
+        text = body.decode('utf-8').strip()
+        if text.startswith('['):
+            records = json.loads(text)
+        else:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except ValueError as e:
+        raise HTTPError(400, f"events must be a JSON array or JSON Lines: {e}")
+    if not all(isinstance(record, dict) for record in records):
+        raise HTTPError(400, "every event must be a JSON object")
+    chunks = (records[start:start + EVENT_BATCH] for start in range(0, len(records), EVENT_BATCH))
+    return ingest_events(repo.db.connection(), chunks)
+
+def route(repo, path, params):
+    parts = [part for part in path.split('/') if part]
+    if len(parts) == 2 and parts[0] == "shipments":
+        if not parts[1].isdigit():
+            raise HTTPError(404, "no such shipment")
+        rows = repo.shipment_list_rows([int(parts[1])])
+        if not rows:
+            raise HTTPError(404, "no such shipment")
+        return dict(zip(SHIPMENT_COLUMNS, rows[0]))
+    if len(parts) != 1:
+        raise HTTPError(404, "not found")
+    limit = int_param(params, "limit", DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT)
+    after = int_param(params, "after")
+    if parts[0] == "shipments":
+        return shipment_page(repo, params, after, limit)
+    if parts[0] not in LISTS:
+        raise HTTPError(404, "not found")
+    columns, select, id_column = LISTS[parts[0]]
+    where = f" WHERE {id_column} > ?" if after is not None else ""
+    rows = repo.db.query(f"{select}{where} ORDER BY {id_column} LIMIT ?", ([after] if after is not None else []) + [limit])
+    return page_body(columns, rows, limit)
+
+def shipment_page(repo, params, after, limit):
+    sort_column = params.get("sort", ["ID"])[0]
+    if sort_column not in SHIPMENT_SORT_COLUMNS:
+        raise HTTPError(400, f"'sort' must be one of {', '.join(SHIPMENT_SORT_COLUMNS)}")
+    descending = params.get("desc", ["0"])[0] not in ("0", "", "false")
+    filters = {"status": params.get("status", [''])[0]}
+    for name in SHIPMENT_FILTERS:
+        if name != "status":
+            filters[name] = int_param(params, name)
+    search = params.get("q", [''])[0].strip()
+
+    # The cursor is the id of the last row sent; its current values give the keyset anchor
+    anchor = None
+    if after is not None:
+        rows = repo.shipment_list_rows([after])
+        if rows:
+            anchor = rows[0]
+        elif sort_column == "ID":
+            anchor = (after,)
+        else:
+            raise HTTPError(400, "the 'after' shipment no longer exists, start from the first page")
+    rows = repo.shipment_page('next', anchor, limit, sort_column, descending, filters, search)
+    return page_body(SHIPMENT_COLUMNS, rows, limit)
+
+
+class FreightServer:
+    def __init__(self, pool, writer_pool):
+        self.pool = pool
+        self.writer_pool = writer_pool
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    self.send(writer, 413, {"error": f"request body over {MAX_BODY} bytes"}, keep_alive=False)
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = await self.respond(writer, request_line.decode('latin-1').split(), headers, body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, request, headers, body=b''):
+        if len(request) != 3:
+            self.send(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+            return False
+        method, target, version = request
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        url = urlsplit(target)
+        if method == "POST" and url.path.rstrip('/') == "/events":
+            try:
+                self.send(writer, 200, await self.writer_pool.run(post_events, self.writer_pool.repo, body), keep_alive=keep_alive)
+            except HTTPError as e:
+                self.send(writer, e.status, {"error": str(e)}, keep_alive=keep_alive)
+            except Exception:
+                log.exception("Error ingesting events")
+                self.send(writer, 500, {"error": "internal error"}, keep_alive=keep_alive)
+            return keep_alive
+        if method not in ("GET", "HEAD"):
+            self.send(writer, 405, {"error": "only POST /events writes, use GET"}, keep_alive=keep_alive)
+            return keep_alive
+        if_none_match = [tag.strip() for tag in headers.get("if-none-match", "").split(',')]
+        try:
+            status, etag, body = await self.pool.run(fetch, self.pool.repo, target, url.path,
+                                                     parse_qs(url.query), if_none_match)
+        except HTTPError as e:
+            status, etag, body = e.status, None, {"error": str(e)}
+        except Exception:
+            log.exception("Error serving %s", target)
+            status, etag, body = 500, None, {"error": "internal error"}
+        self.send(writer, status, body, etag, keep_alive, head=method == "HEAD")
+        return keep_alive
+
+    def send(self, writer, status, body, etag=None, keep_alive=True, head=False):
+        payload = b'' if body is None else json.dumps(body).encode()
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}", "Content-Type: application/json",
+                 f"Content-Length: {len(payload)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if etag:
+            lines += [f"ETag: {etag}", "Cache-Control: no-cache"]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (b'' if head else payload))
+
+
+async def serve(path, host, port, pool_size):
+    pool = ConnectionPool(path, pool_size)
+    writer_pool = ConnectionPool(path, 1, read_only=False)
+    server = await asyncio.start_server(FreightServer(pool, writer_pool).handle, host, port)
+    print(f"Serving {path} on http://{host}:{port} with {pool_size} read connections")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.close()
+        writer_pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON API for freight.db")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.pool_size))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+from freightBench import build_database
+from freightDB import JOURNAL_MODE, FreightDB
+from freightMigrations import SHIPMENT_SUMMARIES, SORT_NAMES_ROW, SUMMARY_BATCH
+from freightRepo import Arrival, ConflictError, FreightRepository, Shipment
+
+# Multi-process stress test for shared freight.db access
+# Starts --processes clerks against one database file. Each one runs a mix of
+# read-edit-save cycles on random shipments (re-reading and retrying on a version
+# conflict), bulk status changes, inserts and deletes of its own shipments with scans,
+# and list/dashboard reads. Afterwards it checks that nothing failed with "database is
+# locked", that no update was lost (every shipment's version equals the number of
+# updates that reported success on it) and that the summaries, scan counts and search
+# index still match the tables.
+
+def clerk(path, journal_mode, seed, operations, shipments):
+    db = FreightDB(path, journal_mode=journal_mode)
+    repo = FreightRepository(db)
+    rng = random.Random(seed)
+    updates, errors, latencies = Counter(), [], []
+    conflicts = 0
+    own = []
+    for _ in range(operations):
+        kind = rng.random()
+        start = time.perf_counter()
+        try:
+            if kind < 0.5:
+                shipment_id = rng.randint(1, shipments)
+                while True:
+                    shipment = repo.shipments.get(shipment_id)
+                    shipment.shipment_number = f"SHP{shipment_id:08d}-{seed}-{rng.randint(0, 999)}"
+                    try:
+                        repo.shipments.update(shipment)
+                        updates[shipment_id] += 1
+                        break
+                    except ConflictError:
+                        conflicts += 1
+            elif kind < 0.6:
+                ids = rng.sample(range(1, shipments + 1), 20)
+                repo.update_status(ids, rng.choice(("Booked", "In Transit", "Delivered", "Held")))
+                updates.update(ids)
+            elif kind < 0.8:
+                rows = repo.shipments.insert_many([Shipment(None, f"STRESS{seed}-{i}", 1, 1, 2, "Booked") for i in range(10)])
+                repo.arrivals.insert_many([Arrival(row.id, "2025-01-01T00:00:00", "Port 1") for row in rows])
+                own += [row.id for row in rows]
+                if len(own) > 50:
+                    repo.delete_shipments(own[:30])
+                    del own[:30]
+            elif kind < 0.9:
+                repo.shipment_page('next', (rng.randint(0, shipments),), 100)
+            else:
+                repo.dashboard()
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    result = {"updates": updates, "conflicts": conflicts, "errors": errors, "latencies": latencies,
+              "busy_retries": db.busy_retries}
+    db.close()
+    return result
+
+def run_clerk(args):
+    return clerk(*args)
+
+def consistency_errors(db, shipments, updates):
+    problems = []
+    versions = dict(db.query("SELECT id, version FROM shipments WHERE id <= ?", (shipments,)))
+    lost = [shipment_id for shipment_id in range(1, shipments + 1) if versions.get(shipment_id) != updates[shipment_id]]
+    if lost:
+        problems.append(f"{len(lost)} shipments with lost or phantom updates, e.g. {lost[:5]}")
+    for table, (columns, values) in SHIPMENT_SUMMARIES.items():
+        expected = db.query(f"SELECT {', '.join(value.format(row='shipments') for value in values)}, COUNT(*) "
+                            f"FROM shipments GROUP BY {', '.join(str(i + 1) for i in range(len(columns)))} ORDER BY 1, 2")
+        actual = db.query(f"SELECT {', '.join(columns)}, shipments FROM {table} ORDER BY 1, 2")
+        if expected != actual:
+            problems.append(f"{table} doesn't match shipments")
+    for table in ("arrival", "delivery"):
+        counted = db.query_one("SELECT events FROM event_counts WHERE table_name = ?", (table,))[0]
+        if counted != db.query_one(f"SELECT COUNT(*) FROM {table}")[0]:
+            problems.append(f"event_counts for {table} doesn't match")
+    if db.query_one("SELECT COUNT(*) FROM shipment_search")[0] != db.query_one("SELECT COUNT(*) FROM shipments")[0]:
+        problems.append("shipment_search doesn't match shipments")
+    if db.query(f"{SORT_NAMES_ROW} ORDER BY shipments.id") != db.query("SELECT * FROM shipment_sort_names ORDER BY shipment_id"):
+        problems.append("shipment_sort_names doesn't match shipments")
+    return problems
+
+def run(path, processes, operations, shipments, journal_mode):
+    build_database(path, shipments)
+    FreightDB(path, journal_mode=journal_mode).connection().close()  # switch journal mode before the clerks start
+    jobs = [(path, journal_mode, seed, operations, shipments) for seed in range(processes)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(run_clerk, jobs)
+    seconds = time.perf_counter() - start
+
+    updates = sum((result["updates"] for result in results), Counter())
+    latencies = [ms for result in results for ms in result["latencies"]]
+    errors = [error for result in results for error in result["errors"]]
+    total = processes * operations
+    print(f"{processes} processes x {operations} operations ({journal_mode}) in {seconds:.2f}s, {total / seconds:,.0f} ops/s")
+    print(f"p50 {statistics.median(latencies):.2f} ms, p99 {statistics.quantiles(latencies, n=100)[98]:.2f} ms, "
+          f"{sum(result['conflicts'] for result in results)} version conflicts retried, "
+          f"{sum(result['busy_retries'] for result in results)} busy retries")
+
+    db = FreightDB(path, journal_mode=journal_mode)
+    problems = consistency_errors(db, shipments, updates)
+    db.close()
+    for error in sorted(set(errors)):
+        print(f"error: {error}")
+    for problem in problems:
+        print(f"inconsistent: {problem}")
+    print("OK" if not errors and not problems else f"FAILED: {len(errors)} errors, {len(problems)} inconsistencies")
+    return not errors and not problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process stress test for concurrent freight.db access")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=300, help="operations per process")
+    parser.add_argument("--shipments", type=int, default=2000)
+    parser.add_argument("--journal-mode", default=JOURNAL_MODE, help="WAL (default) or DELETE, as on a network share")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = run(os.path.join(tmp, "freight_stress.db"), args.processes, args.operations, args.shipments, args.journal_mode)
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import getpass
+import hashlib
+import hmac
+import secrets
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from freightDB import DB_PATH, FreightDB
+from freightMigrations import migrate
+
+# Users, password hashing, login sessions and failed-login rate limiting
+# Passwords are stored as salted scrypt hashes ("scrypt$n$r$p$salt$hash"), or PBKDF2 on
+# Python builds whose OpenSSL lacks scrypt; both formats verify. Hashing is deliberately
+# slow (tens of ms), so the login form runs it on the QueryExecutor thread, and once a
+# clerk is in, privileged actions check an in-memory session token instead of hashing
+# the password again.
+
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+PBKDF2_ITERATIONS = 600_000
+HASH_BYTES = 32
+
+def hash_password(password):
+    salt = secrets.token_bytes(16)
+    if hasattr(hashlib, "scrypt"):
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=HASH_BYTES)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS, HASH_BYTES)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+def verify_password(password, stored):
+    kind, *fields = stored.split('$')
+    if kind == "scrypt":
+        n, r, p, salt, expected = fields
+        digest = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p),
+                                dklen=len(expected) // 2)
+    elif kind == "pbkdf2_sha256":
+        iterations, salt, expected = fields
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations), len(expected) // 2)
+    else:
+        raise ValueError(f"Unknown password hash format: {kind}")
+    return hmac.compare_digest(digest.hex(), expected)
+
+# Checked against when the username doesn't exist, so unknown and known users take
+# the same time to reject
+@lru_cache(maxsize=None)
+def dummy_hash():
+    return hash_password(secrets.token_hex(8))
+
+def add_user(conn, username, password):
+    with conn:
+        return conn.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                            (username, hash_password(password))).lastrowid
+
+def set_password(conn, username, password):
+    with conn:
+        return conn.execute("UPDATE users SET password_hash = ? WHERE username = ?",
+                            (hash_password(password), username)).rowcount == 1
+
+def user_count(conn):
+    return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+# Returns (user id, username) when the password matches, else None. Slow on purpose;
+# run it off the Tk thread.
+def authenticate(conn, username, password):
+    row = conn.execute("SELECT id, username, password_hash FROM users WHERE username = ?", (username,)).fetchone()
+    if row is None:
+        verify_password(password, dummy_hash())
+        return None
+    return (row[0], row[1]) if verify_password(password, row[2]) else None
+
+
+# Failed attempts per key (username) within the last window seconds; once there are
+# max_failures of them the key is refused until the oldest one ages out
+class RateLimiter:
+    def __init__(self, max_failures=5, window=300.0, clock=time.monotonic):
+        self.max_failures = max_failures
+        self.window = window
+        self.clock = clock
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key):
+        failures = self._failures.get(key)
+        if failures is None:
+            return deque()
+        cutoff = self.clock() - self.window
+        while failures and failures[0] <= cutoff:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+        return failures
+
+    # Seconds until key may try again, 0 if it may now
+    def retry_after(self, key):
+        with self._lock:
+            failures = self._recent(key)
+            if len(failures) < self.max_failures:
+                return 0.0
+            return failures[-self.max_failures] + self.window - self.clock()
+
+    def failure(self, key):
+        with self._lock:
+            self._recent(key)
+            self._failures.setdefault(key, deque()).append(self.clock())
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+class Session:
+    __slots__ = ("token", "user_id", "username", "created", "last_seen")
+
+    def __init__(self, token, user_id, username, now):
+        self.token = token
+        self.user_id = user_id
+        self.username = username
+        self.created = now
+        self.last_seen = now
+
+# Login sessions by random token. A session ends after idle seconds without use or
+# lifetime seconds in total, whichever comes first.
+class SessionCache:
+    def __init__(self, idle=30 * 60, lifetime=12 * 3600, clock=time.monotonic):
+        self.idle = idle
+        self.lifetime = lifetime
+        self.clock = clock
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_id, username):
+        session = Session(secrets.token_urlsafe(32), user_id, username, self.clock())
+        with self._lock:
+            self._sessions[session.token] = session
+        return session
+
+    # The live session for token (marking it used), or None
+    def get(self, token):
+        now = self.clock()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if now - session.last_seen > self.idle or now - session.created > self.lifetime:
+                del self._sessions[token]
+                return None
+            session.last_seen = now
+            return session
+
+    def end(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+# Shared by the login form and the FreightApp it launches
+SESSIONS = SessionCache()
+LOGIN_LIMITER = RateLimiter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage logins in freight.db")
+    parser.add_argument("--db", default=DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("add", help="add a user").add_argument("username")
+    commands.add_parser("passwd", help="change a user's password").add_argument("username")
+    commands.add_parser("list", help="list users")
+    args = parser.parse_args()
+
+    db = FreightDB(args.db)
+    migrate(db)
+    conn = db.connection()
+    if args.command == "list":
+        for user_id, username, created_at in conn.execute("SELECT id, username, created_at FROM users ORDER BY username"):
+            print(f"{user_id:>5} {username:<24} {created_at}")
+    else:
+        password = getpass.getpass(f"Password for {args.username}: ")
+        if password != getpass.getpass("Repeat password: "):
+            parser.error("passwords don't match")
+        if args.command == "add":
+            try:
+                add_user(conn, args.username, password)
+            except sqlite3.IntegrityError:
+                parser.error(f"there is already a user named {args.username}")
+            print(f"Added {args.username}")
+        elif set_password(conn, args.username, password):
+            print(f"Password changed for {args.username}")
+        else:
+            parser.error(f"no user named {args.username}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
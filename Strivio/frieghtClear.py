@@ -1,19 +1,16 @@
-import sqlite3
+from freightDB import DB_PATH, FreightDB
+from freightMaintenance import truncate, vacuum
+from freightMigrations import migrate
 
-def clear_database():
-    conn = sqlite3.connect('freight.db')
-    cursor = conn.cursor()
-    
-    # Delete all rows from each table
-    cursor.execute('DELETE FROM shipments')
-    cursor.execute('DELETE FROM clients')
-    cursor.execute('DELETE FROM ports')
-    cursor.execute('DELETE FROM delivery_locations')
-    cursor.execute('DELETE FROM arrival')
-    cursor.execute('DELETE FROM delivery')
-    
-    conn.commit()
-    conn.close()
+# Kept for old habits: empties every table. freightMaintenance.py has the full set of
+# options (single tables, archiving, vacuum).
+def clear_database(path=DB_PATH):
+    db = FreightDB(path)
+    migrate(db)
+    truncate(db)
+    reclaimed = vacuum(db)
+    db.close()
+    return reclaimed
 
-# Call this function to clear the database
-clear_database()
+if __name__ == "__main__":
+    print(f"Cleared freight.db, {clear_database():,} bytes reclaimed")
@@ -0,0 +1,68 @@
+import bisect
+
+# In-memory copy of one reference table (id, name), built on first use.
+# Holds the "id: name" labels the Comboboxes show, a name -> id index for saving,
+# and a sorted lowercase name list so typeahead is a binary search, not a scan.
+class ReferenceTable:
+    def __init__(self, db, table, name_column):
+        self.db = db
+        self.table = table
+        self.name_column = name_column
+        self._loaded = False
+
+    def _load(self):
+        rows = self.db.query(f"SELECT id, {self.name_column} FROM {self.table} ORDER BY id")
+        self.labels = [f"{row_id}: {name}" for row_id, name in rows]
+        self.names_by_id = dict(rows)
+        self.ids_by_name = {}
+        self.ids_by_label = {}
+        for (row_id, name), label in zip(rows, self.labels):
+            self.ids_by_name.setdefault(name, row_id)
+            self.ids_by_label[label] = row_id
+        sorted_rows = sorted(zip(((name or '').lower() for _, name in rows), self.labels))
+        self._sorted_names = [name for name, _ in sorted_rows]
+        self._sorted_labels = [label for _, label in sorted_rows]
+        self._loaded = True
+
+    def invalidate(self):
+        self._loaded = False
+
+    def all_labels(self):
+        if not self._loaded:
+            self._load()
+        return self.labels
+
+    # Resolve a Combobox value ("id: name", a bare name or a bare id) to an id, or None
+    def id_for(self, value):
+        if not self._loaded:
+            self._load()
+        value = value.strip()
+        if value in self.ids_by_label:
+            return self.ids_by_label[value]
+        if value in self.ids_by_name:
+            return self.ids_by_name[value]
+        if value.isdigit() and int(value) in self.names_by_id:
+            return int(value)
+        return None
+
+    # Labels whose name starts with text (case-insensitive), at most limit of them
+    def filter(self, text, limit=200):
+        if not self._loaded:
+            self._load()
+        text = text.strip().lower()
+        if not text:
+            return self.labels[:limit]
+        start = bisect.bisect_left(self._sorted_names, text)
+        end = bisect.bisect_left(self._sorted_names, text + '\uffff', start)
+        return self._sorted_labels[start:min(end, start + limit)]
+
+
+# Application-level cache of the clients and ports reference tables
+class LookupCache:
+    def __init__(self, db):
+        self.clients = ReferenceTable(db, "clients", "client_name")
+        self.ports = ReferenceTable(db, "ports", "port_name")
+
+    def invalidate(self, tables=("clients", "ports")):
+        for table in tables:
+            getattr(self, table).invalidate()
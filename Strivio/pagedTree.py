@@ -0,0 +1,162 @@
+import tkinter as tk
+from tkinter import ttk
+
+# Windowed Treeview
+# Only a sliding window of rows lives in the widget. fetch_page(direction, anchor, limit)
+# supplies rows on demand: direction is 'next' (rows after anchor) or 'prev' (rows before
+# anchor); anchor is the first/last loaded row, or None for the start of the list. Both
+# directions must come back in display order. The keyset queries return 'prev' pages
+# nearest-first (freightQueries.shipment_page_query, event_page_query), so the fetch_page
+# passed in flips them: freightRepo.shipment_page and event_page do that. Row[0] must be a unique key and is used as the item iid;
+# sort_key(row) gives the display order (the key itself by default), reversed when
+# descending is set.
+class PagedTreeview:
+    def __init__(self, parent, columns, fetch_page, page_size=200, prefetch=100, sort_key=None, **tree_options):
+        self.fetch_page = fetch_page
+        self.sort_key = sort_key or (lambda row: row[0])
+        self.descending = False
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.max_rows = page_size * 3
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", **tree_options)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self._rows = {}  # iid -> row for the loaded window only
+        self._at_start = True
+        self._at_end = False
+        self._pending = None
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    # Drop the window and load the first page again
+    def reload(self):
+        self.reset(self.fetch_page('next', None, self.first_page_size()))
+
+    # Replace the window with an already fetched first page (e.g. from a background query)
+    def reset(self, rows):
+        self.tree.delete(*self.tree.get_children())
+        self._rows.clear()
+        self._at_start = True
+        self._at_end = False
+        self._append(rows)
+
+    def first_page_size(self):
+        return self.page_size + self.prefetch
+
+    def row(self, iid):
+        return self._rows.get(iid)
+
+    def loaded_rows(self):
+        return [self._rows[iid] for iid in self.tree.get_children()]
+
+    # Apply changed rows in place: update loaded items, insert new rows that fall inside
+    # the loaded window at their sorted position, and drop removed keys
+    def apply_changes(self, rows, removed=()):
+        for key in removed:
+            self._remove(str(key))
+        for row in rows:
+            iid = str(row[0])
+            old = self._rows.get(iid)
+            if old is not None:
+                if self.sort_key(old) == self.sort_key(row):
+                    self._rows[iid] = row
+                    self.tree.item(iid, values=row)
+                    continue
+                self._remove(iid)
+            if self._in_window(row):
+                self._rows[iid] = row
+                self.tree.insert('', self._index_for(row), iid=iid, values=row)
+
+    def _remove(self, iid):
+        if iid in self._rows:
+            del self._rows[iid]
+            self.tree.delete(iid)
+
+    def _in_window(self, row):
+        first, last = self._first_row(), self._last_row()
+        if first is None:
+            return self._at_start and self._at_end
+        return ((self._at_start or not self._before(row, first)) and
+                (self._at_end or not self._before(last, row)))
+
+    # True when row a is displayed above row b
+    def _before(self, a, b):
+        if self.descending:
+            return self.sort_key(a) > self.sort_key(b)
+        return self.sort_key(a) < self.sort_key(b)
+
+    def _index_for(self, row):
+        for index, iid in enumerate(self.tree.get_children()):
+            if self._before(row, self._rows[iid]):
+                return index
+        return tk.END
+
+    def _first_row(self):
+        children = self.tree.get_children()
+        return self._rows[children[0]] if children else None
+
+    def _last_row(self):
+        children = self.tree.get_children()
+        return self._rows[children[-1]] if children else None
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._pending is not None:
+            return
+        # Fetch the next page once the view gets within prefetch rows of either edge
+        loaded = len(self._rows) or 1
+        margin = self.prefetch / loaded
+        if float(last) >= 1.0 - margin and not self._at_end:
+            self._pending = self.tree.after_idle(self._load_next)
+        elif float(first) <= margin and not self._at_start:
+            self._pending = self.tree.after_idle(self._load_prev)
+
+    def _load_next(self):
+        self._pending = None
+        anchor = self._last_row()
+        if anchor is None:
+            return
+        rows = self.fetch_page('next', anchor, self.page_size)
+        self._append(rows)
+        excess = len(self._rows) - self.max_rows
+        if excess > 0:
+            self._trim(self.tree.get_children()[:excess])
+            self._at_start = False
+            self.tree.yview_scroll(-excess, 'units')
+
+    def _load_prev(self):
+        self._pending = None
+        anchor = self._first_row()
+        if anchor is None:
+            return
+        rows = self.fetch_page('prev', anchor, self.page_size)
+        if len(rows) < self.page_size:
+            self._at_start = True
+        for index, row in enumerate(rows):
+            iid = str(row[0])
+            self._rows[iid] = row
+            self.tree.insert('', index, iid=iid, values=row)
+        self.tree.yview_scroll(len(rows), 'units')
+        excess = len(self._rows) - self.max_rows
+        if excess > 0:
+            self._trim(self.tree.get_children()[-excess:])
+            self._at_end = False
+
+    def _append(self, rows):
+        if len(rows) < self.page_size:
+            self._at_end = True
+        for row in rows:
+            iid = str(row[0])
+            self._rows[iid] = row
+            self.tree.insert('', tk.END, iid=iid, values=row)
+
+    def _trim(self, iids):
+        for iid in iids:
+            del self._rows[iid]
+        self.tree.delete(*iids)
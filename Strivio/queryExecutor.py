@@ -0,0 +1,215 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Background query executor
+# Reads run on one worker thread with its own connection. Rows come back in chunks
+# through a result queue that the Tk thread drains with root.after, so a slow join
+# never blocks the mainloop. Each query has a key (e.g. 'shipments'); submitting a
+# new query for a key cancels the stale one, interrupting it if it is still running.
+# Long jobs (imports, exports) go through run_long to a second worker with its own
+# connection, so they never hold up reads or the short run() jobs such as login checks.
+
+# Raised inside a long job by its progress() call once the job has been cancelled
+class JobCancelled(Exception):
+    pass
+
+class QueryExecutor:
+    def __init__(self, root, db, chunk_size=500, poll_ms=20, budget_ms=15):
+        self.root = root
+        self.db = db
+        self.chunk_size = chunk_size
+        self.poll_ms = poll_ms
+        self.budget_ms = budget_ms
+
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._generations = {}  # key -> generation of the newest query for that key
+        self._callbacks = {}    # (key, generation) -> (on_rows, on_done, on_error)
+        self._running = None    # (key, generation) currently executing on the worker
+        self._conn = None
+        self._lock = threading.Lock()
+        self._long_jobs = queue.Queue()
+        self._long_running = None  # (key, generation) on the long-job worker
+        self._long_conn = None
+        self._long_worker = None   # started by the first run_long
+
+        self._worker = threading.Thread(target=self._run, name="QueryExecutor", daemon=True)
+        self._worker.start()
+        self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    # Queue a read. on_rows(rows) is called on the Tk thread for every chunk,
+    # on_done() once the query finishes, on_error(exc) if it fails.
+    def submit(self, key, sql, params=(), on_rows=None, on_done=None, on_error=None):
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            self._drop_callbacks(key)
+            self._callbacks[(key, generation)] = (on_rows, on_done, on_error)
+            if self._running is not None and self._running[0] == key:
+                self._conn.interrupt()
+        self._jobs.put((key, generation, sql, params))
+        return generation
+
+    # Run a short fn(conn) on the worker. on_done(result) is called on the Tk thread.
+    def run(self, key, fn, on_done=None, on_error=None):
+        return self.submit(key, fn, on_done=on_done, on_error=on_error)
+
+    # Run fn(conn, progress) on the long-job worker, e.g. an import. fn calls
+    # progress(value) as it goes and on_progress(value) is called on the Tk thread;
+    # on_done(result) when it finishes. cancel(key) interrupts the running statement and
+    # makes the next progress() raise JobCancelled.
+    def run_long(self, key, fn, on_done=None, on_progress=None, on_error=None):
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            self._drop_callbacks(key)
+            self._callbacks[(key, generation)] = (on_progress, on_done, on_error)
+            self._interrupt(key)
+            if self._long_worker is None:
+                self._long_worker = threading.Thread(target=self._run_long, name="QueryExecutor long jobs", daemon=True)
+                self._long_worker.start()
+        self._long_jobs.put((key, generation, fn))
+        return generation
+
+    def cancel(self, key):
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._drop_callbacks(key)
+            self._interrupt(key)
+
+    # Caller holds self._lock
+    def _interrupt(self, key):
+        if self._running is not None and self._running[0] == key:
+            self._conn.interrupt()
+        if self._long_running is not None and self._long_running[0] == key:
+            self._long_conn.interrupt()
+
+    def shutdown(self):
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._jobs.put(None)
+        self._worker.join(timeout=1)
+        if self._long_worker is not None:
+            self._long_jobs.put(None)
+            self._long_worker.join(timeout=1)
+
+    def _drop_callbacks(self, key):
+        for job in [job for job in self._callbacks if job[0] == key]:
+            del self._callbacks[job]
+
+    def _is_current(self, key, generation):
+        return self._generations.get(key) == generation
+
+    ########### WORKER THREAD ###########
+    def _run(self):
+        conn = self._conn = self.db.connection()
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            key, generation, sql, params = job
+            with self._lock:
+                if not self._is_current(key, generation):
+                    continue
+                if not callable(sql):
+                    self._running = (key, generation)  # only reads are interrupted, never a write job
+            try:
+                self._execute(conn, key, generation, sql, params)
+            except sqlite3.OperationalError as e:
+                if not self._is_current(key, generation):
+                    pass  # interrupted because a newer query replaced it
+                elif str(e) == "interrupted":
+                    self._jobs.put(job)  # interrupt landed late on a fresh query, run it again
+                else:
+                    self._results.put(('error', key, generation, e))
+            except Exception as e:
+                self._results.put(('error', key, generation, e))
+            finally:
+                with self._lock:
+                    self._running = None
+
+    def _run_long(self):
+        conn = self._long_conn = self.db.connection()
+        while True:
+            job = self._long_jobs.get()
+            if job is None:
+                break
+            key, generation, fn = job
+            with self._lock:
+                if not self._is_current(key, generation):
+                    continue
+                self._long_running = (key, generation)
+
+            def progress(value, key=key, generation=generation):
+                if not self._is_current(key, generation):
+                    raise JobCancelled()
+                self._results.put(('progress', key, generation, value))
+
+            try:
+                self._results.put(('result', key, generation, fn(conn, progress)))
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                if self._is_current(key, generation):
+                    self._results.put(('error', key, generation, e))
+            finally:
+                with self._lock:
+                    self._long_running = None
+
+    def _execute(self, conn, key, generation, sql, params):
+        if callable(sql):
+            self._results.put(('result', key, generation, sql(conn)))
+            return
+        cursor = conn.execute(sql, params)
+        while self._is_current(key, generation):
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                self._results.put(('done', key, generation, None))
+                break
+            self._results.put(('rows', key, generation, rows))
+        cursor.close()
+
+    ########### TK THREAD ###########
+    # The next poll is always scheduled, even if a callback raises: one broken callback
+    # mustn't stop every later load from being delivered
+    def _poll(self):
+        try:
+            deadline = time.perf_counter() + self.budget_ms / 1000
+            while time.perf_counter() < deadline:
+                try:
+                    kind, key, generation, payload = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._dispatch(kind, key, generation, payload)
+        finally:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def _dispatch(self, kind, key, generation, payload):
+        callbacks = self._callbacks.get((key, generation))
+        if callbacks is None:
+            return  # stale result from a cancelled query
+        on_rows, on_done, on_error = callbacks
+        if kind not in ('rows', 'progress'):
+            del self._callbacks[(key, generation)]
+        try:
+            if kind in ('rows', 'progress'):  # a long job's on_progress sits in the on_rows slot
+                if on_rows:
+                    on_rows(payload)
+            elif kind == 'done':
+                if on_done:
+                    on_done()
+            elif kind == 'result':
+                if on_done:
+                    on_done(payload)
+            elif on_error:
+                on_error(payload)
+            else:
+                log.error("Error loading %s", key, exc_info=payload)
+        except Exception:
+            log.exception("Error in %s callback for %s", kind, key)
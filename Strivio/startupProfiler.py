@@ -0,0 +1,51 @@
+import os
+import time
+
+# Startup timeline for the app: named marks in ms since this module was imported (the
+# first thing strivTEST.py does), printed once the marks it's waiting for are all in.
+# Set STRIVIO_PROFILE=1 to print it, e.g.
+#
+#   STRIVIO_PROFILE=1 python strivTEST.py
+#
+#   startup                           ms   +ms
+#   imports                         84.1  84.1
+#   migrations                      90.3   6.2
+#   ...
+#   first paint                    201.7  40.2
+
+class StartupProfiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.marks = []
+        self.waiting_for = ()
+        self.reported = False
+
+    def mark(self, name):
+        self.marks.append((name, (time.perf_counter() - self.start) * 1000))
+        if self.waiting_for and not self.reported and all(name in dict(self.marks) for name in self.waiting_for):
+            self.report()
+
+    # Print the report as soon as every one of names has been marked
+    def report_after(self, *names):
+        self.waiting_for = names
+
+    # Marks "first paint" once window has been mapped and Tk has drawn it
+    def watch_first_paint(self, window):
+        def mapped(event):
+            if event.widget is window:
+                window.unbind("<Map>", binding)
+                window.after_idle(lambda: self.mark("first paint"))
+        binding = window.bind("<Map>", mapped, add="+")
+
+    def report(self):
+        self.reported = True
+        if not self.enabled:
+            return
+        print(f"{'startup':<28} {'ms':>8} {'+ms':>8}")
+        previous = 0.0
+        for name, ms in self.marks:
+            print(f"{name:<28} {ms:>8.1f} {ms - previous:>8.1f}")
+            previous = ms
+
+PROFILER = StartupProfiler(os.environ.get("STRIVIO_PROFILE", "") not in ("", "0"))
@@ -1,95 +1,187 @@
+from startupProfiler import PROFILER
+import logging
 import tkinter as tk
-from tkinter import ttk, messagebox
-import sqlite3
+from tkinter import ttk, messagebox, filedialog, simpledialog
+from appSettings import load_settings, save_setting
+from changeFeed import ChangeFeed
+from freightDB import get_db, close_all
+from freightExport import export_view
+from freightImport import import_shipments
+from freightMigrations import LATEST_VERSION, migrate, schema_version
+from freightQueries import (CLIENT_SELECT, PORT_SELECT, DELIVERY_LOCATION_SELECT, SHIPMENT_SORT_COLUMNS, SHIPMENT_STATUSES,
+                            shipment_page_query, shipment_sort_key)
+from freightRepo import ConflictError, FreightRepository, Shipment
+from freightUsers import LOGIN_LIMITER, SESSIONS, authenticate
+from lookupCache import LookupCache
+from pagedTree import PagedTreeview
+from queryExecutor import QueryExecutor
+
+PROFILER.mark("imports")
+
+log = logging.getLogger(__name__)
 
 # Setup Database
-def setup_database():
-    conn = sqlite3.connect('freight.db')
-    cursor = conn.cursor()
-    # Create tables
-
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS shipments (
-                        id INTEGER PRIMARY KEY,
-                        shipment_number TEXT,
-                        client_id INTEGER,
-                        origin_port_id INTEGER,
-                        destination_port_id INTEGER,
-                        status TEXT,
-                        FOREIGN KEY(client_id) REFERENCES clients(id),
-                        FOREIGN KEY(origin_port_id) REFERENCES ports(id),
-                        FOREIGN KEY(destination_port_id) REFERENCES ports(id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS clients (
-                        id INTEGER PRIMARY KEY,
-                        client_name TEXT,
-                        contact_info TEXT)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS ports (
-                        id INTEGER PRIMARY KEY,
-                        port_name TEXT,
-                        location TEXT)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS delivery_locations (
-                        id INTEGER PRIMARY KEY,
-                        client_id INTEGER,
-                        location_name TEXT,
-                        address TEXT,
-                        FOREIGN KEY(client_id) REFERENCES clients(id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS arrival (
-                        shipment_id INTEGER,
-                        arrival_time TEXT,
-                        arrival_location TEXT,
-                        FOREIGN KEY(shipment_id) REFERENCES shipments(id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS delivery (
-                        shipment_id INTEGER,
-                        delivery_time TEXT,
-                        delivery_status TEXT,
-                        FOREIGN KEY(shipment_id) REFERENCES shipments(id))''')
-    conn.commit()
-    conn.close()
+def setup_database(db=None):
+    # Creates the schema on a new freight.db and upgrades older files in place
+    migrate(db or get_db())
+    PROFILER.mark("migrations")
+
+# The shipment list needs the migrated schema; checked on the first load of each
+# database and remembered for the rest of the run
+_checked_schemas = set()
+
+def check_schema(db):
+    if db.path in _checked_schemas:
+        return
+    if schema_version(db) < LATEST_VERSION:
+        raise ValueError(f"{db.path} is at schema version {schema_version(db)}, run setup_database() to upgrade it.")
+    _checked_schemas.add(db.path)
+
+CHANGE_POLL_MS = 1000  # how often to look for writes from other clerks
+CHANGE_POLL_MAX_MS = 60000  # longest wait between polls while they keep failing
+CHANGE_PRUNE_POLLS = 300  # prune change_log every this many polls (about five minutes)
 
 # Main Application
 class FreightApp:
-    def __init__(self, root):
+    def __init__(self, root, session_token=None):
         self.root = root
-        self.root.title("Freight Management")
+        self.session_token = session_token
+        session = SESSIONS.get(session_token) if session_token else None
+        self.username = session.username if session else None
+        self.root.title(f"Freight Management - {self.username}" if self.username else "Freight Management")
+        self.db = get_db()
+        self.repo = FreightRepository(self.db)
+        self.executor = QueryExecutor(self.root, self.db)
+        self.change_feed = ChangeFeed(self.db)
+        self.change_feed.prune()
+        self.change_polls = 0
+        self.poll_delay = CHANGE_POLL_MS
+        self.lookups = LookupCache(self.db)
+        self.detail_windows = []
         self.create_home_page()
+        PROFILER.mark("app built")
+        self.data_version = self.db.query_one("PRAGMA data_version")[0]
+        self.root.after(CHANGE_POLL_MS, self.poll_changes)
 
     def create_home_page(self):
+        # Menu bar
+        menubar = tk.Menu(self.root)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Import Shipments...", command=self.import_manifest)
+        file_menu.add_command(label="Export Shipments...", command=self.export_shipments)
+        file_menu.add_command(label="Cancel Import/Export", command=self.cancel_long_jobs)
+        menubar.add_cascade(label="File", menu=file_menu)
+        self.root.config(menu=menubar)
+
         # Notebook for Tabs
         self.tabControl = ttk.Notebook(self.root)
         self.shipment_tab = ttk.Frame(self.tabControl)
         self.client_tab = ttk.Frame(self.tabControl)
         self.port_tab = ttk.Frame(self.tabControl)
         self.delivery_location_tab = ttk.Frame(self.tabControl)
+        self.dashboard_tab = ttk.Frame(self.tabControl)
 
         # Adding tabs to the notebook
         self.tabControl.add(self.shipment_tab, text='Shipments')
         self.tabControl.add(self.client_tab, text='Clients')
         self.tabControl.add(self.port_tab, text='Ports')
         self.tabControl.add(self.delivery_location_tab, text='Delivery Locations')
+        self.tabControl.add(self.dashboard_tab, text='Dashboard')
         self.tabControl.pack(expand=1, fill="both")
 
-        # Initialize individual tab contents
-        self.initialize_shipment_tab()
-        self.initialize_client_tab()
-        self.initialize_port_tab()
-        self.initialize_delivery_location_tab()
+        # Progress of a running import or export
+        self.job_status = ttk.Label(self.root, text="")
+        self.job_status.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+
+        # Only the shipment tab is built and loaded at startup; the others are built the
+        # first time they're selected, so startup doesn't grow with their tables
+        self.tab_initializers = {str(self.shipment_tab): self.initialize_shipment_tab,
+                                 str(self.client_tab): self.initialize_client_tab,
+                                 str(self.port_tab): self.initialize_port_tab,
+                                 str(self.delivery_location_tab): self.initialize_delivery_location_tab,
+                                 str(self.dashboard_tab): self.initialize_dashboard_tab}
+        self.initialized_tabs = set()
+        self.initialize_tab(self.shipment_tab)
+        self.tabControl.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+    def initialize_tab(self, tab):
+        if str(tab) not in self.initialized_tabs:
+            self.initialized_tabs.add(str(tab))
+            self.tab_initializers[str(tab)]()
+
+    def tab_ready(self, tab):
+        return str(tab) in self.initialized_tabs
+
+    def on_tab_changed(self, event):
+        self.initialize_tab(self.tabControl.select())
+        if self.tabControl.select() == str(self.dashboard_tab):
+            self.load_dashboard()  # refresh whenever the tab is brought up
 
     ########### SHIPMENT TAB ###########
     def initialize_shipment_tab(self):
-        # Treeview for Shipments List
-        self.shipment_tree = ttk.Treeview(self.shipment_tab, columns=("ID", "Shipment Number", "Client", "Origin", "Destination", "Status"), show="headings")
-        self.shipment_tree.heading("ID", text="ID")
-        self.shipment_tree.heading("Shipment Number", text="Shipment Number")
-        self.shipment_tree.heading("Client", text="Client")
-        self.shipment_tree.heading("Origin", text="Origin")
-        self.shipment_tree.heading("Destination", text="Destination")
-        self.shipment_tree.heading("Status", text="Status")
-        self.shipment_tree.pack(fill=tk.BOTH, expand=True)
+        # Search bar, searches as you type (full-text index, see migration_shipment_search)
+        self.search_text = ''
+        self.search_after_id = None
+        search_frame = tk.Frame(self.shipment_tab)
+        search_frame.pack(fill=tk.X, padx=10, pady=5)
+        tk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_entry = tk.Entry(search_frame)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
+        self.search_entry.bind("<Return>", lambda event: self.search_shipments())
+        clear_button = tk.Button(search_frame, text="Clear", command=self.clear_search)
+        clear_button.pack(side=tk.LEFT)
+
+        # Column filters and sort order, applied in SQL and remembered between sessions
+        view = load_settings().get("shipment_view", {})
+        self.sort_column = view.get("sort_column", "ID")
+        if self.sort_column not in SHIPMENT_SORT_COLUMNS:
+            self.sort_column = "ID"
+        self.sort_descending = view.get("descending", False)
+        saved_filters = view.get("filters", {})
+
+        filter_frame = tk.Frame(self.shipment_tab)
+        filter_frame.pack(fill=tk.X, padx=10)
+        self.filter_dropdowns = {}
+        for name, label, table in (("status", "Status:", None), ("client", "Client:", self.lookups.clients),
+                                   ("origin", "Origin:", self.lookups.ports), ("destination", "Destination:", self.lookups.ports)):
+            tk.Label(filter_frame, text=label).pack(side=tk.LEFT)
+            dropdown = ttk.Combobox(filter_frame, width=16)
+            dropdown.insert(0, saved_filters.get(name, ''))
+            dropdown.pack(side=tk.LEFT, padx=(0, 8))
+            dropdown.bind("<<ComboboxSelected>>", lambda event: self.apply_filters())
+            dropdown.bind("<Return>", lambda event: self.apply_filters())
+            if table is not None:
+                dropdown.bind("<KeyRelease>", lambda event, d=dropdown, t=table: d.configure(values=t.filter(d.get())))
+                dropdown.configure(postcommand=lambda d=dropdown, t=table: d.configure(values=t.filter(d.get())))
+            self.filter_dropdowns[name] = dropdown
+        clear_filters_button = tk.Button(filter_frame, text="Clear Filters", command=self.clear_filters)
+        clear_filters_button.pack(side=tk.LEFT)
+        self.shipment_filters = self.read_filters()
+        self.load_statuses()
+
+        # Paged Treeview for Shipments List, only the visible window of rows is loaded
+        self.shipment_pager = PagedTreeview(self.shipment_tab, ("ID", "Shipment Number", "Client", "Origin", "Destination", "Status"),
+                                            self.fetch_shipment_page)
+        self.shipment_tree = self.shipment_pager.tree
+        for column in SHIPMENT_SORT_COLUMNS:
+            self.shipment_tree.heading(column, text=column, command=lambda c=column: self.sort_shipments(c))
+        self.update_sort_headings()
+        self.shipment_pager.pack(fill=tk.BOTH, expand=True)
 
         # Add and Load Buttons
         add_button = tk.Button(self.shipment_tab, text="Add Shipment", command=self.add_shipment)
         add_button.pack(side=tk.LEFT, padx=10, pady=10)
 
+        # Bulk actions on the selected rows (shift/ctrl-click, Ctrl+A for every loaded row)
+        delete_button = tk.Button(self.shipment_tab, text="Delete Selected", command=self.delete_selected_shipments)
+        delete_button.pack(side=tk.LEFT, padx=10, pady=10)
+        status_button = tk.Button(self.shipment_tab, text="Set Status...", command=self.set_selected_status)
+        status_button.pack(side=tk.LEFT, padx=10, pady=10)
+        self.shipment_tree.configure(selectmode="extended")
+        self.shipment_tree.bind("<Delete>", lambda event: self.delete_selected_shipments())
+        self.shipment_tree.bind("<Control-a>", lambda event: self.shipment_tree.selection_set(self.shipment_tree.get_children()))
+
         # Load shipments data from database
         self.load_shipments()
 
@@ -97,36 +189,315 @@ class FreightApp:
         self.shipment_tree.bind("<Double-1>", self.open_shipment_details)
 
     def load_shipments(self):
-        self.shipment_tree.delete(*self.shipment_tree.get_children())  # Clear existing rows
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        
-        # Check if the shipments table has the client_id column
-        cursor.execute("PRAGMA table_info(shipments)")
-        columns = [column[1] for column in cursor.fetchall()]
-        if 'client_id' not in columns:
-            raise ValueError("Column 'client_id' does not exist in the 'shipments' table.")
-        
-        cursor.execute('''SELECT shipments.id, shipments.shipment_number, clients.client_name, 
-                                ports1.port_name AS origin_port, ports2.port_name AS destination_port, 
-                                shipments.status
-                        FROM shipments
-                        LEFT JOIN clients ON shipments.client_id = clients.id
-                        LEFT JOIN ports AS ports1 ON shipments.origin_port_id = ports1.id
-                        LEFT JOIN ports AS ports2 ON shipments.destination_port_id = ports2.id''')
-        
-        for row in cursor.fetchall():
-            self.shipment_tree.insert('', tk.END, values=row)
-        
-        conn.close()
+        check_schema(self.db)
+
+        # First page comes from the background executor, later pages are cheap keyset reads
+        rows = []
+        sql, params = self.shipment_page_query('next', None, self.shipment_pager.first_page_size())
+        self.executor.submit('shipments', sql, params,
+                             on_rows=rows.extend, on_done=lambda: self.shipments_loaded(rows))
+
+    def shipments_loaded(self, rows):
+        self.shipment_pager.reset(rows)
+        if "first shipments page" not in dict(PROFILER.marks):
+            PROFILER.mark("first shipments page")
+
+    # Keyset pagination on (sort column, id) with the active search and filters, all in SQL
+    def shipment_page_query(self, direction, anchor, limit):
+        return shipment_page_query(direction, anchor, limit, self.sort_column, self.sort_descending,
+                                   self.shipment_filters, self.search_text)
+
+    def fetch_shipment_page(self, direction, anchor, limit):
+        return self.repo.shipment_page(direction, anchor, limit, self.sort_column, self.sort_descending,
+                                       self.shipment_filters, self.search_text)
+
+    def schedule_search(self, event):
+        if event.keysym == "Return":
+            return
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(200, self.search_shipments)
+
+    def search_shipments(self):
+        self.search_after_id = None
+        text = self.search_entry.get().strip()
+        if text != self.search_text:
+            self.search_text = text
+            self.load_shipments()
+
+    def clear_search(self):
+        self.search_entry.delete(0, tk.END)
+        self.search_shipments()
+
+    def sort_shipments(self, column):
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column, self.sort_descending = column, False
+        self.update_sort_headings()
+        self.save_shipment_view()
+        self.load_shipments()
+
+    def update_sort_headings(self):
+        for column in SHIPMENT_SORT_COLUMNS:
+            arrow = (" \u25BC" if self.sort_descending else " \u25B2") if column == self.sort_column else ""
+            self.shipment_tree.heading(column, text=column + arrow)
+        self.shipment_pager.sort_key = shipment_sort_key(self.sort_column)
+        self.shipment_pager.descending = self.sort_descending
+
+    # Filter values as ids for the query; client/port dropdowns hold "id: name" labels
+    def read_filters(self):
+        filters = {"status": self.filter_dropdowns["status"].get().strip()}
+        for name, table in (("client", self.lookups.clients), ("origin", self.lookups.ports), ("destination", self.lookups.ports)):
+            value = self.filter_dropdowns[name].get()
+            filters[name] = table.id_for(value) if value.strip() else None
+            if value.strip() and filters[name] is None:
+                filters[name] = -1  # unknown name, match nothing
+        return filters
+
+    def apply_filters(self):
+        filters = self.read_filters()
+        if filters != self.shipment_filters:
+            self.shipment_filters = filters
+            self.save_shipment_view()
+            self.load_shipments()
+
+    def clear_filters(self):
+        for dropdown in self.filter_dropdowns.values():
+            dropdown.set('')
+        self.apply_filters()
+
+    def load_statuses(self):
+        statuses = []
+        self.executor.submit('statuses', SHIPMENT_STATUSES,
+                             on_rows=lambda rows: statuses.extend(row[0] for row in rows),
+                             on_done=lambda: self.filter_dropdowns["status"].configure(values=statuses))
+
+    def save_shipment_view(self):
+        save_setting("shipment_view", {"sort_column": self.sort_column, "descending": self.sort_descending,
+                                       "filters": {name: dropdown.get() for name, dropdown in self.filter_dropdowns.items()}})
+
+    # Clear a tree and stream a query into it chunk by chunk; a newer load for the same key cancels this one
+    def stream_into_tree(self, key, tree, sql):
+        tree.delete(*tree.get_children())
+
+        def insert_rows(rows):
+            for row in rows:
+                if not tree.exists(str(row[0])):  # may already be there from refresh_changes
+                    tree.insert('', tk.END, iid=str(row[0]), values=row)
+
+        self.executor.submit(key, sql, on_rows=insert_rows)
+
+    def reload_all(self):
+        self.change_feed.reset()
+        self.lookups.invalidate()
+        self.load_shipments()
+        if self.tab_ready(self.client_tab):
+            self.load_clients()
+        if self.tab_ready(self.port_tab):
+            self.load_ports()
+        if self.tab_ready(self.delivery_location_tab):
+            self.load_delivery_locations()
+
+    # Pick up writes from other processes (other clerks, imports). data_version only moves
+    # when another connection commits, so an idle poll doesn't touch change_log. Every
+    # so often the log is pruned on the executor, so a long session keeps it bounded.
+    def poll_changes(self):
+        try:
+            data_version = self.db.query_one("PRAGMA data_version")[0]
+            if data_version != self.data_version:
+                self.data_version = data_version
+                self.refresh_changes()
+            self.change_polls += 1
+            if self.change_polls % CHANGE_PRUNE_POLLS == 0:
+                self.executor.run('prune_changes', lambda conn: self.change_feed.prune())
+            self.poll_delay = CHANGE_POLL_MS
+        except Exception:
+            # e.g. freight.db on a share that went away; back off instead of failing every second
+            self.poll_delay = min(self.poll_delay * 2, CHANGE_POLL_MAX_MS)
+            log.exception("Error polling for changes, trying again in %d ms", self.poll_delay)
+        self.root.after(self.poll_delay, self.poll_changes)
+
+    # Refresh only the rows written since the last refresh instead of reloading every tab
+    def refresh_changes(self):
+        changes = self.change_feed.poll()
+        if changes is None:  # too many changes to patch in, reload instead
+            self.reload_all()
+            for window in self.detail_windows:
+                window.shipment_changed()
+            return
+        shipment_ids = changes.get('shipments', set())
+        for window in self.detail_windows:
+            if window.shipment_id in shipment_ids:
+                window.shipment_changed()
+        shipment_ids = set(shipment_ids)
+        client_ids = changes.get('clients', set())
+        if client_ids or changes.get('ports'):
+            # Client and port names are joined into the shipment rows, refetch the loaded window
+            shipment_ids |= {int(iid) for iid in self.shipment_tree.get_children()}
+        if shipment_ids:
+            # Rows that no longer pass the active filters/search drop out of the view
+            rows = self.repo.shipment_list_rows(shipment_ids, self.shipment_filters, self.search_text)
+            self.shipment_pager.apply_changes(rows, shipment_ids - {row[0] for row in rows})
+        # Tabs not built yet load everything current when they are
+        if client_ids:
+            self.lookups.invalidate(("clients",))
+            if self.tab_ready(self.client_tab):
+                self.apply_tree_changes(self.client_tree, CLIENT_SELECT, "id", client_ids)
+            if self.tab_ready(self.delivery_location_tab):
+                rows = self.repo.list_rows(DELIVERY_LOCATION_SELECT, "delivery_locations.client_id", client_ids)
+                self.apply_tree_changes(self.delivery_location_tree, DELIVERY_LOCATION_SELECT, "delivery_locations.id", set(), rows)
+        if changes.get('ports'):
+            self.lookups.invalidate(("ports",))
+            if self.tab_ready(self.port_tab):
+                self.apply_tree_changes(self.port_tree, PORT_SELECT, "id", changes['ports'])
+        if changes.get('delivery_locations') and self.tab_ready(self.delivery_location_tab):
+            self.apply_tree_changes(self.delivery_location_tree, DELIVERY_LOCATION_SELECT, "delivery_locations.id",
+                                    changes['delivery_locations'])
+
+    # Update, insert or remove the given ids in a fully loaded tree
+    def apply_tree_changes(self, tree, select, id_column, ids, rows=None):
+        if rows is None:
+            rows = self.repo.list_rows(select, id_column, ids)
+        for key in ids - {row[0] for row in rows}:
+            if tree.exists(str(key)):
+                tree.delete(str(key))
+        for row in rows:
+            if tree.exists(str(row[0])):
+                tree.item(str(row[0]), values=row)
+            else:
+                tree.insert('', tk.END, iid=str(row[0]), values=row)
 
     def add_shipment(self):
         AddShipmentWindow(self)
 
+    # Privileged actions start with this. Started from logIn.py, the login session must
+    # still be live: that is a dictionary lookup, not a password hash. Once it has expired
+    # the clerk re-enters their password (checked on the executor thread) and action runs
+    # again. Without a login (strivTEST.py run directly) nothing is checked.
+    def require_session(self, action):
+        if self.session_token is None or SESSIONS.get(self.session_token):
+            return True
+        wait = LOGIN_LIMITER.retry_after(self.username.lower())
+        if wait > 0:
+            messagebox.showerror("Session Expired", f"Too many failed attempts, try again in {wait:.0f}s")
+            return False
+        password = simpledialog.askstring("Session Expired", f"Password for {self.username}:", show='*', parent=self.root)
+        if password:
+            self.executor.run('login', lambda conn: authenticate(conn, self.username, password),
+                              on_done=lambda user: self.reauthenticated(user, action),
+                              on_error=lambda e: messagebox.showerror("Login Failed", f"Error checking login: {e}"))
+        return False
+
+    def reauthenticated(self, user, action):
+        if user is None:
+            LOGIN_LIMITER.failure(self.username.lower())
+            messagebox.showerror("Login Failed", "Wrong password")
+            return
+        LOGIN_LIMITER.reset(self.username.lower())
+        SESSIONS.end(self.session_token)
+        self.session_token = SESSIONS.create(*user).token
+        action()
+
+    # Bulk import a CSV/JSONL manifest on the executor's long-job worker
+    def import_manifest(self):
+        if not self.require_session(self.import_manifest):
+            return
+        path = filedialog.askopenfilename(title="Import Shipments",
+                                          filetypes=[("Manifests", "*.csv *.jsonl *.json"), ("All files", "*.*")])
+        if not path:
+            return
+        self.job_status.config(text="Importing shipments...")
+        self.executor.run_long('import', lambda conn, progress: import_shipments(conn, path, progress=progress),
+                               on_done=self.import_finished,
+                               on_progress=lambda done: self.show_job_progress("Imported", *done),
+                               on_error=lambda e: self.long_job_failed("Import Failed", f"Error importing shipments: {e}"))
+
+    def export_shipments(self):
+        path = filedialog.asksaveasfilename(title="Export Shipments", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet")])
+        if not path:
+            return
+        self.job_status.config(text="Exporting shipments...")
+        self.executor.run_long('export', lambda conn, progress: export_view(conn, "shipments", path, progress=progress),
+                               on_done=self.export_finished,
+                               on_progress=lambda done: self.show_job_progress("Exported", *done),
+                               on_error=lambda e: self.long_job_failed("Export Failed", f"Error exporting shipments: {e}"))
+
+    # Imports and exports run on the executor's long-job worker; the UI stays usable and
+    # gets progress after every batch
+    def show_job_progress(self, verb, rows, seconds):
+        self.job_status.config(text=f"{verb} {rows:,} shipments ({seconds:.0f}s)")
+
+    def long_job_failed(self, title, message):
+        self.job_status.config(text="")
+        messagebox.showerror(title, message)
+
+    # Batches already imported stay imported
+    def cancel_long_jobs(self):
+        self.executor.cancel('import')
+        self.executor.cancel('export')
+        self.job_status.config(text="Cancelled")
+        self.refresh_changes()
+
+    def export_finished(self, stats):
+        self.job_status.config(text="")
+        messagebox.showinfo("Export Complete", f"Exported {stats['rows']} shipments in {stats['seconds']:.2f}s")
+
+    def import_finished(self, stats):
+        self.job_status.config(text="")
+        self.refresh_changes()
+        messagebox.showinfo("Import Complete", f"Imported {stats['rows']} shipments in {stats['seconds']:.2f}s "
+                                               f"({stats['rows_per_second']:,.0f} rows/s)")
+
+    def selected_shipment_ids(self):
+        return [int(iid) for iid in self.shipment_tree.selection()]
+
+    # One confirmation and one transaction for the whole selection; scans go by cascade
+    def delete_selected_shipments(self):
+        ids = self.selected_shipment_ids()
+        if not ids or not self.require_session(self.delete_selected_shipments):
+            return
+        if not messagebox.askyesno("Confirm Delete", f"Delete {len(ids)} shipment(s) and their arrival/delivery scans?"):
+            return
+        try:
+            deleted = self.repo.delete_shipments(ids)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error deleting shipments: {e}")
+            return
+        self.refresh_changes()
+        messagebox.showinfo("Success", f"Deleted {deleted} shipment(s)")
+
+    def set_selected_status(self):
+        ids = self.selected_shipment_ids()
+        if not ids or not self.require_session(self.set_selected_status):
+            return
+        current = self.shipment_pager.row(str(ids[0]))
+        status = simpledialog.askstring("Set Status", f"New status for {len(ids)} shipment(s):", parent=self.root,
+                                        initialvalue=current[5] if current else '')
+        if status is None:
+            return
+        try:
+            self.repo.update_status(ids, status.strip())
+        except Exception as e:
+            messagebox.showerror("Error", f"Error updating shipments: {e}")
+            return
+        self.refresh_changes()
+        self.load_statuses()
+
     def open_shipment_details(self, event):
-        item = self.shipment_tree.selection()[0]
+        item = self.shipment_tree.identify_row(event.y)
+        if not item:
+            return
         shipment_id = self.shipment_tree.item(item, "values")[0]
-        ShipmentDetailWindow(self.root, shipment_id, self.load_shipments)
+        window = ShipmentDetailWindow(self.root, shipment_id, self.refresh_changes, self.repo, self.require_session)
+        self.detail_windows.append(window)
+        window.window.bind("<Destroy>", lambda event: self.forget_detail_window(window, event), add="+")
+
+    def forget_detail_window(self, window, event):
+        # <Destroy> also fires for every widget inside the window
+        if event.widget is window.window and window in self.detail_windows:
+            self.detail_windows.remove(window)
 
     ########### CLIENT TAB ###########
     def initialize_client_tab(self):
@@ -145,13 +516,7 @@ class FreightApp:
         self.load_clients()
 
     def load_clients(self):
-        self.client_tree.delete(*self.client_tree.get_children())  # Clear existing rows
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM clients")
-        for row in cursor.fetchall():
-            self.client_tree.insert('', tk.END, values=row)
-        conn.close()
+        self.stream_into_tree('clients', self.client_tree, CLIENT_SELECT)
 
     def add_client(self):
         # Add client logic goes here
@@ -174,13 +539,7 @@ class FreightApp:
         self.load_ports()
 
     def load_ports(self):
-        self.port_tree.delete(*self.port_tree.get_children())  # Clear existing rows
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM ports")
-        for row in cursor.fetchall():
-            self.port_tree.insert('', tk.END, values=row)
-        conn.close()
+        self.stream_into_tree('ports', self.port_tree, PORT_SELECT)
 
     def add_port(self):
         # Add port logic goes here
@@ -204,24 +563,51 @@ class FreightApp:
         self.load_delivery_locations()
 
     def load_delivery_locations(self):
-        self.delivery_location_tree.delete(*self.delivery_location_tree.get_children())  # Clear existing rows
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute('''SELECT delivery_locations.id, clients.client_name, delivery_locations.location_name, delivery_locations.address
-                          FROM delivery_locations
-                          LEFT JOIN clients ON delivery_locations.client_id = clients.id''')
-        for row in cursor.fetchall():
-            self.delivery_location_tree.insert('', tk.END, values=row)
-        conn.close()
+        self.stream_into_tree('delivery_locations', self.delivery_location_tree, DELIVERY_LOCATION_SELECT)
 
     def add_delivery_location(self):
         # Add delivery location logic goes here
         pass
 
+    ########### DASHBOARD TAB ###########
+    def initialize_dashboard_tab(self):
+        # Counts come from the summary tables (see migration_summaries), so refreshing
+        # reads a few hundred rows at most however large shipments/arrival/delivery get
+        self.dashboard_totals = tk.Label(self.dashboard_tab, font=("Arial", 12))
+        self.dashboard_totals.pack(anchor=tk.W, padx=10, pady=5)
+
+        panes = tk.Frame(self.dashboard_tab)
+        panes.pack(fill=tk.BOTH, expand=True)
+        self.dashboard_trees = {}
+        for key, columns in (("by_status", ("Status", "Shipments")),
+                             ("by_route", ("Origin", "Destination", "Shipments")),
+                             ("by_client", ("Client", "Shipments"))):
+            tree = ttk.Treeview(panes, columns=columns, show="headings")
+            for column in columns:
+                tree.heading(column, text=column)
+                tree.column(column, width=90 if column == "Shipments" else 140)
+            tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+            self.dashboard_trees[key] = tree
+
+        refresh_button = tk.Button(self.dashboard_tab, text="Refresh", command=self.load_dashboard)
+        refresh_button.pack(side=tk.LEFT, padx=10, pady=10)
+
+    def load_dashboard(self):
+        dashboard = self.repo.dashboard()
+        events = dashboard["events"]
+        self.dashboard_totals.config(text=f"{dashboard['total']} shipments, {events.get('arrival', 0)} arrival scans, "
+                                          f"{events.get('delivery', 0)} delivery scans")
+        for key, tree in self.dashboard_trees.items():
+            tree.delete(*tree.get_children())
+            for row in dashboard[key]:
+                tree.insert('', tk.END, values=tuple('(none)' if value in (None, '') else value for value in row))
+
 # Add Shipment Window
 class AddShipmentWindow:
     def __init__(self, parent_app):
         self.parent_app = parent_app
+        self.repo = parent_app.repo
+        self.lookups = parent_app.lookups
         self.window = tk.Toplevel(parent_app.root)
         self.window.title("Add New Shipment")
 
@@ -232,14 +618,17 @@ class AddShipmentWindow:
 
         tk.Label(self.window, text="Client:").pack()
         self.client_dropdown = ttk.Combobox(self.window, values=self.get_clients())
+        self.client_dropdown.bind("<KeyRelease>", lambda event: self.filter_dropdown(self.client_dropdown, self.lookups.clients))
         self.client_dropdown.pack()
 
         tk.Label(self.window, text="Origin Port:").pack()
         self.origin_dropdown = ttk.Combobox(self.window, values=self.get_ports())
+        self.origin_dropdown.bind("<KeyRelease>", lambda event: self.filter_dropdown(self.origin_dropdown, self.lookups.ports))
         self.origin_dropdown.pack()
 
         tk.Label(self.window, text="Destination Port:").pack()
         self.destination_dropdown = ttk.Combobox(self.window, values=self.get_ports())
+        self.destination_dropdown.bind("<KeyRelease>", lambda event: self.filter_dropdown(self.destination_dropdown, self.lookups.ports))
         self.destination_dropdown.pack()
 
         tk.Label(self.window, text="Status:").pack()
@@ -250,41 +639,41 @@ class AddShipmentWindow:
         save_button = tk.Button(self.window, text="Save", command=self.save_shipment)
         save_button.pack()
 
+    # The dropdowns show the first entries; typing narrows them down by name prefix
     def get_clients(self):
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, client_name FROM clients")
-        clients = [f"{row[0]}: {row[1]}" for row in cursor.fetchall()]
-        conn.close()
-        return clients
+        return self.lookups.clients.filter('')
 
     def get_ports(self):
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, port_name FROM ports")
-        ports = [f"{row[0]}: {row[1]}" for row in cursor.fetchall()]
-        conn.close()
-        return ports
+        return self.lookups.ports.filter('')
+
+    def filter_dropdown(self, dropdown, table):
+        dropdown['values'] = table.filter(dropdown.get())
 
     def save_shipment(self):
-        client_id = self.client_dropdown.get().split(":")[0]
-        origin_port_id = self.origin_dropdown.get().split(":")[0]
-        destination_port_id = self.destination_dropdown.get().split(":")[0]
-
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO shipments (shipment_number, client_id, origin_port_id, destination_port_id, status) VALUES (?, ?, ?, ?, ?)', 
-                       (self.shipment_number.get(), client_id, origin_port_id, destination_port_id, self.status.get()))
-        conn.commit()
-        conn.close()
-        self.parent_app.load_shipments()  # Refresh the list of shipments
+        ids = []
+        for label, dropdown, table in (("client", self.client_dropdown, self.lookups.clients),
+                                       ("origin port", self.origin_dropdown, self.lookups.ports),
+                                       ("destination port", self.destination_dropdown, self.lookups.ports)):
+            value = dropdown.get()
+            row_id = table.id_for(value) if value.strip() else None
+            if value.strip() and row_id is None:
+                messagebox.showerror("Error", f"Unknown {label} '{value}'")
+                return
+            ids.append(row_id)
+        client_id, origin_port_id, destination_port_id = ids
+
+        self.repo.shipments.insert(Shipment(None, self.shipment_number.get(), client_id, origin_port_id, destination_port_id, self.status.get()))
+        self.parent_app.refresh_changes()  # Add the new row to the list of shipments
         self.window.destroy()
 
 # Shipment Detail Window
 class ShipmentDetailWindow:
-    def __init__(self, parent, shipment_id, refresh_callback):
+    # require_session is FreightApp.require_session: saving and deleting are privileged
+    def __init__(self, parent, shipment_id, refresh_callback, repo=None, require_session=None):
         self.refresh_callback = refresh_callback
-        self.shipment_id = shipment_id
+        self.require_session = require_session or (lambda action: True)
+        self.shipment_id = int(shipment_id)
+        self.repo = repo or FreightRepository(get_db())
         self.window = tk.Toplevel(parent)
         self.window.title(f"Shipment {shipment_id} Details")
 
@@ -303,6 +692,10 @@ class ShipmentDetailWindow:
         self.tabControl.add(self.overview_tab, text='Overview')
         self.tabControl.pack(expand=1, fill="both")
 
+        # Shown when another clerk changes or deletes this shipment while the window is open
+        self.notice = tk.Label(self.window, fg="red")
+        self.notice.pack(side=tk.BOTTOM)
+
         # Load Data into Tabs
         self.load_info_tab()
         self.load_arrival_tab()
@@ -317,60 +710,125 @@ class ShipmentDetailWindow:
         # Load and display consolidated information
         tk.Label(self.overview_tab, text="Overview of Shipment Details", font=("Arial", 12)).pack()
         # Fetch data from the database and display in read-only format
-        pass
+        overview = self.repo.shipment_overview(self.shipment_id)
+        if overview is None:
+            return
+        arrival, delivery = overview["arrival"], overview["delivery"]
+        fields = [("Shipment Number", overview["shipment_number"]), ("Client", overview["client"]),
+                  ("Origin Port", overview["origin_port"]), ("Destination Port", overview["destination_port"]),
+                  ("Status", overview["status"]),
+                  ("Arrival Scans", arrival["count"]), ("First Arrival", arrival["first"]),
+                  ("Last Arrival", arrival["last"]), ("Last Arrival Location", arrival["latest"]),
+                  ("Delivery Scans", delivery["count"]), ("Last Delivery", delivery["last"]),
+                  ("Delivery Status", delivery["latest"])]
+        grid = tk.Frame(self.overview_tab)
+        grid.pack(padx=10, pady=10)
+        for row, (label, value) in enumerate(fields):
+            tk.Label(grid, text=label + ":").grid(row=row, column=0, sticky=tk.E)
+            tk.Label(grid, text='' if value is None else value).grid(row=row, column=1, sticky=tk.W)
 
     def load_info_tab(self):
         # Load shipment info and display in the Info tab
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT shipment_number, origin_port_id, destination_port_id, status FROM shipments WHERE id=?", (self.shipment_id,))
-        shipment = cursor.fetchone()
-        conn.close()
+        self.shipment = self.repo.shipments.get(self.shipment_id)
 
         tk.Label(self.info_tab, text="Shipment Number:").pack()
         self.shipment_number_entry = tk.Entry(self.info_tab)
-        self.shipment_number_entry.insert(0, shipment[0])
+        self.shipment_number_entry.insert(0, self.shipment.shipment_number or '')
         self.shipment_number_entry.pack()
 
         # Additional fields for origin and destination dropdowns can be added in a similar manner.
         # Example:
         # tk.Label(self.info_tab, text="Origin Port:").pack()
         # self.origin_port_entry = tk.Entry(self.info_tab)
-        # self.origin_port_entry.insert(0, shipment[1])
+        # self.origin_port_entry.insert(0, self.shipment.origin_port_id)
         # self.origin_port_entry.pack()
 
-        save_button = tk.Button(self.info_tab, text="Save Changes", command=self.save_info)
-        save_button.pack()
+        self.save_button = tk.Button(self.info_tab, text="Save Changes", command=self.save_info)
+        self.save_button.pack()
 
     def load_arrival_tab(self):
-        # Load arrival info and display in the Arrival tab
-        pass
+        # Arrival scans for this shipment, oldest first
+        self.arrival_pager = self.create_timeline(self.arrival_tab, "arrival", ("Arrival Time", "Location"))
 
     def load_delivery_tab(self):
-        # Load delivery info and display in the Delivery tab
-        pass
+        # Delivery scans for this shipment, oldest first
+        self.delivery_pager = self.create_timeline(self.delivery_tab, "delivery", ("Delivery Time", "Delivery Status"))
+
+    # Paged timeline over the (shipment_id, time) index, so opening a tab reads one page
+    # no matter how many scans the table holds. The hidden first column is the scan's rowid.
+    def create_timeline(self, tab, table, headings):
+        pager = PagedTreeview(tab, ("Scan",) + headings,
+                              lambda direction, anchor, limit: self.repo.event_page(table, self.shipment_id, direction, anchor, limit),
+                              sort_key=lambda row: (row[1] is not None, row[1] or '', row[0]), displaycolumns=headings)
+        for heading in headings:
+            pager.tree.heading(heading, text=heading)
+        pager.pack(fill=tk.BOTH, expand=True)
+        pager.reload()
+        return pager
+
+    def set_shipment_number(self, value):
+        self.shipment_number_entry.delete(0, tk.END)
+        self.shipment_number_entry.insert(0, value or '')
+
+    # Called by FreightApp when this shipment was written elsewhere. Unedited fields take
+    # the new values; an edit in progress is kept, and saving it will ask first.
+    def shipment_changed(self):
+        latest = self.repo.shipments.get(self.shipment_id)
+        if latest is None:
+            self.notice.config(text="This shipment has been deleted by another user.")
+            self.save_button.config(state=tk.DISABLED)
+            return
+        if latest.version == self.shipment.version:
+            return
+        if self.shipment_number_entry.get() == (self.shipment.shipment_number or ''):
+            self.shipment = latest
+            self.set_shipment_number(latest.shipment_number)
+            self.notice.config(text="")
+        else:
+            self.notice.config(text="This shipment was changed by another user while you were editing it.")
+        for widget in self.overview_tab.winfo_children():
+            widget.destroy()
+        self.load_overview_tab()
 
     def save_info(self):
-        # Update shipment information in the database
-        conn = sqlite3.connect('freight.db')
-        cursor = conn.cursor()
-        cursor.execute("UPDATE shipments SET shipment_number=?, origin_port_id=?, destination_port_id=?, status=? WHERE id=?",
-                       (self.shipment_number_entry.get(), self.origin_port_entry.get(), self.destination_port_entry.get(), 
-                        self.status_entry.get(), self.shipment_id))
-        conn.commit()
-        conn.close()
+        # Update shipment information in the database; only applies if nobody else has
+        # saved the shipment since it was loaded (optimistic version check)
+        if not self.require_session(self.save_info):
+            return
+        shipment_number = self.shipment_number_entry.get()
+        self.shipment.shipment_number = shipment_number
+        try:
+            self.repo.shipments.update(self.shipment)
+        except ConflictError:
+            latest = self.repo.shipments.get(self.shipment_id)
+            if latest is None:
+                messagebox.showerror("Error", "This shipment has been deleted by another user.")
+                return
+            if not messagebox.askyesno("Shipment Changed",
+                                       f"Another user changed this shipment since you opened it "
+                                       f"(shipment number '{latest.shipment_number}', status '{latest.status}').\n\n"
+                                       f"Overwrite it with your changes?"):
+                self.shipment = latest
+                self.set_shipment_number(latest.shipment_number)
+                self.notice.config(text="")
+                return
+            latest.shipment_number = shipment_number
+            self.shipment = latest
+            self.save_info()
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Error saving shipment: {e}")
+            return
+        self.notice.config(text="")
+        self.refresh_callback()
         messagebox.showinfo("Success", "Shipment details updated successfully!")
 
     def delete_shipment(self):
         # Confirm and delete the shipment
+        if not self.require_session(self.delete_shipment):
+            return
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this shipment?"):
-            conn = sqlite3.connect('freight.db')
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM shipments WHERE id=?", (self.shipment_id,))
-            cursor.execute("DELETE FROM arrival WHERE shipment_id=?", (self.shipment_id,))
-            cursor.execute("DELETE FROM delivery WHERE shipment_id=?", (self.shipment_id,))
-            conn.commit()
-            conn.close()
+            self.repo.delete_shipments([self.shipment_id])
             messagebox.showinfo("Success", "Shipment deleted successfully!")
             self.refresh_callback()  # Refresh the main list of shipments
             self.window.destroy()
@@ -378,5 +836,9 @@ class ShipmentDetailWindow:
 if __name__ == "__main__":
     setup_database()
     root = tk.Tk()
+    PROFILER.watch_first_paint(root)
+    PROFILER.report_after("first paint", "first shipments page")
     app = FreightApp(root)
     root.mainloop()
+    app.executor.shutdown()
+    close_all()
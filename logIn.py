@@ -1,11 +1,65 @@
+import os
+import sys
 import tkinter as tk
+from tkinter import messagebox
+
+# The freight modules live in Strivio/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Strivio"))
+
+from freightDB import get_db, close_all
+from freightUsers import LOGIN_LIMITER, SESSIONS, authenticate, user_count
+from queryExecutor import QueryExecutor
+from strivTEST import FreightApp, setup_database
+
+setup_database()
+db = get_db()
 
 win_login = tk.Tk()
 win_login.title("User Login")
 win_login.geometry('500x500')
 win_login.configure(bg='#333333')
 
+# Password hashing runs on the executor's worker thread so the form stays responsive
+executor = QueryExecutor(win_login, db)
+session = None
+
 
+#LOGIN
+def login(event=None):
+    username = ent_username.get().strip()
+    password = ent_password.get()
+    if not username or not password:
+        lbl_message.config(text="Enter a username and password")
+        return
+    wait = LOGIN_LIMITER.retry_after(username.lower())
+    if wait > 0:
+        lbl_message.config(text=f"Too many failed attempts, try again in {wait:.0f}s")
+        return
+    btn_login.config(state=tk.DISABLED)
+    lbl_message.config(text="Checking...")
+    executor.run('login', lambda conn: authenticate(conn, username, password),
+                 on_done=lambda user: login_finished(username, user), on_error=login_failed)
+
+def login_finished(username, user):
+    global session
+    btn_login.config(state=tk.NORMAL)
+    if user is None:
+        LOGIN_LIMITER.failure(username.lower())
+        ent_password.delete(0, tk.END)
+        lbl_message.config(text="Wrong username or password")
+        return
+    LOGIN_LIMITER.reset(username.lower())
+    session = SESSIONS.create(*user)
+    win_login.after_idle(close_login)  # not from inside the executor's callback
+
+def close_login():
+    executor.shutdown()
+    win_login.destroy()
+
+def login_failed(error):
+    btn_login.config(state=tk.NORMAL)
+    lbl_message.config(text="")
+    messagebox.showerror("Login Failed", f"Error checking login: {error}")
 
 
 #WIDGET CREATION
@@ -14,7 +68,8 @@ lbl_username = tk.Label(win_login,text="Username",bg="#333333")
 ent_username = tk.Entry(win_login,)
 lbl_password = tk.Label(win_login,text="Password")
 ent_password = tk.Entry(win_login,show="*")
-btn_login = tk.Button(win_login,text="Login",bg="#333333")
+btn_login = tk.Button(win_login,text="Login",bg="#333333",command=login)
+lbl_message = tk.Label(win_login,text="",bg="#333333",fg="red")
 
 #PLACE THE WIDGETS ON SCREEN
 lbl_login.grid(row = 0, column = 0, columnspan=2)
@@ -23,15 +78,21 @@ ent_username.grid(row =1, column = 1)
 lbl_password.grid(row = 2, column = 0)
 ent_password.grid(row = 2, column = 1)
 btn_login.grid(row = 3, column = 0, columnspan=2)
+lbl_message.grid(row = 4, column = 0, columnspan=2)
+
+win_login.bind('<Return>', login)
+win_login.protocol("WM_DELETE_WINDOW", close_login)
+ent_username.focus_set()
+if not user_count(db.connection()):
+    lbl_message.config(text="No users yet: run python Strivio/freightUsers.py add <name>")
 
 
 win_login.mainloop()
 
-#
-#
-#
-#
-#
-#
-#
-#
\ No newline at end of file
+#LAUNCH THE APP ONCE LOGGED IN
+if session is not None:
+    root = tk.Tk()
+    app = FreightApp(root, session.token)
+    root.mainloop()
+    app.executor.shutdown()
+close_all()